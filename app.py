@@ -1,20 +1,36 @@
 import os
 import logging
+import time
 
+import click
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_smorest import Api
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 from dotenv import load_dotenv
+from sqlalchemy.exc import SQLAlchemyError
 
 from extensions.database import db
-from blocklist import BLOCKLIST
+from extensions.cache import criar_cache
+from extensions.senhas import criar_servico_senhas
+from extensions.logs import configurar_logs, ler_niveis
+from extensions.metricas import criar_metricas
+from extensions.pool import monitorar_engine, opcoes_engine
+from blocklist import criar_blocklist
+from models.alteracao import compactar_alteracoes
+from models.estatistica_preco import reconstruir_estatisticas, verificar_estatisticas
+from utilities.arquivo import arquivar_imoveis
+from utilities.catalogo import FORMATOS, exportar_catalogo
+from utilities.coordenadas import importar_centroides, preencher_coordenadas
+from utilities.webhooks import ESPERA_INICIAL, despachar_webhooks
 
 
 from resources.imobiliaria import blp as ImobiliariaBlueprint
 from resources.imovel import blp as ImovelBlueprint
 from resources.usuario import blp as UsuarioBlueprint
+from resources.monitoramento import blp as MonitoramentoBlueprint
+from resources.webhook import blp as WebhookBlueprint
 
 
 def create_app(db_url=None):
@@ -30,6 +46,38 @@ def create_app(db_url=None):
     app.config["OPENAPI_SWAGGER_UI_URL"] = "https://cdn.jsdelivr.net/npm/swagger-ui-dist/"
     app.config["SQLALCHEMY_DATABASE_URI"] = db_url or os.getenv("DATABASE_URL", "sqlite:///data.db")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["BLOCKLIST_BACKEND"] = os.getenv("BLOCKLIST_BACKEND", "memoria")
+    app.config["BLOCKLIST_INTERVALO_LIMPEZA"] = int(os.getenv("BLOCKLIST_INTERVALO_LIMPEZA", "300"))
+    app.config["REDIS_URL"] = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    app.config["CACHE_BACKEND"] = os.getenv("CACHE_BACKEND", "nenhum")
+    app.config["CACHE_TTL"] = int(os.getenv("CACHE_TTL", "60"))
+    app.config["CACHE_TAMANHO_MAXIMO"] = int(os.getenv("CACHE_TAMANHO_MAXIMO", str(64 * 1024 * 1024)))
+    app.config["SENHA_PROCESSOS"] = int(os.getenv("SENHA_PROCESSOS", str(min(os.cpu_count() or 1, 4))))
+    app.config["SENHA_FILA_MAXIMA"] = int(os.getenv("SENHA_FILA_MAXIMA", "32"))
+    app.config["SENHA_ROUNDS"] = int(os.getenv("SENHA_ROUNDS", "29000"))
+    app.config["DB_POOL_TAMANHO"] = int(os.getenv("DB_POOL_TAMANHO", "5"))
+    app.config["DB_POOL_EXCEDENTE"] = int(os.getenv("DB_POOL_EXCEDENTE", "10"))
+    app.config["DB_POOL_TIMEOUT"] = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    app.config["DB_POOL_RECICLAGEM"] = int(os.getenv("DB_POOL_RECICLAGEM", "-1"))
+    app.config["DB_POOL_PRE_PING"] = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+    app.config["DB_TIMEOUT_CONSULTA_MS"] = int(os.getenv("DB_TIMEOUT_CONSULTA_MS", "0"))
+    app.config["LOG_ARQUIVO"] = os.getenv("LOG_ARQUIVO", "middleware.log")
+    app.config["LOG_TAMANHO_MAXIMO"] = int(os.getenv("LOG_TAMANHO_MAXIMO", "5000000"))
+    app.config["LOG_QUANTIDADE_ARQUIVOS"] = int(os.getenv("LOG_QUANTIDADE_ARQUIVOS", "4"))
+    app.config["LOG_NIVEL"] = os.getenv("LOG_NIVEL", "DEBUG").upper()
+    app.config["LOG_NIVEIS"] = ler_niveis(os.getenv("LOG_NIVEIS", ""))
+    app.config["LOG_AMOSTRAGEM_DEBUG"] = float(os.getenv("LOG_AMOSTRAGEM_DEBUG", "1"))
+    app.config["LOG_FILA_MAXIMA"] = int(os.getenv("LOG_FILA_MAXIMA", "10000"))
+    app.config["METRICAS_ATIVAS"] = os.getenv("METRICAS_ATIVAS", "1") == "1"
+    app.config["METRICAS_SERVER_TIMING"] = os.getenv("METRICAS_SERVER_TIMING", "0") == "1"
+    app.config["CATALOGO_DIRETORIO"] = os.path.abspath(
+        os.getenv("CATALOGO_DIRETORIO", os.path.join(app.instance_path, "catalogo"))
+    )
+    app.config["USE_X_SENDFILE"] = os.getenv("USE_X_SENDFILE", "0") == "1"
+    app.config["ARQUIVO_IDADE_DIAS"] = int(os.getenv("ARQUIVO_IDADE_DIAS", "90"))
+    app.config["WEBHOOK_REDE_PRIVADA"] = os.getenv("WEBHOOK_REDE_PRIVADA", "0") == "1"
+    app.config["IMPORTACAO_LOTE_MAXIMO"] = int(os.getenv("IMPORTACAO_LOTE_MAXIMO", "10000"))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = opcoes_engine(app.config["SQLALCHEMY_DATABASE_URI"], app.config)
     app.config["API_SPEC_OPTIONS"] = {
         "components": {
             "securitySchemes": {
@@ -47,6 +95,12 @@ def create_app(db_url=None):
 
 
     db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            monitorar_engine(engine)
+    criar_cache(app)
+    criar_servico_senhas(app)
+    criar_metricas(app)
     CORS(app)
 
     migrate = Migrate(app, db)
@@ -54,13 +108,14 @@ def create_app(db_url=None):
     api = Api(app)
     app.config["JWT_SECRET_KEY"] = db_url or os.getenv("JWT_SECRET_KEY")
     jwt = JWTManager(app)
+    blocklist = criar_blocklist(app)
 
 
 
 
     @jwt.token_in_blocklist_loader
     def check_if_token_in_blocklist(jwt_header, jwt_payload):
-        return jwt_payload["jti"] in BLOCKLIST
+        return blocklist.contem(jwt_payload["jti"])
 
     @jwt.revoked_token_loader
     def revoked_token_callback(jwt_header, jwt_payload):
@@ -134,17 +189,107 @@ def create_app(db_url=None):
     api.register_blueprint(ImobiliariaBlueprint)
     api.register_blueprint(ImovelBlueprint)
     api.register_blueprint(UsuarioBlueprint)
+    api.register_blueprint(MonitoramentoBlueprint)
+    api.register_blueprint(WebhookBlueprint)
 
-    LOGFILE = 'middleware.log'   #Log-File-Name
-    LOGFILESIZE = 5000000    #Log-File-Size (bytes)
-    LOGFILECOUNT = 4 #Rotate-Count-File
+    @app.cli.command("limpar-blocklist")
+    def limpar_blocklist():
+        """Remove da blocklist os tokens já expirados."""
+        blocklist.limpar()
 
-    logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
-    h = logging.handlers.RotatingFileHandler(LOGFILE, maxBytes=LOGFILESIZE, backupCount=LOGFILECOUNT)
-    f = logging.Formatter('[%(asctime)s] %(levelname)s:%(message)s', datefmt='%d/%m/%Y %H:%M:%S')
-    h.setFormatter(f)
-    logger.addHandler(h)
+    @app.cli.command("importar-centroides")
+    @click.argument("arquivo", type=click.File(encoding="utf-8"))
+    def importar_centroides_cep(arquivo):
+        """Substitui os centroides de prefixos de CEP pelos de um CSV (prefixo,latitude,longitude)."""
+        click.echo(f"{importar_centroides(arquivo)} prefixos importados")
+
+    @app.cli.command("preencher-coordenadas")
+    @click.option("--lote", default=1000, show_default=True, help="Imóveis por transação.")
+    def preencher_coordenadas_imoveis(lote):
+        """Preenche as coordenadas dos imóveis sem latitude/longitude pelo centroide do CEP."""
+        click.echo(f"{preencher_coordenadas(lote)} imóveis preenchidos")
+
+    @app.cli.command("reconstruir-estatisticas")
+    @click.option("--verificar", is_flag=True, help="Só compara a tabela com o recálculo, sem alterá-la.")
+    def reconstruir_estatisticas_preco(verificar):
+        """Recalcula as estatísticas de preço a partir da tabela de imóveis."""
+        if not verificar:
+            click.echo(f"{reconstruir_estatisticas()} faixas gravadas")
+            return
+        divergentes = verificar_estatisticas()
+        for chave in divergentes:
+            click.echo("divergente: " + ", ".join(str(parte) for parte in chave))
+        click.echo(f"{len(divergentes)} faixas divergentes")
+        if divergentes:
+            raise SystemExit(1)
+
+    @app.cli.command("compactar-alteracoes")
+    @click.option("--retencao-dias", default=30, show_default=True, help="Dias em que as exclusões são mantidas.")
+    def compactar_alteracoes_catalogo(retencao_dias):
+        """Remove do registro de alterações as substituídas e as exclusões antigas."""
+        click.echo(f"{compactar_alteracoes(retencao_dias)} alterações removidas")
+
+    @app.cli.command("arquivar-imoveis")
+    @click.option("--idade-dias", type=int, help="Padrão: ARQUIVO_IDADE_DIAS.")
+    @click.option("--lote", default=1000, show_default=True, help="Imóveis por transação.")
+    def arquivar_imoveis_inativos(idade_dias, lote):
+        """Move para o arquivo os imóveis inativos sem alteração há mais de N dias."""
+        if idade_dias is None:
+            idade_dias = app.config["ARQUIVO_IDADE_DIAS"]
+        click.echo(f"{arquivar_imoveis(idade_dias, lote)} imóveis arquivados")
+
+    @app.cli.command("exportar-catalogo")
+    @click.option("--formato", type=click.Choice(FORMATOS), multiple=True, help="Padrão: todos os formatos.")
+    @click.option("--intervalo", default=0, show_default=True, help="Repete a exportação a cada N segundos.")
+    @click.option("--lote", default=1000, show_default=True, help="Imóveis lidos por vez do banco.")
+    def exportar_catalogo_imoveis(formato, intervalo, lote):
+        """Gera os arquivos do catálogo de imóveis ativos servidos em GET /imovel/catalogo."""
+        while True:
+            for formato_catalogo in formato or FORMATOS:
+                try:
+                    caminho = exportar_catalogo(app.config["CATALOGO_DIRETORIO"], formato_catalogo, lote)
+                except (SQLAlchemyError, OSError) as error:
+                    # Exportando periodicamente, uma falha não interrompe as próximas
+                    if not intervalo:
+                        raise
+                    logging.warning(f"Erro ao exportar o catálogo {formato_catalogo}: {error}")
+                    continue
+                click.echo(f"catálogo {formato_catalogo}: {caminho}")
+            if not intervalo:
+                return
+            time.sleep(intervalo)
+
+    @app.cli.command("despachar-webhooks")
+    @click.option("--intervalo", default=1.0, show_default=True, help="Espera (s) quando não há o que enviar.")
+    @click.option("--paralelo", default=4, show_default=True, help="Entregas simultâneas.")
+    @click.option("--lote", default=100, show_default=True, help="Alterações por entrega.")
+    @click.option("--timeout", default=10.0, show_default=True, help="Tempo máximo de cada entrega, em segundos.")
+    @click.option(
+        "--espera-inicial", default=ESPERA_INICIAL, type=float, show_default=True, help="Espera (s) após a 1ª falha."
+    )
+    @click.option("--uma-vez", is_flag=True, help="Envia o que está pendente e termina.")
+    def despachar_webhooks_catalogo(intervalo, paralelo, lote, timeout, espera_inicial, uma_vez):
+        """Envia as alterações do catálogo aos webhooks cadastrados."""
+        total = 0
+        while True:
+            try:
+                entregues = despachar_webhooks(paralelo, lote, timeout, espera_inicial)
+            except SQLAlchemyError as error:
+                if uma_vez:
+                    raise
+                logging.warning(f"Erro ao despachar os webhooks: {error}")
+                db.session.rollback()
+                entregues = 0
+            total += entregues
+            if entregues:
+                # Ainda pode haver lotes pendentes: continua sem esperar
+                continue
+            if uma_vez:
+                click.echo(f"{total} alterações entregues")
+                return
+            time.sleep(intervalo)
+
+    configurar_logs(app)
     logging.info('api started')
     
 
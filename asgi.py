@@ -0,0 +1,305 @@
+"""
+asgi.py
+
+Modo de execução assíncrono (ASGI) da API, alternativo ao create_app (WSGI).
+
+Serve as rotas de imóveis, imobiliárias, usuários e webhooks com os mesmos
+schemas, mensagens de erro e regras de JWT, mas acessa o banco por uma engine e
+sessões assíncronas do SQLAlchemy: enquanto uma consulta aguarda o banco, o
+processo segue atendendo outras requisições, de modo que um único processo
+sustenta milhares de requisições concorrentes com banco lento.
+
+Cada requisição roda dentro de um contexto de requisição da aplicação Flask
+criada por create_app, o que reaproveita a configuração, o JWTManager
+(verify_jwt_in_request, blocklist e callbacks de erro), o abort e o tratamento
+de erros do flask-smorest e o jsonify. As rotas aqui só validam os parâmetros e
+chamam, por AsyncSession.run_sync, as mesmas funções das views em resources/,
+que recebem a sessão: consultas, ETag/304 e respostas são as do modo WSGI. O
+hash de senhas e a blocklist rodam em threads, fora do event loop.
+
+Não disponíveis neste modo: streaming NDJSON, cache de respostas e download do
+catálogo. O backend "sql" da blocklist consulta o banco de forma síncrona na
+verificação do token; neste modo prefira "memoria" ou "redis".
+
+Dependências: requirements-asgi.txt
+Uso:
+    uvicorn --factory asgi:create_asgi_app
+"""
+import asyncio
+import contextlib
+import logging
+
+from flask import jsonify, request
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, verify_jwt_in_request
+from flask_smorest import abort
+from marshmallow import ValidationError
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app import create_app
+from blocklist import obter_blocklist
+from extensions.database_async import criar_sessoes_assincronas
+from extensions.pool import monitorar_engine, opcoes_engine
+from extensions.senhas import ServicoSenhasSaturado, obter_servico_senhas
+from resources import imobiliaria, imovel, usuario, webhook
+from schema import (
+    AlteracaoFiltroSchema, EstatisticaFiltroSchema, ImobiliariaFiltroSchema, ImovelBuscaSchema, ImovelCaixaSchema,
+    ImovelFiltroSchema, ImovelProximidadeSchema, PlainImobiliariaSchema, PlainImovelSchema, PlainUsuarioLoginSchema,
+    WebhookSchema,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def carregar(schema, dados, local):
+    """Valida os dados com o schema, respondendo 422 no mesmo formato do flask-smorest."""
+    try:
+        return schema.load(dados)
+    except ValidationError as error:
+        abort(422, errors={local: error.messages})
+
+
+def corpo_json():
+    dados = request.get_json(silent=True)
+    return {} if dados is None else dados
+
+
+# Imóveis
+
+async def listar_imoveis(session):
+    filtros = carregar(ImovelFiltroSchema(), request.args, "query")
+    return await session.run_sync(imovel.listar_imoveis, filtros)
+
+
+async def criar_imovel(session):
+    imovel_data = carregar(PlainImovelSchema(), corpo_json(), "json")
+    return await session.run_sync(imovel.criar_imovel, imovel_data)
+
+
+async def importar_imoveis(session):
+    return await session.run_sync(imovel.importar_imoveis)
+
+
+async def listar_imoveis_proximos(session):
+    filtros = carregar(ImovelProximidadeSchema(), request.args, "query")
+    return await session.run_sync(imovel.listar_imoveis_proximos, filtros)
+
+
+async def listar_imoveis_caixa(session):
+    filtros = carregar(ImovelCaixaSchema(), request.args, "query")
+    return await session.run_sync(imovel.listar_imoveis_caixa, filtros)
+
+
+async def buscar_imoveis(session):
+    filtros = carregar(ImovelBuscaSchema(), request.args, "query")
+    return await session.run_sync(imovel.buscar_imoveis, filtros)
+
+
+async def estatisticas_imoveis(session):
+    dados = request.args.to_dict()
+    if "agrupar" in request.args:
+        # Parâmetro repetido (?agrupar=cidade&agrupar=tipo), como lido pelo webargs
+        dados["agrupar"] = request.args.getlist("agrupar")
+    filtros = carregar(EstatisticaFiltroSchema(), dados, "query")
+    return await session.run_sync(imovel.estatisticas_imoveis, filtros)
+
+
+async def alteracoes_imoveis(session):
+    filtros = carregar(AlteracaoFiltroSchema(), request.args, "query")
+    return await session.run_sync(imovel.alteracoes_imoveis, filtros)
+
+
+async def buscar_imovel(session, id):
+    return await session.run_sync(imovel.buscar_imovel, id)
+
+
+async def editar_imovel(session, id):
+    imovel_data = carregar(PlainImovelSchema(), corpo_json(), "json")
+    return await session.run_sync(imovel.editar_imovel, imovel_data, id)
+
+
+async def excluir_imovel(session, id):
+    return await session.run_sync(imovel.excluir_imovel, id)
+
+
+# Imobiliárias
+
+async def listar_imobiliarias(session):
+    filtros = carregar(ImobiliariaFiltroSchema(), request.args, "query")
+    return await session.run_sync(imobiliaria.listar_imobiliarias, filtros)
+
+
+async def criar_imobiliaria(session):
+    imobiliaria_data = carregar(PlainImobiliariaSchema(), corpo_json(), "json")
+    filtros = carregar(ImobiliariaFiltroSchema(), request.args, "query")
+    return await session.run_sync(imobiliaria.criar_imobiliaria, imobiliaria_data, filtros)
+
+
+async def buscar_imobiliaria(session, id):
+    filtros = carregar(ImobiliariaFiltroSchema(), request.args, "query")
+    return await session.run_sync(imobiliaria.buscar_imobiliaria, filtros, id)
+
+
+async def listar_imoveis_imobiliaria(session, id):
+    filtros = carregar(ImovelFiltroSchema(), request.args, "query")
+    return await session.run_sync(imobiliaria.listar_imoveis_imobiliaria, filtros, id)
+
+
+async def editar_imobiliaria(session, id):
+    imobiliaria_data = carregar(PlainImobiliariaSchema(), corpo_json(), "json")
+    filtros = carregar(ImobiliariaFiltroSchema(), request.args, "query")
+    return await session.run_sync(imobiliaria.editar_imobiliaria, imobiliaria_data, filtros, id)
+
+
+async def excluir_imobiliaria(session, id):
+    return await session.run_sync(imobiliaria.excluir_imobiliaria, id)
+
+
+# Usuários
+
+async def registrar_usuario(session):
+    usuario_data = carregar(PlainUsuarioLoginSchema(), corpo_json(), "json")
+
+    try:
+        hash_senha = await asyncio.to_thread(obter_servico_senhas().gerar_hash, usuario_data["senha"])
+    except ServicoSenhasSaturado:
+        usuario.servico_senhas_saturado()
+
+    return await session.run_sync(usuario.criar_usuario, usuario_data["email"], hash_senha)
+
+
+async def login(session):
+    usuario_data = carregar(PlainUsuarioLoginSchema(), corpo_json(), "json")
+
+    conta = await session.run_sync(usuario.buscar_usuario, usuario_data["email"])
+    if conta is None:
+        abort(401, message="Credenciais inválidas.")
+
+    try:
+        senha_confere, novo_hash = await asyncio.to_thread(
+            obter_servico_senhas().verificar, usuario_data["senha"], conta.senha
+        )
+    except ServicoSenhasSaturado:
+        usuario.servico_senhas_saturado()
+
+    if not senha_confere:
+        abort(401, message="Credenciais inválidas.")
+
+    return await session.run_sync(usuario.concluir_login, conta, novo_hash)
+
+
+async def renovar_token(session):
+    novo_token = create_access_token(identity=get_jwt_identity(), fresh=False)
+    return {"access_token": novo_token}
+
+
+async def logout(session):
+    jwt = get_jwt()
+    await asyncio.to_thread(obter_blocklist().adicionar, jwt["jti"], jwt.get("exp"))
+    return {"message": "Logout realizado com sucesso."}
+
+
+# Webhooks: as views retornam o modelo, serializado pelo flask-smorest
+
+async def criar_webhook(session):
+    webhook_data = carregar(WebhookSchema(), corpo_json(), "json")
+    resultado = await session.run_sync(webhook.criar_webhook, webhook_data)
+    return jsonify(WebhookSchema().dump(resultado)), 201
+
+
+async def listar_webhooks(session):
+    resultado = await session.run_sync(webhook.listar_webhooks)
+    return jsonify(WebhookSchema(many=True).dump(resultado))
+
+
+async def buscar_webhook(session, id):
+    resultado = await session.run_sync(webhook.buscar_webhook, id)
+    return jsonify(WebhookSchema().dump(resultado))
+
+
+async def excluir_webhook(session, id):
+    return await session.run_sync(webhook.excluir_webhook, id)
+
+
+def converter_resposta(resposta):
+    """Converte uma resposta do Flask em resposta do Starlette."""
+    return Response(
+        content=resposta.get_data(),
+        status_code=resposta.status_code,
+        headers=dict(resposta.headers),
+    )
+
+
+def create_asgi_app(db_url=None):
+    flask_app = create_app(db_url)
+    url = flask_app.config["SQLALCHEMY_DATABASE_URI"]
+    engine, sessoes = criar_sessoes_assincronas(url, **opcoes_engine(url, flask_app.config, assincrono=True))
+    monitorar_engine(engine.sync_engine)
+
+    def rota(caminho, metodo, handler, autenticacao=None):
+
+        async def endpoint(requisicao):
+            corpo = await requisicao.body()
+            with flask_app.test_request_context(
+                requisicao.url.path,
+                method=requisicao.method,
+                query_string=requisicao.url.query,
+                headers=list(requisicao.headers.items()),
+                data=corpo,
+            ):
+                try:
+                    # before_request/after_request da aplicação Flask (id da
+                    # requisição, log de acesso, CORS) valem também neste modo
+                    resposta = flask_app.preprocess_request()
+                    if resposta is None:
+                        if autenticacao is not None:
+                            verify_jwt_in_request(refresh=autenticacao == "refresh")
+                        async with sessoes() as session:
+                            resposta = await handler(session, **requisicao.path_params)
+                except Exception as error:
+                    # HTTPException (abort) e erros de JWT usam os mesmos
+                    # handlers de erro registrados na aplicação Flask
+                    resposta = flask_app.handle_user_exception(error)
+                return converter_resposta(flask_app.process_response(flask_app.make_response(resposta)))
+
+        return Route(caminho, endpoint, methods=[metodo])
+
+    @contextlib.asynccontextmanager
+    async def ciclo_de_vida(app):
+        yield
+        await engine.dispose()
+
+    return Starlette(
+        routes=[
+            rota("/imovel", "GET", listar_imoveis, "access"),
+            rota("/imovel", "POST", criar_imovel, "access"),
+            rota("/imovel/bulk", "POST", importar_imoveis, "access"),
+            rota("/imovel/near", "GET", listar_imoveis_proximos, "access"),
+            rota("/imovel/bbox", "GET", listar_imoveis_caixa, "access"),
+            rota("/imovel/busca", "GET", buscar_imoveis, "access"),
+            rota("/imovel/estatisticas", "GET", estatisticas_imoveis, "access"),
+            rota("/imovel/changes", "GET", alteracoes_imoveis, "access"),
+            rota("/imovel/{id:int}", "GET", buscar_imovel, "access"),
+            rota("/imovel/{id:int}", "PUT", editar_imovel, "access"),
+            rota("/imovel/{id:int}", "DELETE", excluir_imovel, "access"),
+            rota("/imobiliaria", "GET", listar_imobiliarias, "access"),
+            rota("/imobiliaria", "POST", criar_imobiliaria, "access"),
+            rota("/imobiliaria/{id:int}", "GET", buscar_imobiliaria, "access"),
+            rota("/imobiliaria/{id:int}", "PUT", editar_imobiliaria, "access"),
+            rota("/imobiliaria/{id:int}", "DELETE", excluir_imobiliaria, "access"),
+            rota("/imobiliaria/{id:int}/imoveis", "GET", listar_imoveis_imobiliaria, "access"),
+            rota("/registrar", "POST", registrar_usuario),
+            rota("/login", "POST", login),
+            rota("/refresh", "POST", renovar_token, "refresh"),
+            rota("/logout", "POST", logout, "access"),
+            rota("/webhook", "POST", criar_webhook, "access"),
+            rota("/webhook", "GET", listar_webhooks, "access"),
+            rota("/webhook/{id:int}", "GET", buscar_webhook, "access"),
+            rota("/webhook/{id:int}", "DELETE", excluir_webhook, "access"),
+        ],
+        middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+        lifespan=ciclo_de_vida,
+    )
@@ -0,0 +1,186 @@
+"""
+Gerador de massa de dados sintética e reprodutível para os benchmarks.
+
+Gera imobiliárias (com CNPJ válido), imóveis distribuídos por cidades e
+bairros reais, com tipo, finalidade e valores plausíveis, e usuários. A mesma
+semente gera sempre os mesmos dados. As inserções são feitas em lotes
+(executemany), de modo que 5 milhões de imóveis cabem em memória constante.
+
+Todos os usuários têm a senha SENHA e o mesmo hash, calculado uma vez com os
+rounds configurados na aplicação (SENHA_ROUNDS).
+
+Uso (também chamado por benchmarks.cenarios):
+    python -m benchmarks.dados --url sqlite:////tmp/bench.db --imoveis 1000000
+"""
+import argparse
+import json
+import random
+import time
+
+from passlib.hash import pbkdf2_sha256
+from sqlalchemy import insert
+
+from app import create_app
+from utilities.geo import celula
+from benchmarks.validacao import gerar_cnpj
+from extensions.database import db
+from models import ImobiliariaModel, ImovelModel, UsuarioModel
+from models.estatistica_preco import reconstruir_estatisticas
+from models.enums.tipo_imovel import TipoImovelEnum
+
+SENHA = "bench"
+TAMANHO_LOTE = 10000
+IMOVEIS_POR_IMOBILIARIA = 500
+
+# (cidade, estado, prefixo do CEP, bairros)
+CIDADES = (
+    ("São Paulo", "SP", "01", ("Bela Vista", "Pinheiros", "Moema", "Vila Mariana", "Tatuapé", "Santana", "Butantã", "Itaim Bibi")),
+    ("Rio de Janeiro", "RJ", "22", ("Copacabana", "Botafogo", "Tijuca", "Barra da Tijuca", "Leblon", "Méier")),
+    ("Belo Horizonte", "MG", "30", ("Savassi", "Funcionários", "Pampulha", "Buritis", "Lourdes")),
+    ("Curitiba", "PR", "80", ("Batel", "Água Verde", "Centro Cívico", "Portão", "Bigorrilho")),
+    ("Florianópolis", "SC", "88", ("Centro", "Trindade", "Ingleses", "Campeche", "Coqueiros", "Itacorubi")),
+    ("Porto Alegre", "RS", "90", ("Moinhos de Vento", "Menino Deus", "Petrópolis", "Cidade Baixa")),
+    ("Salvador", "BA", "40", ("Barra", "Pituba", "Rio Vermelho", "Itaigara")),
+    ("Recife", "PE", "50", ("Boa Viagem", "Casa Forte", "Graças", "Espinheiro")),
+    ("Fortaleza", "CE", "60", ("Aldeota", "Meireles", "Cocó", "Fátima")),
+    ("Goiânia", "GO", "74", ("Setor Bueno", "Setor Oeste", "Setor Marista")),
+    ("Brasília", "DF", "70", ("Asa Sul", "Asa Norte", "Lago Sul", "Sudoeste")),
+    ("Campinas", "SP", "13", ("Cambuí", "Taquaral", "Barão Geraldo")),
+)
+# Centro aproximado de cada cidade; os imóveis ficam espalhados em torno dele
+CENTROS_CIDADES = {
+    "São Paulo": (-23.5505, -46.6333),
+    "Rio de Janeiro": (-22.9068, -43.1729),
+    "Belo Horizonte": (-19.9167, -43.9345),
+    "Curitiba": (-25.4284, -49.2733),
+    "Florianópolis": (-27.5954, -48.5480),
+    "Porto Alegre": (-30.0346, -51.2177),
+    "Salvador": (-12.9777, -38.5016),
+    "Recife": (-8.0476, -34.8770),
+    "Fortaleza": (-3.7319, -38.5267),
+    "Goiânia": (-16.6869, -49.2648),
+    "Brasília": (-15.7939, -47.8828),
+    "Campinas": (-22.9099, -47.0626),
+}
+# Desvio padrão, em graus, da distância dos imóveis ao centro (~7 km)
+DISPERSAO_COORDENADAS = 0.06
+# Fração dos imóveis sem coordenadas (a preencher pelo CEP)
+FRACAO_SEM_COORDENADAS = 0.05
+# Peso de cada cidade na distribuição dos imóveis (capitais maiores concentram mais anúncios)
+PESOS_CIDADES = (30, 18, 9, 7, 6, 6, 6, 5, 5, 3, 3, 2)
+RUAS = ("Rua das Flores", "Avenida Brasil", "Rua XV de Novembro", "Rua Sete de Setembro", "Avenida Paulista",
+        "Rua da Paz", "Rua Tiradentes", "Avenida Beira-Mar", "Rua dos Andradas", "Rua Santos Dumont")
+# (tipo, peso, mediana do valor de venda)
+TIPOS = (
+    (TipoImovelEnum.apartamento, 50, 450000),
+    (TipoImovelEnum.casa, 30, 650000),
+    (TipoImovelEnum.terreno, 10, 250000),
+    (TipoImovelEnum.sala, 10, 300000),
+)
+
+
+def gerar_imobiliarias(aleatorio, quantidade):
+    cnpjs = set()
+    for indice in range(1, quantidade + 1):
+        cnpj = gerar_cnpj(aleatorio)
+        while cnpj in cnpjs:
+            cnpj = gerar_cnpj(aleatorio)
+        cnpjs.add(cnpj)
+        yield {
+            "nome_fantasia": f"Imobiliária {indice:06d}",
+            "razao_social": f"Imobiliária {indice:06d} Negócios Imobiliários Ltda",
+            "cnpj": "".join(filter(str.isdigit, cnpj)),
+            "telefone": f"{aleatorio.choice((11, 21, 31, 41, 48, 51, 71, 81, 85, 61))}9{aleatorio.randint(10000000, 99999999)}",
+            "email": f"contato{indice:06d}@imobiliaria.com.br",
+        }
+
+
+def gerar_imoveis(aleatorio, quantidade, quantidade_imobiliarias):
+    tipos = [tipo for tipo, _, _ in TIPOS]
+    pesos_tipos = [peso for _, peso, _ in TIPOS]
+    medianas = {tipo: mediana for tipo, _, mediana in TIPOS}
+
+    for _ in range(quantidade):
+        cidade, estado, prefixo_cep, bairros = aleatorio.choices(CIDADES, PESOS_CIDADES)[0]
+        tipo = aleatorio.choices(tipos, pesos_tipos)[0]
+        aluguel = aleatorio.random() < 0.6
+        venda = not aluguel or aleatorio.random() < 0.3
+        valor_venda = round(medianas[tipo] * aleatorio.lognormvariate(0, 0.5), -3)
+        latitude = longitude = None
+        if aleatorio.random() >= FRACAO_SEM_COORDENADAS:
+            centro_lat, centro_lon = CENTROS_CIDADES[cidade]
+            latitude = round(aleatorio.gauss(centro_lat, DISPERSAO_COORDENADAS), 6)
+            longitude = round(aleatorio.gauss(centro_lon, DISPERSAO_COORDENADAS), 6)
+        yield {
+            "aluguel": aluguel,
+            "venda": venda,
+            "tipo": tipo,
+            "ativo": aleatorio.random() < 0.9,
+            "valor_venda": valor_venda if venda else None,
+            "valor_aluguel": round(valor_venda * 0.005, -1) if aluguel else None,
+            "rua": aleatorio.choice(RUAS),
+            "numero": str(aleatorio.randint(1, 4000)),
+            "bairro": aleatorio.choice(bairros),
+            "cep": f"{prefixo_cep}{aleatorio.randint(0, 999):03d}-{aleatorio.randint(0, 999):03d}",
+            "cidade": cidade,
+            "estado": estado,
+            "latitude": latitude,
+            "longitude": longitude,
+            # Inserções em lote não passam pelo evento do modelo que calcula a célula
+            "geocelula": celula(latitude, longitude),
+            "imobiliaria_id": aleatorio.randint(1, quantidade_imobiliarias),
+        }
+
+
+def inserir_em_lotes(modelo, linhas):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) == TAMANHO_LOTE:
+            db.session.execute(insert(modelo), lote)
+            lote = []
+    if lote:
+        db.session.execute(insert(modelo), lote)
+
+
+def popular(imoveis, usuarios=100, semente=42, rounds=None):
+    """
+    Popula o banco da aplicação atual. Deve ser chamada dentro de um app_context,
+    com as tabelas já criadas e vazias. Retorna a quantidade de registros de cada tabela.
+    """
+
+    aleatorio = random.Random(semente)
+    quantidade_imobiliarias = max(1, imoveis // IMOVEIS_POR_IMOBILIARIA)
+    hash_senha = pbkdf2_sha256.using(rounds=rounds).hash(SENHA) if rounds else pbkdf2_sha256.hash(SENHA)
+
+    inserir_em_lotes(UsuarioModel, (
+        {"email": f"usuario{indice:06d}@bench.com", "senha": hash_senha} for indice in range(1, usuarios + 1)
+    ))
+    inserir_em_lotes(ImobiliariaModel, gerar_imobiliarias(aleatorio, quantidade_imobiliarias))
+    inserir_em_lotes(ImovelModel, gerar_imoveis(aleatorio, imoveis, quantidade_imobiliarias))
+    db.session.commit()
+    # As inserções em lote não passam pelos eventos que mantêm as estatísticas de preço
+    reconstruir_estatisticas()
+
+    return {"usuarios": usuarios, "imobiliarias": quantidade_imobiliarias, "imoveis": imoveis}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="URL do banco (as tabelas são recriadas)")
+    parser.add_argument("--imoveis", type=int, default=10000)
+    parser.add_argument("--usuarios", type=int, default=100)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app(args.url)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        inicio = time.perf_counter()
+        quantidades = popular(args.imoveis, args.usuarios, args.semente, app.config["SENHA_ROUNDS"])
+    print(json.dumps({**quantidades, "segundos": round(time.perf_counter() - inicio, 1)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
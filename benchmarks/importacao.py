@@ -0,0 +1,99 @@
+"""
+Benchmark da importação em lote (POST /imovel/bulk) contra o cadastro
+unitário (POST /imovel).
+
+Mede imóveis por segundo em cada caminho sobre um banco SQLite novo.
+
+Uso:
+    python -m benchmarks.importacao --unitarios 500 --lote 50000
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+
+from app import create_app
+from extensions.database import db
+
+
+def imovel(i):
+    return {
+        "aluguel": i % 2 == 0,
+        "venda": True,
+        "tipo": "apartamento",
+        "valor_venda": 250000.0 + i,
+        "valor_aluguel": 1500.0,
+        "rua": "Rua %d" % (i % 1000),
+        "numero": str(i % 5000),
+        "bairro": "Centro",
+        "cep": "88010-000",
+        "cidade": "Florianópolis",
+        "estado": "SC",
+        "imobiliaria_id": 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--unitarios", type=int, default=500)
+    parser.add_argument("--lote", type=int, default=50000)
+    parser.add_argument("--tamanho-lote", type=int, default=1000)
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp()
+    app = create_app("sqlite:///" + os.path.join(diretorio, "benchmark.db"))
+    with app.app_context():
+        db.create_all()
+
+    client = app.test_client()
+    client.post("/registrar", json={"email": "bench@bench.com", "senha": "bench"})
+    login = client.post("/login", json={"email": "bench@bench.com", "senha": "bench"})
+    headers = {"Authorization": "Bearer " + login.get_json()["token"]["access_token"]}
+    client.post("/imobiliaria", headers=headers, json={
+        "nome_fantasia": "Imobiliária Benchmark",
+        "cnpj": "11.222.333/0001-81",
+        "telefone": "(48) 99999-9999",
+        "email": "bench@imobiliaria.com",
+    })
+
+    resultado = {}
+
+    inicio = time.perf_counter()
+    for i in range(args.unitarios):
+        resposta = client.post("/imovel", headers=headers, json=imovel(i))
+        assert resposta.status_code == 200, resposta.data
+    duracao = time.perf_counter() - inicio
+    resultado["unitario"] = {"imoveis": args.unitarios, "imoveis_por_segundo": round(args.unitarios / duracao, 1)}
+
+    ndjson = "".join(json.dumps(imovel(i)) + "\n" for i in range(args.lote)).encode()
+
+    saida = io.StringIO()
+    escritor = csv.DictWriter(saida, fieldnames=list(imovel(0)))
+    escritor.writeheader()
+    escritor.writerows(imovel(i) for i in range(args.lote))
+    corpo_csv = saida.getvalue().encode()
+
+    for formato, corpo, mimetype in (("ndjson", ndjson, "application/x-ndjson"), ("csv", corpo_csv, "text/csv")):
+        inicio = time.perf_counter()
+        resposta = client.post(
+            "/imovel/bulk?lote=%d" % args.tamanho_lote,
+            headers={**headers, "Content-Type": mimetype},
+            data=corpo,
+        )
+        duracao = time.perf_counter() - inicio
+        assert resposta.get_json()["inseridos"] == args.lote, resposta.data[:500]
+        resultado["bulk_" + formato] = {"imoveis": args.lote, "imoveis_por_segundo": round(args.lote / duracao, 1)}
+
+    for chave in ("bulk_ndjson", "bulk_csv"):
+        resultado[chave]["ganho"] = round(
+            resultado[chave]["imoveis_por_segundo"] / resultado["unitario"]["imoveis_por_segundo"], 1
+        )
+
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
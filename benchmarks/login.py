@@ -0,0 +1,103 @@
+"""
+Benchmark de uma rajada de logins contra as demais rotas.
+
+Enquanto várias threads fazem login sem parar, outras threads consultam
+GET /imovel/<id>. Reporta logins por segundo, respostas 503 (serviço de senhas
+saturado) e a latência p50/p99 das consultas, com o hash calculado na própria
+thread da requisição (SENHA_PROCESSOS=0) e no pool de processos.
+
+Uso:
+    python -m benchmarks.login --segundos 10 --threads-login 16 --threads-leitura 4
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from app import create_app
+from extensions.database import db
+
+
+def preparar(processos):
+    os.environ["SENHA_PROCESSOS"] = str(processos)
+    diretorio = tempfile.mkdtemp()
+    app = create_app("sqlite:///" + os.path.join(diretorio, "benchmark.db"))
+    with app.app_context():
+        db.create_all()
+
+    client = app.test_client()
+    client.post("/registrar", json={"email": "bench@bench.com", "senha": "bench"})
+    login = client.post("/login", json={"email": "bench@bench.com", "senha": "bench"})
+    headers = {"Authorization": "Bearer " + login.get_json()["token"]["access_token"]}
+    client.post("/imobiliaria", headers=headers, json={
+        "nome_fantasia": "Imobiliária Benchmark",
+        "cnpj": "11.222.333/0001-81",
+        "telefone": "(48) 99999-9999",
+        "email": "bench@imobiliaria.com",
+    })
+    client.post("/imovel", headers=headers, json={
+        "aluguel": True, "tipo": "casa", "rua": "Rua A", "numero": "1", "bairro": "Centro",
+        "cep": "88010-000", "cidade": "Florianópolis", "estado": "SC", "imobiliaria_id": 1,
+    })
+    return app, headers
+
+
+def executar(processos, segundos, threads_login, threads_leitura):
+    app, headers = preparar(processos)
+    fim = time.perf_counter() + segundos
+    logins = []
+    saturados = []
+    latencias = []
+
+    def fazer_logins():
+        client = app.test_client()
+        while time.perf_counter() < fim:
+            resposta = client.post("/login", json={"email": "bench@bench.com", "senha": "bench"})
+            (logins if resposta.status_code == 200 else saturados).append(1)
+
+    def fazer_leituras():
+        client = app.test_client()
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            client.get("/imovel/1", headers=headers)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    threads = [threading.Thread(target=fazer_logins) for _ in range(threads_login)]
+    threads += [threading.Thread(target=fazer_leituras) for _ in range(threads_leitura)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencias.sort()
+    return {
+        "logins_por_segundo": round(len(logins) / segundos, 1),
+        "respostas_503": len(saturados),
+        "leituras": len(latencias),
+        "leitura_p50_ms": round(statistics.median(latencias), 2),
+        "leitura_p99_ms": round(latencias[int(len(latencias) * 0.99) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--threads-login", type=int, default=16)
+    parser.add_argument("--threads-leitura", type=int, default=4)
+    parser.add_argument("--processos", type=int, default=min(os.cpu_count() or 1, 4))
+    args = parser.parse_args()
+
+    resultado = {
+        "inline": executar(0, args.segundos, args.threads_login, args.threads_leitura),
+        "pool_%d_processos" % args.processos: executar(
+            args.processos, args.segundos, args.threads_login, args.threads_leitura
+        ),
+    }
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark do custo das métricas por rota (/metrics).
+
+Mede a latência de GET /imovel/<id> e GET /imovel?limite=50 com as métricas
+desligadas (METRICAS_ATIVAS=0), ligadas, e ligadas com o cabeçalho
+Server-Timing, alternando as rodadas para reduzir o ruído, e reporta o custo
+relativo de cada configuração.
+
+Uso:
+    python -m benchmarks.metricas --imoveis 1000 --repeticoes 200 --rodadas 20
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from app import create_app
+from extensions.database import db
+from benchmarks.paginacao import popular
+
+CONFIGURACOES = {
+    "desligadas": {"METRICAS_ATIVAS": "0", "METRICAS_SERVER_TIMING": "0"},
+    "ligadas": {"METRICAS_ATIVAS": "1", "METRICAS_SERVER_TIMING": "0"},
+    "ligadas_server_timing": {"METRICAS_ATIVAS": "1", "METRICAS_SERVER_TIMING": "1"},
+}
+
+
+def preparar(url, variaveis):
+    os.environ.update(variaveis)
+    app = create_app(url)
+    client = app.test_client()
+    login = client.post("/login", json={"email": "bench@bench.com", "senha": "bench"})
+    headers = {"Authorization": "Bearer " + login.get_json()["token"]["access_token"]}
+    return client, headers
+
+
+def medir(client, headers, url, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        client.get(url, headers=headers)
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--imoveis", type=int, default=1000)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--rodadas", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_NIVEL", "WARNING")
+    url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    app = create_app(url)
+    with app.app_context():
+        db.create_all()
+        popular(args.imoveis)
+
+    clientes = {nome: preparar(url, variaveis) for nome, variaveis in CONFIGURACOES.items()}
+    resultado = {}
+    for rota in ("/imovel/1", "/imovel?limite=50"):
+        tempos = {nome: [] for nome in CONFIGURACOES}
+        for _ in range(args.rodadas):
+            for nome, (client, headers) in clientes.items():
+                tempos[nome].append(medir(client, headers, rota, args.repeticoes))
+
+        base = statistics.median(tempos["desligadas"])
+        resultado[rota] = {
+            nome: {
+                "us_por_requisicao": round(statistics.median(valores), 1),
+                "custo_percentual": round((statistics.median(valores) / base - 1) * 100, 2),
+            }
+            for nome, valores in tempos.items()
+        }
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
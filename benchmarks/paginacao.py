@@ -0,0 +1,107 @@
+"""
+Benchmark da listagem paginada por cursor de GET /imovel.
+
+Popula um banco SQLite com N imóveis e mede a latência de uma página
+em diferentes profundidades da tabela. Com paginação por cursor (keyset),
+o tempo deve ser o mesmo para a primeira e para a última página.
+
+Uso:
+    python -m benchmarks.paginacao --imoveis 200000 --repeticoes 50
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from passlib.hash import pbkdf2_sha256
+from sqlalchemy import insert
+
+from app import create_app
+from extensions.database import db
+from models import ImobiliariaModel, ImovelModel, UsuarioModel
+
+
+def popular(total_imoveis):
+    db.session.execute(insert(UsuarioModel), [{"email": "bench@bench.com", "senha": pbkdf2_sha256.hash("bench")}])
+    db.session.execute(insert(ImobiliariaModel), [{
+        "nome_fantasia": "Imobiliária Benchmark",
+        "cnpj": "11222333000181",
+        "telefone": "11999999999",
+        "email": "bench@imobiliaria.com",
+    }])
+
+    lote = []
+    for i in range(total_imoveis):
+        lote.append({
+            "aluguel": i % 2 == 0,
+            "venda": True,
+            "tipo": "casa",
+            "ativo": True,
+            "valor_venda": 100000.0 + i,
+            "valor_aluguel": 1000.0 + i % 5000,
+            "rua": "Rua %d" % (i % 1000),
+            "numero": str(i % 5000),
+            "bairro": "Bairro %d" % (i % 50),
+            "cep": "01310-100",
+            "cidade": "Cidade %d" % (i % 10),
+            "estado": "SP",
+            "imobiliaria_id": 1,
+        })
+        if len(lote) == 10000:
+            db.session.execute(insert(ImovelModel), lote)
+            lote = []
+    if lote:
+        db.session.execute(insert(ImovelModel), lote)
+    db.session.commit()
+
+
+def medir(client, headers, url, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resposta = client.get(url, headers=headers)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        assert resposta.status_code == 200, resposta.data
+    tempos.sort()
+    return {
+        "p50_ms": round(statistics.median(tempos), 3),
+        "p95_ms": round(tempos[int(len(tempos) * 0.95) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--imoveis", type=int, default=200000)
+    parser.add_argument("--limite", type=int, default=50)
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp()
+    app = create_app("sqlite:///" + os.path.join(diretorio, "benchmark.db"))
+
+    with app.app_context():
+        db.create_all()
+        popular(args.imoveis)
+
+    client = app.test_client()
+    login = client.post("/login", json={"email": "bench@bench.com", "senha": "bench"})
+    headers = {"Authorization": "Bearer " + login.get_json()["token"]["access_token"]}
+
+    resultado = {"imoveis": args.imoveis, "limite": args.limite, "paginas": {}}
+    for fracao in (0, 0.25, 0.5, 0.75, 0.99):
+        cursor = int(args.imoveis * fracao)
+        url = "/imovel?limite=%d" % args.limite
+        if cursor:
+            url += "&cursor=%d" % cursor
+        resultado["paginas"]["%d%%" % (fracao * 100)] = medir(client, headers, url, args.repeticoes)
+
+    url = "/imovel?limite=%d&cidade=Cidade 3&bairro=Bairro 13&cursor=%d" % (args.limite, args.imoveis // 2)
+    resultado["filtro_cidade_bairro"] = medir(client, headers, url, args.repeticoes)
+
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
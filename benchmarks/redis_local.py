@@ -0,0 +1,289 @@
+"""
+Verificação dos backends Redis contra um servidor local.
+
+Sobe um servidor local que fala o protocolo do Redis (RESP) e implementa só os
+comandos usados pelos backends (PING, GET, SET com EX, EXISTS, DEL, INCR),
+com expiração das chaves, e exercita contra ele:
+- BlocklistRedis: bloqueio com e sem expiração, token já expirado e expiração
+  pelo TTL;
+- CacheRedis: leitura, escrita, remoção, gerações e expiração pelo TTL.
+
+Usa o cliente do pacote "redis" quando ele está instalado; sem ele, usa um
+cliente RESP mínimo com a mesma API get/set/exists/delete/incr. Com o pacote
+instalado, confere também pela API o logout (BLOCKLIST_BACKEND=redis) e os
+acertos e a invalidação do cache de respostas (CACHE_BACKEND=redis).
+
+Uso:
+    python -m benchmarks.redis_local
+"""
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+
+from blocklist import BlocklistRedis
+from extensions.cache import CacheRedis
+
+
+class ServidorRedis(socketserver.ThreadingTCPServer):
+    """Servidor RESP local com as chaves num dict, expiradas na leitura."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ManipuladorRedis)
+        self.trava = threading.Lock()
+        self.chaves = {}
+        self.comandos = 0
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def valor(self, chave):
+        """Valor de `chave`, removendo-a se já expirou. Chamar com a trava."""
+        entrada = self.chaves.get(chave)
+        if entrada is not None and entrada[1] is not None and entrada[1] <= time.monotonic():
+            del self.chaves[chave]
+            entrada = None
+        return entrada and entrada[0]
+
+    def executar(self, comando, argumentos):
+        with self.trava:
+            self.comandos += 1
+            if comando == b"PING":
+                return "PONG"
+            if comando == b"GET":
+                return self.valor(argumentos[0])
+            if comando == b"SET":
+                expira_em = None
+                opcoes = [opcao.upper() for opcao in argumentos[2:]]
+                if b"EX" in opcoes:
+                    expira_em = time.monotonic() + int(argumentos[2 + opcoes.index(b"EX") + 1])
+                self.chaves[argumentos[0]] = (argumentos[1], expira_em)
+                return "OK"
+            if comando == b"EXISTS":
+                return sum(self.valor(chave) is not None for chave in argumentos)
+            if comando == b"DEL":
+                removidas = [chave for chave in argumentos if self.valor(chave) is not None]
+                for chave in removidas:
+                    del self.chaves[chave]
+                return len(removidas)
+            if comando == b"INCR":
+                expira_em = self.chaves.get(argumentos[0], (None, None))[1]
+                novo = int(self.valor(argumentos[0]) or 0) + 1
+                self.chaves[argumentos[0]] = (str(novo).encode(), expira_em)
+                return novo
+            # CLIENT SETINFO, SELECT etc., enviados pelo redis-py ao conectar
+            if comando in (b"CLIENT", b"SELECT", b"HELLO"):
+                return "OK"
+        return ValueError(f"ERR comando não suportado: {comando.decode()}")
+
+
+class ManipuladorRedis(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        while True:
+            try:
+                partes = ler_resposta(self.rfile)
+            except ConnectionError:
+                return
+            resposta = self.server.executar(partes[0].upper(), partes[1:])
+            self.wfile.write(codificar_resposta(resposta))
+            self.wfile.flush()
+
+
+def ler_resposta(arquivo):
+    """Lê um valor RESP (array, bulk string, inteiro, string simples ou erro)."""
+
+    linha = arquivo.readline()
+    if not linha:
+        raise ConnectionError("conexão encerrada")
+    tipo, conteudo = linha[:1], linha[1:-2]
+    if tipo == b"*":
+        return [ler_resposta(arquivo) for _ in range(int(conteudo))]
+    if tipo == b"$":
+        if int(conteudo) < 0:
+            return None
+        dados = arquivo.read(int(conteudo) + 2)
+        return dados[:-2]
+    if tipo == b":":
+        return int(conteudo)
+    if tipo == b"+":
+        return conteudo.decode()
+    if tipo == b"-":
+        raise ValueError(conteudo.decode())
+    raise ValueError(f"tipo RESP desconhecido: {tipo!r}")
+
+
+def codificar_resposta(valor):
+    if isinstance(valor, ValueError):
+        return b"-" + str(valor).encode() + b"\r\n"
+    if isinstance(valor, int):
+        return b":%d\r\n" % valor
+    if isinstance(valor, str):
+        return b"+" + valor.encode() + b"\r\n"
+    if valor is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(valor), valor)
+
+
+class ClienteRESP:
+    """Cliente RESP mínimo com a parte da API do redis-py usada pelos backends."""
+
+    def __init__(self, endereco):
+        self.trava = threading.Lock()
+        self.conexao = socket.create_connection(endereco)
+        self.arquivo = self.conexao.makefile("rb")
+
+    def comando(self, *partes):
+        partes = [parte if isinstance(parte, bytes) else str(parte).encode() for parte in partes]
+        pedido = b"*%d\r\n" % len(partes) + b"".join(b"$%d\r\n%s\r\n" % (len(parte), parte) for parte in partes)
+        with self.trava:
+            self.conexao.sendall(pedido)
+            return ler_resposta(self.arquivo)
+
+    def get(self, chave):
+        return self.comando("GET", chave)
+
+    def set(self, chave, valor, ex=None):
+        if ex is None:
+            return self.comando("SET", chave, valor) == "OK"
+        return self.comando("SET", chave, valor, "EX", ex) == "OK"
+
+    def exists(self, *chaves):
+        return self.comando("EXISTS", *chaves)
+
+    def delete(self, *chaves):
+        return self.comando("DEL", *chaves)
+
+    def incr(self, chave):
+        return self.comando("INCR", chave)
+
+
+def conectar(servidor):
+    try:
+        import redis
+    except ImportError:
+        return ClienteRESP(servidor.server_address)
+    return redis.Redis.from_url(servidor.url)
+
+
+def conferir(condicao, mensagem, falhas):
+    if not condicao:
+        falhas.append(mensagem)
+
+
+def verificar_blocklist(cliente, falhas):
+    blocklist = BlocklistRedis(cliente)
+    agora = time.time()
+
+    blocklist.adicionar("valido", agora + 3600)
+    blocklist.adicionar("para-sempre")
+    blocklist.adicionar("ja-expirado", agora - 10)
+    blocklist.adicionar("expira-logo", agora + 0.5)
+
+    conferir(blocklist.contem("valido"), "blocklist: token com expiração futura não ficou bloqueado", falhas)
+    conferir(blocklist.contem("para-sempre"), "blocklist: token sem expiração não ficou bloqueado", falhas)
+    conferir(not blocklist.contem("ja-expirado"), "blocklist: token já expirado foi guardado", falhas)
+    conferir(not blocklist.contem("desconhecido"), "blocklist: token nunca bloqueado aparece como bloqueado", falhas)
+    conferir(blocklist.contem("expira-logo"), "blocklist: token prestes a expirar não ficou bloqueado", falhas)
+    # O TTL é arredondado para cima em segundos inteiros
+    time.sleep(2.1)
+    conferir(not blocklist.contem("expira-logo"), "blocklist: token continuou bloqueado depois do TTL", falhas)
+    conferir(blocklist.contem("valido"), "blocklist: token válido sumiu antes da expiração", falhas)
+
+
+def verificar_cache(cliente, falhas):
+    cache = CacheRedis(cliente, ttl=1)
+
+    conferir(cache.obter("imovel:1:0") is None, "cache: chave nunca guardada encontrada", falhas)
+    cache.guardar("imovel:1:0", b"corpo")
+    cache.guardar("imobiliaria:1", b"outro corpo")
+    conferir(cache.obter("imovel:1:0") == b"corpo", "cache: valor guardado não foi lido de volta", falhas)
+    cache.remover(["imovel:1:0", "nao-existe"])
+    cache.remover([])
+    conferir(cache.obter("imovel:1:0") is None, "cache: chave removida continuou no cache", falhas)
+    conferir(cache.obter("imobiliaria:1") == b"outro corpo", "cache: remoção apagou outra chave", falhas)
+
+    conferir(cache.geracao("lista") == 0, "cache: geração inicial diferente de 0", falhas)
+    cache.incrementar_geracao("lista")
+    cache.incrementar_geracao("lista")
+    conferir(cache.geracao("lista") == 2, "cache: geração não foi incrementada", falhas)
+    conferir(cache.geracao("imobiliaria") == 0, "cache: gerações não são independentes", falhas)
+
+    time.sleep(1.1)
+    conferir(cache.obter("imobiliaria:1") is None, "cache: entrada continuou no cache depois do TTL", falhas)
+    conferir(cache.geracao("lista") == 2, "cache: geração expirou junto com as entradas", falhas)
+
+
+def verificar_api(servidor, falhas):
+    """Logout e cache de respostas pela API, com os backends no servidor local; só roda com o pacote "redis"."""
+
+    from app import create_app
+    from extensions.database import db
+
+    os.environ["BLOCKLIST_BACKEND"] = "redis"
+    os.environ["CACHE_BACKEND"] = "redis"
+    os.environ["REDIS_URL"] = servidor.url
+    app = create_app("sqlite:///" + os.path.join(tempfile.mkdtemp(), "redis_local.db"))
+    with app.app_context():
+        db.create_all()
+
+    client = app.test_client()
+    client.post("/registrar", json={"email": "redis@local.com", "senha": "redis"})
+    login = client.post("/login", json={"email": "redis@local.com", "senha": "redis"})
+    headers = {"Authorization": "Bearer " + login.get_json()["token"]["access_token"]}
+
+    dados = {
+        "nome_fantasia": "Imobiliária Redis",
+        "cnpj": "11.222.333/0001-81",
+        "telefone": "(48) 99999-9999",
+        "email": "redis@imobiliaria.com",
+    }
+    caminho = f"/imobiliaria/{client.post('/imobiliaria', headers=headers, json=dados).get_json()['id']}"
+    primeira = client.get(caminho, headers=headers)
+    segunda = client.get(caminho, headers=headers)
+    estatisticas = client.get("/monitoramento/cache", headers=headers).get_json()
+    conferir(segunda.get_data() == primeira.get_data(), "cache: resposta do cache diferente da original", falhas)
+    conferir(estatisticas["acertos"] >= 1, "cache: segunda leitura não veio do cache", falhas)
+    client.put(caminho, headers=headers, json={**dados, "nome_fantasia": "Imobiliária Redis Alterada"})
+    alterada = client.get(caminho, headers=headers).get_json()
+    conferir(alterada["nome_fantasia"] == "Imobiliária Redis Alterada", "cache: resposta não invalidada pela edição", falhas)
+
+    conferir(client.post("/logout", headers=headers).status_code == 200, "logout: resposta diferente de 200", falhas)
+    conferir(client.post("/logout", headers=headers).status_code == 401, "logout: token revogado ainda aceito", falhas)
+
+
+def main():
+    servidor = ServidorRedis()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    cliente = conectar(servidor)
+    falhas = []
+    verificar_blocklist(cliente, falhas)
+    verificar_cache(cliente, falhas)
+    if isinstance(cliente, ClienteRESP):
+        api = "ignorada (pacote redis não instalado)"
+    else:
+        verificar_api(servidor, falhas)
+        api = "verificada"
+    servidor.shutdown()
+
+    resultado = {
+        "cliente": type(cliente).__module__ + "." + type(cliente).__name__,
+        "comandos": servidor.comandos,
+        "api": api,
+        "falhas": falhas,
+    }
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    if falhas:
+        raise SystemExit("Backend Redis com comportamento incorreto.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark da serialização das listagens: marshmallow x SerializadorCompilado.
+
+Popula um banco SQLite (ou usa o de --url) com benchmarks.dados e serializa
+todos os imóveis (ImovelSchema, com a imobiliária aninhada) e todas as
+imobiliárias (ImobiliariaSchema, com os imóveis) pelos dois caminhos:
+
+- marshmallow: objetos do ORM com carregamento antecipado, schema.dump(many=True)
+  e jsonify, como as rotas faziam;
+- compilado: consulta de colunas, SerializadorCompilado.json e resposta_json,
+  como as rotas de listagem fazem.
+
+Confere que os dois corpos são idênticos byte a byte e reporta o tempo de
+cada caminho (melhor de --repeticoes) e o ganho.
+
+Uso:
+    python -m benchmarks.serializacao --imoveis 100000
+    python -m benchmarks.serializacao --url sqlite:////tmp/bench.db --reusar
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from flask import jsonify
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload, subqueryload
+
+from app import create_app
+from benchmarks import dados
+from extensions.database import db
+from models import ImobiliariaModel, ImovelModel
+from resources.imobiliaria import serializar_imobiliarias
+from resources.imovel import SERIALIZADOR_IMOVEL
+from schema import ImobiliariaSchema, ImovelSchema
+from utilities.serializacao import resposta_json
+
+
+def imoveis_marshmallow():
+    imoveis = ImovelModel.query.options(joinedload(ImovelModel.imobiliaria)).order_by(ImovelModel.id).all()
+    return jsonify(ImovelSchema().dump(imoveis, many=True)).get_data()
+
+
+def imoveis_compilado():
+    linhas = SERIALIZADOR_IMOVEL.consulta(db.session).order_by(ImovelModel.id).all()
+    return resposta_json([SERIALIZADOR_IMOVEL.json(linha) for linha in linhas]).get_data()
+
+
+def imobiliarias_marshmallow():
+    imobiliarias = ImobiliariaModel.query.options(
+        subqueryload(ImobiliariaModel.imoveis)
+    ).order_by(ImobiliariaModel.id).all()
+    for imobiliaria in imobiliarias:
+        imobiliaria.imoveis.sort(key=lambda imovel: imovel.id)
+        imobiliaria.imoveis_total = len(imobiliaria.imoveis)
+    return jsonify(ImobiliariaSchema().dump(imobiliarias, many=True)).get_data()
+
+
+def imobiliarias_compilado():
+    return resposta_json(list(serializar_imobiliarias(db.session))).get_data()
+
+
+def medir(funcao, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        db.session.expunge_all()
+        inicio = time.perf_counter()
+        corpo = funcao()
+        segundos = time.perf_counter() - inicio
+        melhor = segundos if melhor is None else min(melhor, segundos)
+    return corpo, melhor
+
+
+def comparar(antigo, novo, repeticoes):
+    corpo_antigo, segundos_antigo = medir(antigo, repeticoes)
+    corpo_novo, segundos_novo = medir(novo, repeticoes)
+    return {
+        "bytes": len(corpo_novo),
+        "identicos": corpo_antigo == corpo_novo,
+        "marshmallow_s": round(segundos_antigo, 3),
+        "compilado_s": round(segundos_novo, 3),
+        "ganho": round(segundos_antigo / segundos_novo, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL do banco; padrão: SQLite em diretório temporário")
+    parser.add_argument("--imoveis", type=int, default=100000)
+    parser.add_argument("--reusar", action="store_true", help="usa a massa já existente no banco de --url")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    app = create_app(url)
+
+    with app.app_context():
+        if not args.reusar:
+            db.drop_all()
+            db.create_all()
+            dados.popular(args.imoveis, usuarios=1, rounds=app.config["SENHA_ROUNDS"])
+
+        resultado = {"imoveis": db.session.scalar(select(func.count(ImovelModel.id)))}
+        resultado["imovel"] = comparar(imoveis_marshmallow, imoveis_compilado, args.repeticoes)
+        resultado["imobiliaria"] = comparar(imobiliarias_marshmallow, imobiliarias_compilado, args.repeticoes)
+
+    print(json.dumps(resultado, indent=2))
+    if not (resultado["imovel"]["identicos"] and resultado["imobiliaria"]["identicos"]):
+        raise SystemExit("Os corpos dos dois caminhos são diferentes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark da sincronização de uma cópia do catálogo: GET /imovel/changes x download completo.
+
+Popula um banco SQLite (ou usa o de --url) com benchmarks.dados e simula um
+cliente que mantém uma cópia dos imóveis: baixa o catálogo completo pelas
+páginas de GET /imovel, guardando antes a sequência atual de GET
+/imovel/changes. Em seguida aplica --alteracoes alterações pela API (edições,
+exclusões e inclusões, na proporção de --proporcao) e atualiza a cópia de duas
+formas:
+
+- completo: baixa de novo todas as páginas de GET /imovel;
+- incremental: lê GET /imovel/changes desde a sequência guardada e aplica as
+  alterações à cópia.
+
+Reporta o tempo, a quantidade de requisições e os bytes de cada forma e
+confere que as duas cópias resultantes são iguais.
+
+Uso:
+    python -m benchmarks.sincronizacao --imoveis 100000 --alteracoes 1000
+    python -m benchmarks.sincronizacao --url sqlite:////tmp/bench.db --reusar
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from app import create_app
+from benchmarks import dados
+from benchmarks.cenarios import Contexto
+from extensions.database import db
+from models import ImovelModel
+
+
+def baixar_catalogo(ctx, tamanho_pagina):
+    copia = {}
+    requisicoes = tamanho = 0
+    cursor = None
+    inicio = time.perf_counter()
+    while True:
+        query_string = {"limite": tamanho_pagina}
+        if cursor is not None:
+            query_string["cursor"] = cursor
+        resposta = ctx.client.get("/imovel", headers=ctx.headers, query_string=query_string)
+        requisicoes += 1
+        tamanho += len(resposta.data)
+        pagina = resposta.get_json()
+        for imovel in pagina["imoveis"]:
+            copia[imovel["id"]] = imovel
+        cursor = pagina["next_cursor"]
+        if cursor is None:
+            break
+    return copia, {"segundos": round(time.perf_counter() - inicio, 3), "requisicoes": requisicoes, "bytes": tamanho}
+
+
+def sincronizar(ctx, copia, desde, tamanho_pagina):
+    requisicoes = tamanho = alteracoes = 0
+    inicio = time.perf_counter()
+    while True:
+        resposta = ctx.client.get(
+            "/imovel/changes", headers=ctx.headers, query_string={"since": desde, "limite": tamanho_pagina}
+        )
+        requisicoes += 1
+        tamanho += len(resposta.data)
+        pagina = resposta.get_json()
+        for alteracao in pagina["alteracoes"]:
+            if alteracao["entidade"] != "imovel":
+                continue
+            alteracoes += 1
+            # Sem dados: excluído na alteração ou depois dela
+            if alteracao["dados"] is None:
+                copia.pop(alteracao["id"], None)
+            else:
+                copia[alteracao["id"]] = alteracao["dados"]
+        desde = pagina["next_since"]
+        if not pagina["tem_mais"]:
+            break
+    resultado = {
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "requisicoes": requisicoes,
+        "bytes": tamanho,
+        "alteracoes": alteracoes,
+    }
+    return copia, resultado
+
+
+def alterar_catalogo(ctx, quantidade, proporcao):
+    edicoes, exclusoes, _ = proporcao
+    total = sum(proporcao)
+    for _ in range(quantidade):
+        sorteio = ctx.aleatorio.random() * total
+        if sorteio < edicoes:
+            ctx.client.put(f"/imovel/{ctx.imovel_aleatorio()}", headers=ctx.headers, json=ctx.novo_imovel())
+        elif sorteio < edicoes + exclusoes:
+            ctx.client.delete(f"/imovel/{ctx.imovel_aleatorio()}", headers=ctx.headers)
+        else:
+            ctx.client.post("/imovel", headers=ctx.headers, json=ctx.novo_imovel())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL do banco; padrão: SQLite em diretório temporário")
+    parser.add_argument("--imoveis", type=int, default=100000)
+    parser.add_argument("--reusar", action="store_true", help="usa a massa já existente no banco de --url")
+    parser.add_argument("--alteracoes", type=int, default=1000)
+    parser.add_argument(
+        "--proporcao", default="70,15,15", help="edições, exclusões e inclusões, em partes (padrão: 70,15,15)"
+    )
+    parser.add_argument("--pagina", type=int, default=500, help="tamanho das páginas das duas rotas")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    proporcao = [float(parte) for parte in args.proporcao.split(",")]
+    if len(proporcao) != 3:
+        parser.error("--proporcao deve ter três partes: edições, exclusões e inclusões")
+
+    url = args.url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    app = create_app(url)
+    with app.app_context():
+        if not args.reusar:
+            db.drop_all()
+            db.create_all()
+            dados.popular(args.imoveis, usuarios=1, rounds=app.config["SENHA_ROUNDS"])
+        imoveis = db.session.scalar(select(func.count(ImovelModel.id)))
+
+    ctx = Contexto(app, {"imoveis": imoveis}, args.semente)
+    desde = ctx.client.get("/imovel/changes", headers=ctx.headers).get_json()["next_since"]
+    copia, inicial = baixar_catalogo(ctx, args.pagina)
+
+    alterar_catalogo(ctx, args.alteracoes, proporcao)
+
+    copia_completa, completo = baixar_catalogo(ctx, args.pagina)
+    copia_incremental, incremental = sincronizar(ctx, copia, desde, args.pagina)
+
+    resultado = {
+        "imoveis": imoveis,
+        "alteracoes": args.alteracoes,
+        "download_inicial": inicial,
+        "completo": completo,
+        "incremental": incremental,
+        "ganho_tempo": round(completo["segundos"] / incremental["segundos"], 1),
+        "ganho_bytes": round(completo["bytes"] / incremental["bytes"], 1),
+        "copias_iguais": copia_completa == copia_incremental,
+    }
+    print(json.dumps(resultado, indent=2))
+    if not resultado["copias_iguais"]:
+        raise SystemExit("A cópia sincronizada é diferente do catálogo completo.")
+
+
+if __name__ == "__main__":
+    main()
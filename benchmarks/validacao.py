@@ -0,0 +1,115 @@
+"""
+Micro-benchmark da validação de CNPJ, telefone, e-mail e CEP.
+
+Compara as funções antigas (um valor por chamada, concatenação de strings e
+regex recompilada a cada chamada), reproduzidas abaixo, com a API em lote de
+utilities.validacao.
+
+Uso:
+    python -m benchmarks.validacao --quantidade 1000000
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+from utilities import validacao
+
+
+def validar_cnpj_antigo(cnpj):
+    cnpj = ''.join(re.findall(r'\d', str(cnpj)))
+    if (not cnpj) or (len(cnpj) < 14):
+        return False
+    inteiros = list(map(int, cnpj))
+    novo = inteiros[:12]
+    prod = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+    while len(novo) < 14:
+        r = sum([x*y for (x, y) in zip(novo, prod)]) % 11
+        if r > 1:
+            f = 11 - r
+        else:
+            f = 0
+        novo.append(f)
+        prod.insert(0, 6)
+    return novo == inteiros
+
+
+def validar_telefone_antigo(telefone):
+    digitos = ""
+    for d in telefone:
+        if d.isdigit():
+            digitos += d
+    if len(digitos) < 10 or len(digitos) > 14:
+        return False
+    return True
+
+
+def validar_email_antigo(email):
+    regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    if re.match(regex, email):
+        return True
+    else:
+        return False
+
+
+def apenas_digitos_antigo(string):
+    digitos = ""
+    for d in string:
+        if d.isdigit():
+            digitos += d
+    return digitos
+
+
+def gerar_cnpj(aleatorio):
+    base = [aleatorio.randint(0, 9) for _ in range(12)]
+    for pesos in (validacao.PESOS_CNPJ_1, validacao.PESOS_CNPJ_2):
+        base.append(validacao._digito_verificador(sum(map(lambda x, y: x * y, base, pesos))))
+    d = "".join(map(str, base))
+    return f"{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}"
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    funcao(*args)
+    return round(time.perf_counter() - inicio, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quantidade", type=int, default=1000000)
+    args = parser.parse_args()
+
+    aleatorio = random.Random(42)
+    cnpjs = [gerar_cnpj(aleatorio) for _ in range(args.quantidade)]
+    telefones = ["(%02d) 9%04d-%04d" % (aleatorio.randint(11, 99), aleatorio.randint(0, 9999), aleatorio.randint(0, 9999)) for _ in range(args.quantidade)]
+    emails = ["usuario%d@imobiliaria%d.com.br" % (i, i % 100) for i in range(args.quantidade)]
+    ceps = ["%05d-%03d" % (aleatorio.randint(0, 99999), aleatorio.randint(0, 999)) for _ in range(args.quantidade)]
+
+    resultado = {"quantidade": args.quantidade, "numpy": validacao.numpy is not None, "segundos": {
+        "cnpj": {
+            "antigo": cronometrar(lambda: [validar_cnpj_antigo(v) for v in cnpjs]),
+            "lote": cronometrar(validacao.validar_cnpjs, cnpjs),
+        },
+        "telefone": {
+            "antigo": cronometrar(lambda: [validar_telefone_antigo(v) for v in telefones]),
+            "lote": cronometrar(validacao.validar_telefones, telefones),
+        },
+        "email": {
+            "antigo": cronometrar(lambda: [validar_email_antigo(v) for v in emails]),
+            "lote": cronometrar(validacao.validar_emails, emails),
+        },
+        "cep": {
+            "antigo": cronometrar(lambda: [apenas_digitos_antigo(v) for v in ceps]),
+            "lote": cronometrar(validacao.validar_ceps, ceps),
+        },
+    }}
+
+    for tempos in resultado["segundos"].values():
+        tempos["ganho"] = round(tempos["antigo"] / tempos["lote"], 1)
+
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark do envio das alterações aos webhooks, contra um destino HTTP local.
+
+Sobe um servidor HTTP local que faz o papel dos integradores (com latência de
+--latencia ms e uma fração --falhas de respostas 503), cadastra --webhooks
+webhooks pela API, aplica --alteracoes alterações pela API (edições, exclusões e
+inclusões) e chama despachar_webhooks, como o comando "flask
+despachar-webhooks", até todos os webhooks receberem tudo.
+
+Confere que cada webhook recebeu todas as alterações, em ordem de sequência,
+com a assinatura correta, e que nunca houve mais de --paralelo entregas
+simultâneas. Reporta o tempo, as requisições, as falhas e os reenvios.
+
+Uso:
+    python -m benchmarks.webhooks --webhooks 5 --alteracoes 2000
+    python -m benchmarks.webhooks --falhas 0.3 --latencia 50 --paralelo 2
+"""
+import argparse
+import hmac
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app import create_app
+from benchmarks import dados
+from benchmarks.cenarios import Contexto
+from benchmarks.sincronizacao import alterar_catalogo
+from extensions.database import db
+from models.alteracao import listar_alteracoes, ultima_sequencia
+from models.webhook import WebhookModel
+from utilities.webhooks import CABECALHO_ASSINATURA, assinatura, despachar_webhooks
+
+SEGREDO = "segredo-do-benchmark"
+
+
+class Destino(ThreadingHTTPServer):
+    """Servidor HTTP local que registra as alterações recebidas em cada caminho."""
+
+    daemon_threads = True
+
+    def __init__(self, latencia, falhas, semente):
+        super().__init__(("127.0.0.1", 0), ManipuladorDestino)
+        self.latencia = latencia
+        self.falhas = falhas
+        self.aleatorio = random.Random(semente)
+        self.trava = threading.Lock()
+        self.recebidas = {}
+        self.requisicoes = self.recusadas = self.assinaturas_invalidas = 0
+        self.simultaneas = self.maximo_simultaneas = 0
+
+    def url(self, caminho):
+        return f"http://127.0.0.1:{self.server_address[1]}{caminho}"
+
+
+class ManipuladorDestino(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        destino = self.server
+        corpo = self.rfile.read(int(self.headers["Content-Length"]))
+        with destino.trava:
+            destino.requisicoes += 1
+            destino.simultaneas += 1
+            destino.maximo_simultaneas = max(destino.maximo_simultaneas, destino.simultaneas)
+            recusar = destino.aleatorio.random() < destino.falhas
+        try:
+            time.sleep(destino.latencia)
+            if recusar:
+                status = 503
+            else:
+                status = 204
+                valida = hmac.compare_digest(self.headers.get(CABECALHO_ASSINATURA, ""), assinatura(SEGREDO, corpo))
+                sequencias = [alteracao["seq"] for alteracao in json.loads(corpo)["alteracoes"]]
+                with destino.trava:
+                    destino.assinaturas_invalidas += not valida
+                    destino.recebidas.setdefault(self.path, []).extend(sequencias)
+        finally:
+            with destino.trava:
+                destino.simultaneas -= 1
+                destino.recusadas += recusar
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL do banco; padrão: SQLite em diretório temporário")
+    parser.add_argument("--imoveis", type=int, default=10000)
+    parser.add_argument("--reusar", action="store_true", help="usa a massa já existente no banco de --url")
+    parser.add_argument("--webhooks", type=int, default=5)
+    parser.add_argument("--alteracoes", type=int, default=2000)
+    parser.add_argument("--latencia", type=float, default=20, help="latência do destino, em ms")
+    parser.add_argument("--falhas", type=float, default=0.1, help="fração das entregas recusadas com 503")
+    parser.add_argument("--paralelo", type=int, default=4)
+    parser.add_argument("--lote", type=int, default=100)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    app = create_app(url)
+    # O destino do benchmark é local (127.0.0.1)
+    app.config["WEBHOOK_REDE_PRIVADA"] = True
+    with app.app_context():
+        if not args.reusar:
+            db.drop_all()
+            db.create_all()
+            dados.popular(args.imoveis, usuarios=1, rounds=app.config["SENHA_ROUNDS"])
+        WebhookModel.query.delete()
+        db.session.commit()
+
+    destino = Destino(args.latencia / 1000, args.falhas, args.semente)
+    threading.Thread(target=destino.serve_forever, daemon=True).start()
+
+    ctx = Contexto(app, {}, args.semente)
+    for indice in range(args.webhooks):
+        ctx.client.post("/webhook", headers=ctx.headers, json={"url": destino.url(f"/{indice}"), "segredo": SEGREDO})
+    with app.app_context():
+        inicio_sequencia = ultima_sequencia(db.session)
+    alterar_catalogo(ctx, args.alteracoes, [70, 15, 15])
+
+    with app.app_context():
+        ultima = ultima_sequencia(db.session)
+        esperadas = [alteracao.seq for alteracao in listar_alteracoes(db.session, inicio_sequencia, ultima)]
+        inicio = time.perf_counter()
+        while db.session.query(WebhookModel).filter(WebhookModel.ultimo_evento < ultima).count():
+            # Espera curta entre as tentativas, para o benchmark não ficar parado no backoff
+            if not despachar_webhooks(args.paralelo, args.lote, espera_inicial=0.01):
+                time.sleep(0.005)
+        segundos = time.perf_counter() - inicio
+    destino.shutdown()
+
+    completos = all(
+        list(dict.fromkeys(destino.recebidas.get(f"/{indice}", []))) == esperadas for indice in range(args.webhooks)
+    )
+    entregues = sum(len(sequencias) for sequencias in destino.recebidas.values())
+    resultado = {
+        "webhooks": args.webhooks,
+        "alteracoes": len(esperadas),
+        "segundos": round(segundos, 3),
+        "requisicoes": destino.requisicoes,
+        "recusadas": destino.recusadas,
+        "alteracoes_por_segundo": round(len(esperadas) * args.webhooks / segundos),
+        "reenviadas": entregues - len(esperadas) * args.webhooks,
+        "maximo_simultaneas": destino.maximo_simultaneas,
+        "assinaturas_invalidas": destino.assinaturas_invalidas,
+        "completos_em_ordem": completos,
+    }
+    print(json.dumps(resultado, indent=2))
+    if not completos or destino.assinaturas_invalidas or destino.maximo_simultaneas > args.paralelo:
+        raise SystemExit("Entrega incompleta, fora de ordem, com assinatura inválida ou acima do limite.")
+
+
+if __name__ == "__main__":
+    main()
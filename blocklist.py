@@ -1,9 +1,145 @@
 """
 blocklist.py
 
-This file just contains the blocklist of the JWT tokens. It will be imported by
-app and the logout resource so that tokens can be added to the blocklist when the
-user logs out.
+This file contains the blocklist of the JWT tokens. It is used by app (to check
+whether a token was revoked) and by the logout resource (to revoke a token).
+
+The store is pluggable, chosen by the BLOCKLIST_BACKEND setting:
+
+- "memoria": in-process dict, entries are evicted once the token expires;
+- "sql": table token_bloqueado, shared by every worker, purged periodically;
+- "redis": keys with a TTL equal to the token's remaining lifetime, shared by
+  every worker. Needs the "redis" package and REDIS_URL, or any client with the
+  same set/exists API (e.g. a local stand-in such as fakeredis; see
+  benchmarks/redis_local.py for a check against a minimal local server).
+
+Every backend keeps only tokens that have not expired yet, since an expired
+token is refused by flask_jwt_extended anyway.
 """
+import heapq
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy import delete
+
+from extensions.database import db
+from models.token_bloqueado import TokenBloqueadoModel
+
+
+class BlocklistBackend(ABC):
+
+    @abstractmethod
+    def adicionar(self, jti, exp=None):
+        """Bloqueia o token `jti` até o instante `exp` (timestamp UNIX, ou None para sempre)."""
+
+    @abstractmethod
+    def contem(self, jti):
+        """Indica se o token `jti` está bloqueado."""
+
+    def limpar(self):
+        """Remove as entradas de tokens já expirados."""
+
+
+class BlocklistMemoria(BlocklistBackend):
+
+    def __init__(self):
+        self._tokens = {}
+        self._expiracoes = []
+        self._lock = threading.Lock()
+
+    def adicionar(self, jti, exp=None):
+        with self._lock:
+            self._expirar(time.time())
+            self._tokens[jti] = exp
+            if exp is not None:
+                heapq.heappush(self._expiracoes, (exp, jti))
+
+    def contem(self, jti):
+        with self._lock:
+            self._expirar(time.time())
+            return jti in self._tokens
+
+    def limpar(self):
+        with self._lock:
+            self._expirar(time.time())
+
+    def _expirar(self, agora):
+        while self._expiracoes and self._expiracoes[0][0] <= agora:
+            exp, jti = heapq.heappop(self._expiracoes)
+            if self._tokens.get(jti) == exp:
+                del self._tokens[jti]
+
+
+class BlocklistSQL(BlocklistBackend):
+
+    def __init__(self, intervalo_limpeza=300):
+        self.intervalo_limpeza = intervalo_limpeza
+        self._ultima_limpeza = time.monotonic()
+
+    def adicionar(self, jti, exp=None):
+        expira_em = None
+        if exp is not None:
+            expira_em = datetime.fromtimestamp(exp, timezone.utc).replace(tzinfo=None)
+
+        db.session.merge(TokenBloqueadoModel(jti=jti, expira_em=expira_em))
+        db.session.commit()
+
+        if time.monotonic() - self._ultima_limpeza > self.intervalo_limpeza:
+            self.limpar()
+
+    def contem(self, jti):
+        return db.session.get(TokenBloqueadoModel, jti) is not None
+
+    def limpar(self):
+        agora = datetime.now(timezone.utc).replace(tzinfo=None)
+        db.session.execute(
+            delete(TokenBloqueadoModel).where(TokenBloqueadoModel.expira_em <= agora)
+        )
+        db.session.commit()
+        self._ultima_limpeza = time.monotonic()
+
+
+class BlocklistRedis(BlocklistBackend):
+
+    def __init__(self, cliente, prefixo="blocklist:"):
+        self.cliente = cliente
+        self.prefixo = prefixo
+
+    def adicionar(self, jti, exp=None):
+        if exp is None:
+            self.cliente.set(self.prefixo + jti, 1)
+            return
+
+        ttl = int(exp - time.time()) + 1
+        if ttl > 0:
+            self.cliente.set(self.prefixo + jti, 1, ex=ttl)
+
+    def contem(self, jti):
+        return bool(self.cliente.exists(self.prefixo + jti))
+
+
+def criar_blocklist(app):
+    """Cria o backend configurado em BLOCKLIST_BACKEND e o registra em app.extensions."""
+
+    backend = app.config["BLOCKLIST_BACKEND"]
+
+    if backend == "memoria":
+        blocklist = BlocklistMemoria()
+    elif backend == "sql":
+        blocklist = BlocklistSQL(app.config["BLOCKLIST_INTERVALO_LIMPEZA"])
+    elif backend == "redis":
+        import redis
+
+        blocklist = BlocklistRedis(redis.Redis.from_url(app.config["REDIS_URL"]))
+    else:
+        raise ValueError(f"BLOCKLIST_BACKEND inválido: {backend}")
+
+    app.extensions["blocklist"] = blocklist
+    return blocklist
+
 
-BLOCKLIST = set()
+def obter_blocklist():
+    return current_app.extensions["blocklist"]
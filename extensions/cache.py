@@ -0,0 +1,319 @@
+"""
+Cache de leitura das respostas JSON dos GETs de imóveis e imobiliárias.
+
+O corpo serializado de cada resposta é guardado junto com o ETag e o
+Last-Modified, de modo que um acerto no cache é respondido (inclusive com 304)
+sem consultar o banco nem executar o marshmallow.
+
+Chaves:
+- "imobiliaria:<id>": removida quando a imobiliária ou um de seus imóveis muda;
+- "imovel:<id>:<geração de imobiliárias>": removida quando o imóvel muda; a
+  geração é incrementada quando qualquer imobiliária muda, já que a resposta
+  do imóvel inclui a imobiliária;
+- "lista:<geração de listas>:<caminho e query string>": a geração é
+  incrementada em qualquer escrita, invalidando todas as listagens de uma vez.
+
+A invalidação é feita por eventos da sessão do SQLAlchemy (after_flush coleta
+as chaves, after_commit as remove), então vale para qualquer caminho de escrita
+que passe pelo ORM. Escritas em lote que não passam pelo flush usam
+`registrar_invalidacao`.
+
+Toda invalidação incrementa a geração de listas antes de remover as chaves. Uma
+leitura guarda a resposta apenas se essa geração não mudou desde antes da
+consulta ao banco, e a remove se ela mudar durante a escrita no cache: assim,
+uma resposta lida antes de um commit concorrente não volta para o cache depois
+da invalidação.
+
+Backends, escolhidos por CACHE_BACKEND:
+- "memoria": LRU por tamanho em bytes, local ao processo. Com vários workers,
+  uma escrita só invalida o cache do worker que a executou; os demais ficam
+  desatualizados até o TTL;
+- "redis": compartilhado entre os workers (o limite de memória e a política
+  de descarte ficam a cargo do servidor Redis, ex. allkeys-lru). Aceita
+  qualquer cliente com a API get/set/delete/incr do redis-py;
+- "nenhum" (padrão): cache desligado.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from itertools import chain
+
+from flask import Response, current_app, has_app_context, request
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.imobiliaria import ImobiliariaModel
+from models.imovel import ImovelModel
+from utilities.etag import com_validadores, nao_modificado
+from utilities.streaming import streaming_solicitado
+
+
+class CacheMemoria:
+
+    def __init__(self, tamanho_maximo, ttl):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self.tamanho = 0
+        self.descartes = 0
+        self._entradas = OrderedDict()
+        self._geracoes = {}
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            valor, expira_em = entrada
+            if expira_em <= time.monotonic():
+                self._remover(chave)
+                return None
+            self._entradas.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave, valor):
+        if len(valor) > self.tamanho_maximo:
+            return
+        with self._lock:
+            self._remover(chave)
+            self._entradas[chave] = (valor, time.monotonic() + self.ttl)
+            self.tamanho += len(valor)
+            while self.tamanho > self.tamanho_maximo:
+                chave_antiga = next(iter(self._entradas))
+                self._remover(chave_antiga)
+                self.descartes += 1
+
+    def remover(self, chaves):
+        with self._lock:
+            for chave in chaves:
+                self._remover(chave)
+
+    def geracao(self, nome):
+        return self._geracoes.get(nome, 0)
+
+    def incrementar_geracao(self, nome):
+        with self._lock:
+            self._geracoes[nome] = self._geracoes.get(nome, 0) + 1
+
+    def estatisticas(self):
+        with self._lock:
+            return {"entradas": len(self._entradas), "bytes": self.tamanho, "descartes": self.descartes}
+
+    def _remover(self, chave):
+        entrada = self._entradas.pop(chave, None)
+        if entrada is not None:
+            self.tamanho -= len(entrada[0])
+
+
+class CacheRedis:
+
+    def __init__(self, cliente, ttl, prefixo="cache:"):
+        self.cliente = cliente
+        self.ttl = ttl
+        self.prefixo = prefixo
+
+    def obter(self, chave):
+        return self.cliente.get(self.prefixo + chave)
+
+    def guardar(self, chave, valor):
+        self.cliente.set(self.prefixo + chave, valor, ex=self.ttl)
+
+    def remover(self, chaves):
+        if chaves:
+            self.cliente.delete(*[self.prefixo + chave for chave in chaves])
+
+    def geracao(self, nome):
+        return int(self.cliente.get(self.prefixo + "geracao:" + nome) or 0)
+
+    def incrementar_geracao(self, nome):
+        self.cliente.incr(self.prefixo + "geracao:" + nome)
+
+    def estatisticas(self):
+        return {}
+
+
+class CacheRespostas:
+    """
+    Guarda respostas (corpo + validadores) no backend e conta acertos e falhas.
+    Os contadores são atualizados pelas threads das requisições e lidos por
+    GET /monitoramento/cache, por isso ficam sob uma trava.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+        self._lock = threading.Lock()
+
+    def chave_imovel(self, id):
+        return f"imovel:{id}:{self.backend.geracao('imobiliaria')}"
+
+    def chave_imobiliaria(self, id):
+        return f"imobiliaria:{id}"
+
+    def chave_lista(self):
+        return f"lista:{self.backend.geracao('lista')}:{request.full_path}"
+
+    def obter(self, chave):
+        valor = self.backend.obter(chave)
+        with self._lock:
+            if valor is None:
+                self.falhas += 1
+            else:
+                self.acertos += 1
+        if valor is None:
+            return None
+
+        etag, ultima_modificacao, corpo = valor.split(b"\n", 2)
+        etag = etag.decode()
+        ultima_modificacao = datetime.fromisoformat(ultima_modificacao.decode()) if ultima_modificacao else None
+
+        if nao_modificado(etag, ultima_modificacao):
+            resposta = Response(status=304)
+        else:
+            resposta = Response(corpo, mimetype="application/json")
+        return com_validadores(resposta, etag, ultima_modificacao)
+
+    def versao(self):
+        """Geração incrementada a cada invalidação; lida antes da consulta da resposta a guardar."""
+        return self.backend.geracao("lista")
+
+    def guardar(self, chave, resposta, versao):
+        """Guarda a resposta, se não houve invalidação desde `versao`."""
+
+        if self.versao() != versao:
+            return
+        etag, _ = resposta.get_etag()
+        ultima_modificacao = resposta.last_modified
+        cabecalho = "%s\n%s\n" % (
+            etag or "",
+            ultima_modificacao.replace(tzinfo=None).isoformat() if ultima_modificacao else "",
+        )
+        self.backend.guardar(chave, cabecalho.encode() + resposta.get_data())
+        # Uma invalidação entre a verificação acima e a escrita pode ter removido a
+        # chave antes de ela ser guardada
+        if self.versao() != versao:
+            self.backend.remover([chave])
+
+    def invalidar(self, imoveis=(), imobiliarias=(), imobiliarias_alteradas=False):
+        chaves = [self.chave_imovel(id) for id in imoveis]
+        chaves += [self.chave_imobiliaria(id) for id in imobiliarias]
+        # A geração de listas muda antes da remoção das chaves (ver guardar)
+        self.backend.incrementar_geracao("lista")
+        if imobiliarias_alteradas:
+            self.backend.incrementar_geracao("imobiliaria")
+        self.backend.remover(chaves)
+        with self._lock:
+            self.invalidacoes += 1
+
+    def estatisticas(self):
+        with self._lock:
+            contadores = {"acertos": self.acertos, "falhas": self.falhas, "invalidacoes": self.invalidacoes}
+        return {**contadores, **self.backend.estatisticas()}
+
+
+def criar_cache(app):
+    """Cria o cache configurado em CACHE_BACKEND e o registra em app.extensions."""
+
+    backend = app.config["CACHE_BACKEND"]
+    ttl = app.config["CACHE_TTL"]
+
+    if backend == "nenhum":
+        cache = None
+    elif backend == "memoria":
+        cache = CacheRespostas(CacheMemoria(app.config["CACHE_TAMANHO_MAXIMO"], ttl))
+    elif backend == "redis":
+        import redis
+
+        cache = CacheRespostas(CacheRedis(redis.Redis.from_url(app.config["REDIS_URL"]), ttl))
+    else:
+        raise ValueError(f"CACHE_BACKEND inválido: {backend}")
+
+    app.extensions["cache"] = cache
+    return cache
+
+
+def obter_cache():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("cache")
+
+
+def em_cache(gerar_chave):
+    """
+    Decorator de leitura com cache para os GETs. `gerar_chave(cache, **kwargs)`
+    recebe os argumentos da rota e retorna a chave da resposta, ou None para não
+    usar o cache na requisição.
+    Respostas em streaming e respostas diferentes de 200 não são guardadas.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = obter_cache()
+            if cache is None or streaming_solicitado():
+                return func(*args, **kwargs)
+
+            chave = gerar_chave(cache, **kwargs)
+            if chave is None:
+                return func(*args, **kwargs)
+            resposta = cache.obter(chave)
+            if resposta is not None:
+                return resposta
+
+            versao = cache.versao()
+            resposta = func(*args, **kwargs)
+            if isinstance(resposta, Response) and resposta.status_code == 200:
+                cache.guardar(chave, resposta, versao)
+            return resposta
+
+        return wrapper
+
+    return decorator
+
+
+def registrar_invalidacao(session, imoveis=(), imobiliarias=(), imobiliarias_alteradas=False):
+    """Agenda a invalidação das chaves para depois do commit da sessão."""
+
+    pendente = session.info.setdefault("cache_invalidar", {
+        "imoveis": set(), "imobiliarias": set(), "imobiliarias_alteradas": False,
+    })
+    pendente["imoveis"].update(imoveis)
+    pendente["imobiliarias"].update(imobiliarias)
+    pendente["imobiliarias_alteradas"] |= imobiliarias_alteradas
+
+
+@event.listens_for(Session, "after_flush")
+def _coletar_invalidacoes(session, flush_context):
+    imoveis = set()
+    imobiliarias = set()
+    imobiliarias_alteradas = False
+
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, ImovelModel):
+            imoveis.add(obj.id)
+            historico = inspect(obj).attrs.imobiliaria_id.history
+            imobiliarias.update(id for id in chain(historico.added, historico.deleted, historico.unchanged) if id)
+        elif isinstance(obj, ImobiliariaModel):
+            imobiliarias.add(obj.id)
+            # Uma imobiliária nova ainda não aparece na resposta de nenhum imóvel
+            imobiliarias_alteradas |= obj not in session.new
+
+    if imoveis or imobiliarias:
+        registrar_invalidacao(session, imoveis, imobiliarias, imobiliarias_alteradas)
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_invalidacoes(session):
+    pendente = session.info.pop("cache_invalidar", None)
+    cache = obter_cache()
+    if pendente and cache is not None:
+        cache.invalidar(**pendente)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_invalidacoes(session):
+    session.info.pop("cache_invalidar", None)
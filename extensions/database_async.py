@@ -0,0 +1,31 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Driver assíncrono usado para cada banco no modo ASGI
+DRIVERS_ASSINCRONOS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def url_assincrona(url):
+    """Converte a URL do banco (ex.: DATABASE_URL) para o driver assíncrono equivalente."""
+
+    url = make_url(url)
+    driver = DRIVERS_ASSINCRONOS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"Banco sem driver assíncrono configurado: {url.get_backend_name()}")
+    return url.set(drivername=driver)
+
+
+def criar_sessoes_assincronas(url, **opcoes_engine):
+    """
+    Cria a engine assíncrona e a fábrica de sessões do modo ASGI.
+
+    As sessões não expiram os objetos no commit: no modo assíncrono não há carga
+    preguiçosa de atributos, então os objetos precisam continuar legíveis depois
+    do commit para serem serializados.
+    """
+
+    engine = create_async_engine(url_assincrona(url), **opcoes_engine)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
@@ -0,0 +1,240 @@
+"""
+Pipeline de logs que não bloqueia a requisição.
+
+A thread da requisição apenas coloca o registro em uma fila em memória
+(QueueHandler); a escrita em disco acontece em uma thread de fundo
+(QueueListener). Se a fila estiver cheia, o registro é descartado e contado,
+em vez de segurar a requisição.
+
+Os registros são gravados como JSON, um por linha, com o id da requisição
+(cabeçalho X-Request-ID, gerado quando ausente) e, na linha de acesso, o
+método, o caminho, o status e a latência. Os níveis podem ser definidos por
+módulo (LOG_NIVEIS) e as mensagens DEBUG podem ser amostradas
+(LOG_AMOSTRAGEM_DEBUG).
+
+A rotação do arquivo é segura entre processos: cada escrita acontece sob um
+flock em "<arquivo>.lock", e um processo que encontra o arquivo já rotacionado
+por outro reabre o arquivo novo antes de escrever.
+
+A fila e a thread de fundo são criadas no primeiro registro de cada processo:
+um processo filho de fork (workers do gunicorn --preload, processos do serviço
+de senhas) só inicia a sua thread se registrar algum log.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+try:
+    import fcntl
+except ImportError:  # Windows: rotação sem trava entre processos
+    fcntl = None
+
+# Atributos extras do registro que vão para o JSON
+CAMPOS_EXTRAS = ("metodo", "caminho", "status", "latencia_ms", "excecao")
+
+_handler_fila = None
+
+
+class FormatadorJson(logging.Formatter):
+
+    def format(self, record):
+        dados = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+            "pid": record.process,
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            dados["request_id"] = request_id
+        for campo in CAMPOS_EXTRAS:
+            valor = getattr(record, campo, None)
+            if valor is not None:
+                dados[campo] = valor
+        return json.dumps(dados, ensure_ascii=False)
+
+
+class FiltroContexto(logging.Filter):
+    """Anota o registro com o id da requisição; roda na thread da requisição."""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get("request_id")
+        return True
+
+
+class FiltroAmostragem(logging.Filter):
+    """Deixa passar apenas uma fração dos registros DEBUG."""
+
+    def __init__(self, taxa):
+        super().__init__()
+        self.taxa = taxa
+
+    def filter(self, record):
+        return record.levelno != logging.DEBUG or self.taxa >= 1 or random.random() < self.taxa
+
+
+class QueueHandlerNaoBloqueante(logging.handlers.QueueHandler):
+    """
+    QueueHandler que descarta (e conta) registros quando a fila está cheia.
+
+    A fila e o QueueListener que a esvazia nos `handlers` são criados no
+    primeiro registro do processo, e de novo no primeiro registro de um filho
+    de fork, onde a thread do listener do pai não existe.
+    """
+
+    def __init__(self, handlers, fila_maxima):
+        super().__init__(None)
+        self.handlers_destino = handlers
+        self.fila_maxima = fila_maxima
+        self.listener = None
+        self.pid_listener = None
+        self.descartados = 0
+
+    def iniciar_listener(self):
+        # Chamado em emit, sob a trava do handler, que o logging recria no filho do fork
+        self.queue = queue.Queue(maxsize=self.fila_maxima)
+        self.listener = logging.handlers.QueueListener(self.queue, *self.handlers_destino, respect_handler_level=True)
+        self.listener.start()
+        self.pid_listener = os.getpid()
+
+    def parar_listener(self):
+        if self.listener is not None and self.pid_listener == os.getpid():
+            self.listener.stop()
+            self.listener = None
+
+    def prepare(self, record):
+        # Resolve a mensagem e o traceback aqui, pois os argumentos e o
+        # traceback podem não ser seguros para uso em outra thread depois
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.excecao = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+    def enqueue(self, record):
+        if self.pid_listener != os.getpid():
+            self.iniciar_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+class RotatingFileHandlerMultiprocesso(logging.handlers.RotatingFileHandler):
+
+    def __init__(self, arquivo, max_bytes, quantidade_arquivos):
+        super().__init__(arquivo, maxBytes=max_bytes, backupCount=quantidade_arquivos, encoding="utf-8", delay=True)
+        self._trava = open(self.baseFilename + ".lock", "a")
+
+    @contextmanager
+    def _travado(self):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._trava, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._trava, fcntl.LOCK_UN)
+
+    def _reabrir_se_rotacionado(self):
+        if self.stream is None:
+            return
+        try:
+            atual = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            atual = None
+        aberto = os.fstat(self.stream.fileno())
+        if atual is None or (atual.st_dev, atual.st_ino) != (aberto.st_dev, aberto.st_ino):
+            self.stream.close()
+            self.stream = None
+
+    def emit(self, record):
+        with self._travado():
+            self._reabrir_se_rotacionado()
+            super().emit(record)
+
+    def close(self):
+        super().close()
+        self._trava.close()
+
+
+def ler_niveis(valor):
+    """Converte "modulo=NIVEL,outro=NIVEL" em {"modulo": "NIVEL", ...}."""
+
+    niveis = {}
+    for item in filter(None, (parte.strip() for parte in valor.split(","))):
+        nome, _, nivel = item.partition("=")
+        niveis[nome.strip()] = nivel.strip().upper()
+    return niveis
+
+
+def configurar_logs(app):
+    """Instala o pipeline de logs no logger raiz (uma vez por processo) e os hooks de requisição."""
+
+    global _handler_fila
+
+    if _handler_fila is None:
+        handler_arquivo = RotatingFileHandlerMultiprocesso(
+            app.config["LOG_ARQUIVO"],
+            max_bytes=app.config["LOG_TAMANHO_MAXIMO"],
+            quantidade_arquivos=app.config["LOG_QUANTIDADE_ARQUIVOS"],
+        )
+        handler_arquivo.setFormatter(FormatadorJson())
+
+        _handler_fila = QueueHandlerNaoBloqueante([handler_arquivo], app.config["LOG_FILA_MAXIMA"])
+        _handler_fila.addFilter(FiltroAmostragem(app.config["LOG_AMOSTRAGEM_DEBUG"]))
+        _handler_fila.addFilter(FiltroContexto())
+        atexit.register(_handler_fila.parar_listener)
+
+        raiz = logging.getLogger()
+        raiz.setLevel(app.config["LOG_NIVEL"])
+        raiz.addHandler(_handler_fila)
+
+    for nome, nivel in app.config["LOG_NIVEIS"].items():
+        logging.getLogger(nome).setLevel(nivel)
+
+    app.extensions["logs"] = _handler_fila
+    registrar_hooks_requisicao(app)
+
+
+def registrar_hooks_requisicao(app):
+    acesso = logging.getLogger("acesso")
+
+    @app.before_request
+    def iniciar_requisicao():
+        g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        g.inicio_requisicao = time.perf_counter()
+
+    @app.after_request
+    def registrar_acesso(response):
+        request_id = g.get("request_id")
+        if request_id:
+            response.headers["X-Request-ID"] = request_id
+        inicio = g.get("inicio_requisicao", time.perf_counter())
+        acesso.info(
+            "%s %s %s", request.method, request.path, response.status_code,
+            extra={
+                "metodo": request.method,
+                "caminho": request.path,
+                "status": response.status_code,
+                "latencia_ms": round((time.perf_counter() - inicio) * 1000, 3),
+            },
+        )
+        return response
@@ -0,0 +1,186 @@
+"""
+Métricas por rota no formato texto do Prometheus (GET /metrics).
+
+Hooks de requisição medem a latência e o tamanho da resposta de cada rota, e
+eventos do SQLAlchemy contam as consultas e o tempo gasto no banco dentro da
+requisição. Tudo é acumulado em histogramas por (método, rota, status).
+Com METRICAS_SERVER_TIMING=1, a resposta traz também o cabeçalho
+Server-Timing com o tempo total e o tempo de SQL da requisição.
+
+As métricas são por processo: com vários workers, cada um expõe as suas.
+Consultas feitas depois da resposta (streaming) não entram na contagem.
+"""
+import bisect
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from extensions.pool import estatisticas_pool
+
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+LIMITES_TAMANHO = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+class Histograma:
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+
+    def linhas(self, nome, rotulos):
+        acumulado = 0
+        for limite, contagem in zip(self.limites + ("+Inf",), self.contagens):
+            acumulado += contagem
+            yield f'{nome}_bucket{{{rotulos},le="{limite}"}} {acumulado}'
+        yield f"{nome}_sum{{{rotulos}}} {self.soma}"
+        yield f"{nome}_count{{{rotulos}}} {acumulado}"
+
+
+class Metricas:
+
+    HISTOGRAMAS = (
+        ("api_requisicao_duracao_segundos", "Latência das requisições por rota.", LIMITES_LATENCIA),
+        ("api_requisicao_consultas_sql", "Consultas SQL por requisição.", LIMITES_CONSULTAS),
+        ("api_requisicao_sql_segundos", "Tempo gasto em SQL por requisição.", LIMITES_LATENCIA),
+        ("api_resposta_tamanho_bytes", "Tamanho do corpo das respostas.", LIMITES_TAMANHO),
+    )
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, metodo, rota, status, duracao, consultas, tempo_sql, tamanho):
+        chave = (metodo, rota, status)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [Histograma(limites) for _, _, limites in self.HISTOGRAMAS]
+            serie[0].observar(duracao)
+            serie[1].observar(consultas)
+            serie[2].observar(tempo_sql)
+            if tamanho is not None:
+                serie[3].observar(tamanho)
+
+    def exportar(self):
+        with self._lock:
+            linhas = []
+            for indice, (nome, ajuda, _) in enumerate(self.HISTOGRAMAS):
+                linhas.append(f"# HELP {nome} {ajuda}")
+                linhas.append(f"# TYPE {nome} histogram")
+                for (metodo, rota, status), serie in sorted(self._series.items()):
+                    rotulos = f'metodo="{metodo}",rota="{_escapar(rota)}",status="{status}"'
+                    linhas.extend(serie[indice].linhas(nome, rotulos))
+        return linhas
+
+
+def _escapar(valor):
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _exportar_pools(engines):
+    metricas = {
+        "api_pool_conexoes_em_uso": "em_uso",
+        "api_pool_conexoes_ociosas": "ociosas",
+        "api_pool_conexoes_excedentes": "excedente",
+    }
+    estatisticas = {bind_key or "padrao": estatisticas_pool(engine) for bind_key, engine in engines.items()}
+
+    linhas = []
+    for nome, campo in metricas.items():
+        linhas.append(f"# TYPE {nome} gauge")
+        for engine, valores in estatisticas.items():
+            if campo in valores:
+                linhas.append(f'{nome}{{engine="{engine}"}} {valores[campo]}')
+
+    # Cada família (TYPE e amostras) fica contígua, como exige o formato de exposição
+    esperas = {
+        engine: valores["espera_checkout"]
+        for engine, valores in estatisticas.items()
+        if valores.get("espera_checkout") is not None
+    }
+    linhas.append("# TYPE api_pool_espera_checkout_ms histogram")
+    for engine, espera in esperas.items():
+        for bucket in espera["buckets"]:
+            linhas.append(f'api_pool_espera_checkout_ms_bucket{{engine="{engine}",le="{bucket["ate_ms"]}"}} {bucket["total"]}')
+        linhas.append(f'api_pool_espera_checkout_ms_sum{{engine="{engine}"}} {espera["soma_ms"]}')
+        linhas.append(f'api_pool_espera_checkout_ms_count{{engine="{engine}"}} {espera["total"]}')
+
+    linhas.append("# TYPE api_pool_timeouts_total counter")
+    for engine, espera in esperas.items():
+        linhas.append(f'api_pool_timeouts_total{{engine="{engine}"}} {espera["timeouts"]}')
+    return linhas
+
+
+def exportar_metricas(engines):
+    """Texto no formato de exposição do Prometheus (text/plain; version=0.0.4)."""
+
+    linhas = current_app.extensions["metricas"].exportar()
+    linhas.extend(_exportar_pools(engines))
+
+    logs = current_app.extensions.get("logs")
+    if logs is not None:
+        linhas.append("# TYPE api_logs_descartados_total counter")
+        linhas.append(f"api_logs_descartados_total {logs.descartados}")
+    return "\n".join(linhas) + "\n"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "metricas_sql_consultas" in g:
+        conn.info["metricas_inicio_consulta"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info.pop("metricas_inicio_consulta", None)
+    if inicio is not None and has_request_context() and "metricas_sql_consultas" in g:
+        g.metricas_sql_tempo += time.perf_counter() - inicio
+        g.metricas_sql_consultas += 1
+
+
+def criar_metricas(app):
+    """Cria o registro de métricas e os hooks de requisição, se METRICAS_ATIVAS."""
+
+    if not app.config["METRICAS_ATIVAS"]:
+        return None
+
+    metricas = Metricas()
+    app.extensions["metricas"] = metricas
+    server_timing = app.config["METRICAS_SERVER_TIMING"]
+
+    @app.before_request
+    def iniciar_medicao():
+        g.metricas_inicio = time.perf_counter()
+        g.metricas_sql_consultas = 0
+        g.metricas_sql_tempo = 0.0
+
+    @app.after_request
+    def registrar_medicao(response):
+        if "metricas_inicio" not in g:
+            return response
+
+        duracao = time.perf_counter() - g.metricas_inicio
+        rota = request.url_rule.rule if request.url_rule is not None else "nao_encontrada"
+        tamanho = None if response.is_streamed else response.content_length
+        metricas.registrar(
+            request.method, rota, response.status_code,
+            duracao, g.metricas_sql_consultas, g.metricas_sql_tempo, tamanho,
+        )
+
+        if server_timing:
+            response.headers["Server-Timing"] = (
+                f"app;dur={duracao * 1000:.2f}, "
+                f'sql;dur={g.metricas_sql_tempo * 1000:.2f};desc="{g.metricas_sql_consultas} consultas"'
+            )
+        return response
+
+    return metricas
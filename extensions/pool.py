@@ -0,0 +1,155 @@
+"""
+Configuração e métricas do pool de conexões com o banco.
+
+As opções da engine vêm das variáveis DB_POOL_* e DB_TIMEOUT_CONSULTA_MS
+(ver create_app). O pool padrão é trocado por uma subclasse do QueuePool que
+mede quanto cada checkout esperou por uma conexão, em um histograma por pool.
+Como cada worker tem o seu pool, as métricas são por processo.
+
+Depois de um fork (ex.: gunicorn --preload), o processo filho descarta as
+conexões herdadas sem fechá-las, para não encerrar as do processo pai, e abre
+as suas próprias no primeiro uso.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+import weakref
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Limites (em ms) dos buckets do histograma de espera por conexão
+LIMITES_ESPERA_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_engines = weakref.WeakSet()
+
+
+class HistogramaEspera:
+
+    def __init__(self, limites=LIMITES_ESPERA_MS):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma_ms = 0.0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def registrar(self, espera_ms):
+        with self._lock:
+            self.contagens[bisect.bisect_left(self.limites, espera_ms)] += 1
+            self.soma_ms += espera_ms
+
+    def registrar_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def resumo(self):
+        """Buckets cumulativos (checkouts com espera <= limite, em ms), como no Prometheus."""
+
+        with self._lock:
+            contagens = list(self.contagens)
+            soma_ms = self.soma_ms
+            timeouts = self.timeouts
+
+        buckets = []
+        acumulado = 0
+        for limite, contagem in zip(self.limites + ("+Inf",), contagens):
+            acumulado += contagem
+            buckets.append({"ate_ms": limite, "total": acumulado})
+
+        return {
+            "buckets": buckets,
+            "total": acumulado,
+            "soma_ms": round(soma_ms, 3),
+            "timeouts": timeouts,
+        }
+
+
+class _CheckoutCronometrado:
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.espera_checkout = HistogramaEspera()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.espera_checkout.registrar_timeout()
+            raise
+        finally:
+            self.espera_checkout.registrar((time.perf_counter() - inicio) * 1000)
+
+
+class QueuePoolCronometrado(_CheckoutCronometrado, QueuePool):
+    pass
+
+
+class AsyncQueuePoolCronometrado(_CheckoutCronometrado, AsyncAdaptedQueuePool):
+    pass
+
+
+def opcoes_engine(url, config, assincrono=False):
+    """Monta as opções da engine (SQLALCHEMY_ENGINE_OPTIONS) a partir da configuração DB_*."""
+
+    url = make_url(url)
+    opcoes = {"pool_pre_ping": config["DB_POOL_PRE_PING"]}
+
+    # SQLite em memória usa um pool de conexão única, sem tamanho nem fila
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        opcoes["poolclass"] = AsyncQueuePoolCronometrado if assincrono else QueuePoolCronometrado
+        opcoes["pool_size"] = config["DB_POOL_TAMANHO"]
+        opcoes["max_overflow"] = config["DB_POOL_EXCEDENTE"]
+        opcoes["pool_timeout"] = config["DB_POOL_TIMEOUT"]
+        opcoes["pool_recycle"] = config["DB_POOL_RECICLAGEM"]
+
+    timeout_consulta = config["DB_TIMEOUT_CONSULTA_MS"]
+    if timeout_consulta and url.get_backend_name() == "postgresql":
+        if assincrono:
+            opcoes["connect_args"] = {"server_settings": {"statement_timeout": str(timeout_consulta)}}
+        else:
+            opcoes["connect_args"] = {"options": f"-c statement_timeout={timeout_consulta}"}
+
+    return opcoes
+
+
+def monitorar_engine(engine):
+    """Registra a engine para ser descartada no processo filho após um fork."""
+
+    _engines.add(engine)
+
+
+def _descartar_apos_fork():
+    # Sem o "Pool recreating" (INFO) do dispose: registrado em todo filho, ele
+    # iniciaria a thread de logs (extensions.logs) até nos processos do serviço
+    # de senhas, que não registram nada
+    desativado = logging.root.manager.disable
+    logging.disable(max(desativado, logging.INFO))
+    try:
+        for engine in list(_engines):
+            engine.dispose(close=False)
+    finally:
+        logging.disable(desativado)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_descartar_apos_fork)
+
+
+def estatisticas_pool(engine):
+    pool = engine.pool
+    estatisticas = {"classe": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        estatisticas.update(
+            tamanho=pool.size(),
+            em_uso=pool.checkedout(),
+            ociosas=pool.checkedin(),
+            excedente=max(pool.overflow(), 0),
+            timeout=pool.timeout(),
+        )
+    if isinstance(pool, _CheckoutCronometrado):
+        estatisticas["espera_checkout"] = pool.espera_checkout.resumo()
+    return estatisticas
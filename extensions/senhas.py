@@ -0,0 +1,122 @@
+"""
+Serviço de hash de senhas (pbkdf2_sha256) fora da thread da requisição.
+
+O cálculo do hash roda em um pool de processos limitado, para que uma rajada
+de logins não ocupe os núcleos que atendem as demais rotas. A quantidade de
+tarefas em andamento (em execução + na fila) é limitada: acima do limite,
+`ServicoSenhasSaturado` é levantada e a rota responde 503 com Retry-After.
+O mesmo acontece quando a tarefa não termina em `espera_maxima` segundos (ela
+continua ocupando a vaga até terminar) ou quando um processo do pool morre; nesse
+caso o pool é recriado no próximo uso.
+
+A quantidade de rounds é configurável (SENHA_ROUNDS). Quando a política muda,
+o hash de um usuário é recalculado com os novos rounds no próximo login
+bem-sucedido (`verificar` retorna o novo hash).
+
+Com SENHA_PROCESSOS=0 o hash é calculado na própria thread da requisição.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+from passlib.hash import pbkdf2_sha256
+
+
+class ServicoSenhasSaturado(Exception):
+    pass
+
+
+def _gerar_hash(senha, rounds):
+    return pbkdf2_sha256.using(rounds=rounds).hash(senha)
+
+
+def _verificar(senha, hash_senha, rounds):
+    """Retorna (senha_confere, novo_hash), com novo_hash None se o hash atual segue a política."""
+
+    if not pbkdf2_sha256.verify(senha, hash_senha):
+        return False, None
+
+    politica = pbkdf2_sha256.using(rounds=rounds)
+    if politica.needs_update(hash_senha):
+        return True, politica.hash(senha)
+    return True, None
+
+
+class ServicoSenhas:
+
+    def __init__(self, processos, fila_maxima, rounds, espera_maxima=30):
+        self.processos = processos
+        self.rounds = rounds
+        self.espera_maxima = espera_maxima
+        self._vagas = threading.BoundedSemaphore(max(processos, 1) + fila_maxima)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def gerar_hash(self, senha):
+        return self._executar(_gerar_hash, senha, self.rounds)
+
+    def verificar(self, senha, hash_senha):
+        return self._executar(_verificar, senha, hash_senha, self.rounds)
+
+    def _executar(self, funcao, *args):
+        if not self._vagas.acquire(blocking=False):
+            raise ServicoSenhasSaturado()
+        if self.processos == 0:
+            try:
+                return funcao(*args)
+            finally:
+                self._vagas.release()
+
+        executor = self._obter_executor()
+        try:
+            futuro = executor.submit(funcao, *args)
+        except BrokenProcessPool:
+            self._vagas.release()
+            self._descartar_executor(executor)
+            raise ServicoSenhasSaturado()
+        # A vaga só é liberada quando a tarefa termina, mesmo que a requisição
+        # desista de esperar por ela
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        try:
+            return futuro.result(timeout=self.espera_maxima)
+        except TimeoutError:
+            raise ServicoSenhasSaturado()
+        except BrokenProcessPool:
+            self._descartar_executor(executor)
+            raise ServicoSenhasSaturado()
+
+    def _obter_executor(self):
+        # O pool é criado no primeiro uso em cada processo: um pool herdado
+        # do processo pai (ex.: gunicorn --preload) não funciona após o fork.
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.processos)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _descartar_executor(self, executor):
+        # Um processo do pool morreu (ex.: falta de memória): todas as tarefas do pool
+        # falham e ele não aceita novas, de modo que o próximo uso cria outro
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+
+def criar_servico_senhas(app):
+    """Cria o serviço de senhas conforme SENHA_* e o registra em app.extensions."""
+
+    servico = ServicoSenhas(
+        processos=app.config["SENHA_PROCESSOS"],
+        fila_maxima=app.config["SENHA_FILA_MAXIMA"],
+        rounds=app.config["SENHA_ROUNDS"],
+    )
+    app.extensions["senhas"] = servico
+    return servico
+
+
+def obter_servico_senhas():
+    return current_app.extensions["senhas"]
@@ -39,6 +39,23 @@ def get_engine_url():
 config.set_main_option('sqlalchemy.url', get_engine_url())
 target_db = current_app.extensions['migrate'].db
 
+# Objetos do índice de busca textual (models/busca_imovel.py), criados por DDL
+# próprio e fora do metadata: sem este filtro, o autogenerate geraria a remoção deles
+TABELAS_BUSCA = {
+    'imovel_busca', 'imovel_busca_data', 'imovel_busca_idx', 'imovel_busca_docsize',
+    'imovel_busca_config', 'imovel_busca_content',
+}
+
+
+def include_name(name, type_, parent_names):
+    if type_ == 'table':
+        return name not in TABELAS_BUSCA
+    if type_ == 'column' and parent_names.get('table_name') == 'imovel':
+        return name != 'busca'
+    if type_ == 'index':
+        return name != 'ix_imovel_busca'
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -65,7 +82,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_name=include_name
     )
 
     with context.begin_transaction():
@@ -93,6 +111,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_name", include_name)
 
     connectable = get_engine()
 
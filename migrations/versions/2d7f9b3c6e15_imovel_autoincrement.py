@@ -0,0 +1,75 @@
+"""imovel com AUTOINCREMENT no SQLite
+
+Revision ID: 2d7f9b3c6e15
+Revises: 6c2e8f4a1d93
+Create Date: 2026-10-19 10:04:52.218306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d7f9b3c6e15'
+down_revision = '6c2e8f4a1d93'
+branch_labels = None
+depends_on = None
+
+# Triggers do índice de busca (5e2a9c41b7d3), removidos com a tabela antiga
+TRIGGERS_BUSCA = (
+    """
+    CREATE TRIGGER imovel_busca_inserir AFTER INSERT ON imovel BEGIN
+        INSERT INTO imovel_busca(rowid, rua, numero, bairro, cidade)
+        VALUES (new.id, new.rua, new.numero, new.bairro, new.cidade);
+    END
+    """,
+    """
+    CREATE TRIGGER imovel_busca_excluir AFTER DELETE ON imovel BEGIN
+        INSERT INTO imovel_busca(imovel_busca, rowid, rua, numero, bairro, cidade)
+        VALUES ('delete', old.id, old.rua, old.numero, old.bairro, old.cidade);
+    END
+    """,
+    """
+    CREATE TRIGGER imovel_busca_atualizar AFTER UPDATE OF rua, numero, bairro, cidade ON imovel BEGIN
+        INSERT INTO imovel_busca(imovel_busca, rowid, rua, numero, bairro, cidade)
+        VALUES ('delete', old.id, old.rua, old.numero, old.bairro, old.cidade);
+        INSERT INTO imovel_busca(rowid, rua, numero, bairro, cidade)
+        VALUES (new.id, new.rua, new.numero, new.bairro, new.cidade);
+    END
+    """,
+)
+
+
+def recriar_imovel(autoincrement):
+    # O SQLite não altera o AUTOINCREMENT de uma tabela existente: o batch a recria,
+    # copiando as linhas, os índices e as chaves
+    with op.batch_alter_table(
+        'imovel', schema=None, recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}
+    ):
+        pass
+    for instrucao in TRIGGERS_BUSCA:
+        op.execute(instrucao)
+
+
+def upgrade():
+    # No PostgreSQL, a sequência do id nunca reutiliza valores
+    if op.get_context().dialect.name != 'sqlite':
+        return
+    # Sem AUTOINCREMENT, o SQLite reutiliza o maior id depois que o imóvel é removido
+    # de imovel, por exemplo ao ser arquivado
+    recriar_imovel(True)
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'imovel', 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'imovel')"
+    )
+    op.execute(
+        "UPDATE sqlite_sequence SET seq = max(seq, "
+        "(SELECT coalesce(max(id), 0) FROM imovel), (SELECT coalesce(max(id), 0) FROM imovel_arquivado)) "
+        "WHERE name = 'imovel'"
+    )
+
+
+def downgrade():
+    if op.get_context().dialect.name != 'sqlite':
+        return
+    recriar_imovel(False)
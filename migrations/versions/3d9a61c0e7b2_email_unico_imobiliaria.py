@@ -0,0 +1,28 @@
+"""restrição de unicidade no e-mail da imobiliária
+
+Revision ID: 3d9a61c0e7b2
+Revises: f09684cd55ee
+Create Date: 2026-10-18 13:40:12.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d9a61c0e7b2'
+down_revision = 'f09684cd55ee'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mesmo nome que o PostgreSQL daria a "unique=True" (<tabela>_<coluna>_key),
+    # usado em utilities/unicidade.py para identificar a restrição violada
+    with op.batch_alter_table('imobiliaria', schema=None) as batch_op:
+        batch_op.create_unique_constraint('imobiliaria_email_key', ['email'])
+
+
+def downgrade():
+    with op.batch_alter_table('imobiliaria', schema=None) as batch_op:
+        batch_op.drop_constraint('imobiliaria_email_key', type_='unique')
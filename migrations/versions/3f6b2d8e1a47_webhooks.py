@@ -0,0 +1,35 @@
+"""webhooks das alterações do catálogo
+
+Revision ID: 3f6b2d8e1a47
+Revises: 9a3e5f1c7b28
+Create Date: 2026-10-18 21:04:37.215930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6b2d8e1a47'
+down_revision = '9a3e5f1c7b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('webhook',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('segredo', sa.String(), nullable=True),
+    sa.Column('ativo', sa.Boolean(), nullable=False),
+    sa.Column('ultimo_evento', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('proxima_tentativa', sa.DateTime(), nullable=True),
+    sa.Column('ultimo_erro', sa.String(), nullable=True),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('webhook')
@@ -0,0 +1,36 @@
+"""indices de filtro e paginacao do imovel
+
+Revision ID: 42755c248cc4
+Revises: a534b4defb38
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '42755c248cc4'
+down_revision = 'a534b4defb38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('imovel', schema=None) as batch_op:
+        batch_op.create_index('ix_imovel_cidade_bairro_id', ['cidade', 'bairro', 'id'], unique=False)
+        batch_op.create_index('ix_imovel_estado_cidade_id', ['estado', 'cidade', 'id'], unique=False)
+        batch_op.create_index('ix_imovel_tipo_id', ['tipo', 'id'], unique=False)
+        batch_op.create_index('ix_imovel_ativo_id', ['ativo', 'id'], unique=False)
+        batch_op.create_index('ix_imovel_valor_venda', ['valor_venda'], unique=False)
+        batch_op.create_index('ix_imovel_valor_aluguel', ['valor_aluguel'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('imovel', schema=None) as batch_op:
+        batch_op.drop_index('ix_imovel_valor_aluguel')
+        batch_op.drop_index('ix_imovel_valor_venda')
+        batch_op.drop_index('ix_imovel_ativo_id')
+        batch_op.drop_index('ix_imovel_tipo_id')
+        batch_op.drop_index('ix_imovel_estado_cidade_id')
+        batch_op.drop_index('ix_imovel_cidade_bairro_id')
@@ -0,0 +1,72 @@
+"""índice de busca textual do endereço dos imóveis
+
+Revision ID: 5e2a9c41b7d3
+Revises: 8b1f2c7d9e40
+Create Date: 2026-10-18 16:21:05.734112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2a9c41b7d3'
+down_revision = '8b1f2c7d9e40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mesmas instruções de models/busca_imovel.py
+    dialeto = op.get_context().dialect.name
+    if dialeto == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE imovel_busca USING fts5(
+                rua, numero, bairro, cidade,
+                content='imovel', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER imovel_busca_inserir AFTER INSERT ON imovel BEGIN
+                INSERT INTO imovel_busca(rowid, rua, numero, bairro, cidade)
+                VALUES (new.id, new.rua, new.numero, new.bairro, new.cidade);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER imovel_busca_excluir AFTER DELETE ON imovel BEGIN
+                INSERT INTO imovel_busca(imovel_busca, rowid, rua, numero, bairro, cidade)
+                VALUES ('delete', old.id, old.rua, old.numero, old.bairro, old.cidade);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER imovel_busca_atualizar AFTER UPDATE OF rua, numero, bairro, cidade ON imovel BEGIN
+                INSERT INTO imovel_busca(imovel_busca, rowid, rua, numero, bairro, cidade)
+                VALUES ('delete', old.id, old.rua, old.numero, old.bairro, old.cidade);
+                INSERT INTO imovel_busca(rowid, rua, numero, bairro, cidade)
+                VALUES (new.id, new.rua, new.numero, new.bairro, new.cidade);
+            END
+        """)
+        op.execute("INSERT INTO imovel_busca(imovel_busca) VALUES ('rebuild')")
+    elif dialeto == 'postgresql':
+        op.execute("""
+            ALTER TABLE imovel ADD COLUMN busca tsvector GENERATED ALWAYS AS (
+                to_tsvector('simple'::regconfig, translate(lower(
+                    coalesce(rua, '') || ' ' || coalesce(numero, '') || ' ' ||
+                    coalesce(bairro, '') || ' ' || coalesce(cidade, '')
+                ), 'áàâãäåéèêëíìîïóòôõöúùûüçñýÿ', 'aaaaaaeeeeiiiiooooouuuucnyy'))
+            ) STORED
+        """)
+        op.create_index('ix_imovel_busca', 'imovel', [sa.text('busca')], postgresql_using='gin')
+
+
+def downgrade():
+    dialeto = op.get_context().dialect.name
+    if dialeto == 'sqlite':
+        op.execute("DROP TRIGGER imovel_busca_atualizar")
+        op.execute("DROP TRIGGER imovel_busca_excluir")
+        op.execute("DROP TRIGGER imovel_busca_inserir")
+        op.execute("DROP TABLE imovel_busca")
+    elif dialeto == 'postgresql':
+        op.drop_index('ix_imovel_busca', table_name='imovel')
+        op.execute("ALTER TABLE imovel DROP COLUMN busca")
@@ -0,0 +1,26 @@
+"""indice da chave estrangeira imobiliaria_id do imovel
+
+Revision ID: 6c2e8f4a1d93
+Revises: b7e4c2a9d513
+Create Date: 2026-10-18 15:02:47.530914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c2e8f4a1d93'
+down_revision = 'b7e4c2a9d513'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('imovel', schema=None) as batch_op:
+        batch_op.create_index('ix_imovel_imobiliaria_id', ['imobiliaria_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('imovel', schema=None) as batch_op:
+        batch_op.drop_index('ix_imovel_imobiliaria_id')
@@ -0,0 +1,40 @@
+"""coordenadas e grade geográfica dos imóveis
+
+Revision ID: 8b1f2c7d9e40
+Revises: 3d9a61c0e7b2
+Create Date: 2026-10-18 15:02:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1f2c7d9e40'
+down_revision = '3d9a61c0e7b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cep_centroide',
+    sa.Column('prefixo', sa.String(length=8), nullable=False),
+    sa.Column('latitude', sa.Float(), nullable=False),
+    sa.Column('longitude', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('prefixo')
+    )
+    with op.batch_alter_table('imovel', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('geocelula', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_imovel_geocelula', ['geocelula', 'latitude', 'longitude'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('imovel', schema=None) as batch_op:
+        batch_op.drop_index('ix_imovel_geocelula')
+        batch_op.drop_column('geocelula')
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
+
+    op.drop_table('cep_centroide')
@@ -0,0 +1,32 @@
+"""usuario dono do webhook
+
+Revision ID: 8e5c1a7f3b62
+Revises: 2d7f9b3c6e15
+Create Date: 2026-10-19 11:37:20.604418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e5c1a7f3b62'
+down_revision = '2d7f9b3c6e15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Webhooks cadastrados antes desta migração ficam sem dono: continuam recebendo
+    # as alterações, mas nenhum usuário os vê ou remove pela API
+    with op.batch_alter_table('webhook', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('usuario_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_webhook_usuario_id'), ['usuario_id'], unique=False)
+        batch_op.create_foreign_key('fk_webhook_usuario_id_usuario', 'usuario', ['usuario_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('webhook', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_webhook_usuario_id_usuario', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_webhook_usuario_id'))
+        batch_op.drop_column('usuario_id')
@@ -0,0 +1,39 @@
+"""registro de alterações do catálogo
+
+Revision ID: 9a3e5f1c7b28
+Revises: c4d81e6f2a95
+Create Date: 2026-10-18 18:30:12.481903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3e5f1c7b28'
+down_revision = 'c4d81e6f2a95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # O registro começa vazio: os clientes partem do catálogo completo e da
+    # sequência devolvida por GET /imovel/changes sem "since"
+    op.create_table('alteracao',
+    sa.Column('seq', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('entidade', sa.String(length=16), nullable=False),
+    sa.Column('entidade_id', sa.Integer(), nullable=False),
+    sa.Column('operacao', sa.String(length=16), nullable=False),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('seq'),
+    sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('alteracao', schema=None) as batch_op:
+        batch_op.create_index('ix_alteracao_entidade', ['entidade', 'entidade_id', 'seq'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('alteracao', schema=None) as batch_op:
+        batch_op.drop_index('ix_alteracao_entidade')
+
+    op.drop_table('alteracao')
@@ -0,0 +1,78 @@
+"""arquivo de imóveis inativos e índices parciais dos ativos
+
+Revision ID: b7e4c2a9d513
+Revises: 3f6b2d8e1a47
+Create Date: 2026-10-18 23:41:08.603127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4c2a9d513'
+down_revision = '3f6b2d8e1a47'
+branch_labels = None
+depends_on = None
+
+# Nome, colunas e situação (ativo) das linhas de cada índice parcial
+INDICES_PARCIAIS = {
+    'ix_imovel_ativos_id': (['id'], True),
+    'ix_imovel_inativos_id': (['id'], False),
+    'ix_imovel_ativos_cidade_bairro_id': (['cidade', 'bairro', 'id'], True),
+    'ix_imovel_ativos_geocelula': (['geocelula', 'latitude', 'longitude'], True),
+}
+
+
+def upgrade():
+    op.create_table('imovel_arquivado',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('aluguel', sa.Boolean(), nullable=True),
+    sa.Column('venda', sa.Boolean(), nullable=True),
+    # O tipo enum já existe no PostgreSQL (tabela imovel)
+    sa.Column('tipo', postgresql.ENUM('apartamento', 'casa', 'terreno', 'sala', name='tipoimovelenum', create_type=False), nullable=True),
+    sa.Column('ativo', sa.Boolean(), nullable=True),
+    sa.Column('valor_venda', sa.Float(), nullable=True),
+    sa.Column('valor_aluguel', sa.Float(), nullable=True),
+    sa.Column('rua', sa.String(length=256), nullable=False),
+    sa.Column('numero', sa.String(length=10), nullable=False),
+    sa.Column('bairro', sa.String(length=256), nullable=False),
+    sa.Column('cep', sa.String(length=10), nullable=False),
+    sa.Column('cidade', sa.String(length=256), nullable=False),
+    sa.Column('estado', sa.String(length=256), nullable=False),
+    sa.Column('latitude', sa.Float(), nullable=True),
+    sa.Column('longitude', sa.Float(), nullable=True),
+    sa.Column('geocelula', sa.Integer(), nullable=True),
+    sa.Column('versao', sa.Integer(), nullable=False),
+    sa.Column('atualizado_em', sa.DateTime(), nullable=False),
+    sa.Column('arquivado_em', sa.DateTime(), nullable=False),
+    sa.Column('imobiliaria_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['imobiliaria_id'], ['imobiliaria.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('imovel_arquivado', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_imovel_arquivado_imobiliaria_id'), ['imobiliaria_id'], unique=False)
+
+    # Mesma condição das consultas (imovel.ativo = true/false), para que o banco use os
+    # índices; os dois parciais de id substituem o índice (ativo, id)
+    with op.batch_alter_table('imovel', schema=None) as batch_op:
+        batch_op.drop_index('ix_imovel_ativo_id')
+        for nome, (colunas, ativo) in INDICES_PARCIAIS.items():
+            batch_op.create_index(
+                nome, colunas, unique=False,
+                sqlite_where=sa.text(f'ativo = {int(ativo)}'),
+                postgresql_where=sa.text(f'ativo = {str(ativo).lower()}'),
+            )
+
+
+def downgrade():
+    with op.batch_alter_table('imovel', schema=None) as batch_op:
+        for nome in reversed(list(INDICES_PARCIAIS)):
+            batch_op.drop_index(nome)
+        batch_op.create_index('ix_imovel_ativo_id', ['ativo', 'id'], unique=False)
+
+    with op.batch_alter_table('imovel_arquivado', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_imovel_arquivado_imobiliaria_id'))
+
+    op.drop_table('imovel_arquivado')
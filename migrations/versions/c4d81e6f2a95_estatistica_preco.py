@@ -0,0 +1,36 @@
+"""estatísticas de preço por região e tipo
+
+Revision ID: c4d81e6f2a95
+Revises: 5e2a9c41b7d3
+Create Date: 2026-10-18 17:48:51.206377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d81e6f2a95'
+down_revision = '5e2a9c41b7d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A tabela nasce vazia: preencha com "flask reconstruir-estatisticas"
+    op.create_table('estatistica_preco',
+    sa.Column('estado', sa.String(length=256), nullable=False),
+    sa.Column('cidade', sa.String(length=256), nullable=False),
+    sa.Column('bairro', sa.String(length=256), nullable=False),
+    sa.Column('tipo', sa.String(length=32), nullable=False),
+    sa.Column('metrica', sa.String(length=16), nullable=False),
+    sa.Column('faixa', sa.Integer(), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('soma', sa.Float(), nullable=False),
+    sa.Column('soma_quadrados', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('estado', 'cidade', 'bairro', 'tipo', 'metrica', 'faixa')
+    )
+
+
+def downgrade():
+    op.drop_table('estatistica_preco')
@@ -0,0 +1,42 @@
+"""versao e atualizado_em de imovel e imobiliaria, tabela versao_colecao
+
+Revision ID: f09684cd55ee
+Revises: fc86b9e97ab2
+Create Date: 2026-10-18 10:41:05.287114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f09684cd55ee'
+down_revision = 'fc86b9e97ab2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for tabela in ('imovel', 'imobiliaria'):
+        with op.batch_alter_table(tabela, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('versao', sa.Integer(), server_default='1', nullable=False))
+            batch_op.add_column(sa.Column('atualizado_em', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False))
+
+    versao_colecao = op.create_table('versao_colecao',
+    sa.Column('nome', sa.String(length=64), nullable=False),
+    sa.Column('versao', sa.Integer(), nullable=False),
+    sa.Column('atualizado_em', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('nome')
+    )
+    op.execute(
+        versao_colecao.insert().values(nome='catalogo', versao=1, atualizado_em=sa.func.now())
+    )
+
+
+def downgrade():
+    op.drop_table('versao_colecao')
+
+    for tabela in ('imobiliaria', 'imovel'):
+        with op.batch_alter_table(tabela, schema=None) as batch_op:
+            batch_op.drop_column('atualizado_em')
+            batch_op.drop_column('versao')
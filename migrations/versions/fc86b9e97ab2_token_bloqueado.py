@@ -0,0 +1,33 @@
+"""tabela token_bloqueado da blocklist de JWT
+
+Revision ID: fc86b9e97ab2
+Revises: 42755c248cc4
+Create Date: 2026-10-18 10:03:17.552930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fc86b9e97ab2'
+down_revision = '42755c248cc4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('token_bloqueado',
+    sa.Column('jti', sa.String(length=36), nullable=False),
+    sa.Column('expira_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    with op.batch_alter_table('token_bloqueado', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_token_bloqueado_expira_em'), ['expira_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('token_bloqueado', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_token_bloqueado_expira_em'))
+
+    op.drop_table('token_bloqueado')
@@ -1,3 +1,11 @@
 from models.imobiliaria import ImobiliariaModel
 from models.imovel import ImovelModel
 from models.usuario import UsuarioModel
+from models.token_bloqueado import TokenBloqueadoModel
+from models.versao_colecao import VersaoColecaoModel
+from models.cep_centroide import CepCentroideModel
+from models.estatistica_preco import EstatisticaPrecoModel
+from models.alteracao import AlteracaoModel
+from models.webhook import WebhookModel
+from models.imovel_arquivado import ImovelArquivadoModel
+import models.busca_imovel  # registra o índice de busca textual no create_all
@@ -0,0 +1,179 @@
+"""
+Registro das alterações do catálogo, para sincronização incremental.
+
+Cada inserção, alteração ou exclusão de imóvel ou imobiliária grava uma linha
+em `alteracao`, com uma sequência crescente (`seq`). GET /imovel/changes
+devolve as alterações posteriores à sequência que o cliente já processou; a
+exclusão fica registrada como uma marca ("excluido"), sem os dados, assim
+como o arquivamento de um imóvel inativo antigo ("arquivado", ver
+models.imovel_arquivado), que o tira das listagens.
+
+As linhas são gravadas no after_flush da sessão, depois do listener de
+models.versao_colecao, que atualiza a linha da versão do catálogo: no
+PostgreSQL, a trava dessa linha vai até o commit, de modo que as sequências
+são atribuídas na ordem em que as transações são confirmadas e um cliente
+nunca avança o cursor por cima de uma alteração ainda não confirmada.
+Inserções e atualizações em lote (insert/update do core) não passam pelos
+eventos e devem chamar registrar_alteracoes().
+
+O registro também é a caixa de saída dos webhooks (utilities.webhooks): cada
+webhook guarda a última sequência entregue.
+
+A compactação (compactar_alteracoes) remove as linhas substituídas por uma
+alteração mais nova do mesmo registro e as exclusões mais antigas que a
+retenção e já entregues aos webhooks ativos; cursores anteriores à última
+exclusão removida recebem 410.
+"""
+from datetime import timedelta
+from itertools import chain
+
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+
+from extensions.database import db
+from models.imobiliaria import ImobiliariaModel
+from models.imovel import ImovelModel
+from models.versao_colecao import VersaoColecaoModel
+from models.webhook import WebhookModel
+from utilities.datas import agora_utc
+
+INSERIDO = "inserido"
+ALTERADO = "alterado"
+EXCLUIDO = "excluido"
+ARQUIVADO = "arquivado"
+# Operações que tiram o registro das listagens
+REMOCOES = (EXCLUIDO, ARQUIVADO)
+
+ENTIDADES = {ImovelModel: "imovel", ImobiliariaModel: "imobiliaria"}
+
+# Linha de versao_colecao com a maior sequência de exclusão já removida pela compactação
+COMPACTACAO = "alteracoes_compactadas"
+
+
+class AlteracaoModel(db.Model):
+    __tablename__ = "alteracao"
+    __table_args__ = (
+        db.Index("ix_alteracao_entidade", "entidade", "entidade_id", "seq"),
+        # Sem AUTOINCREMENT, o SQLite reutilizaria a maior sequência depois de removida
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    entidade = db.Column(db.String(16), nullable=False)
+    entidade_id = db.Column(db.Integer, nullable=False)
+    operacao = db.Column(db.String(16), nullable=False)
+    criado_em = db.Column(db.DateTime, nullable=False, default=agora_utc)
+
+
+def registrar_alteracoes(conexao, entidade, ids, operacao):
+    """Grava uma alteração por ID na transação da conexão informada."""
+
+    criado_em = agora_utc()
+    linhas = [
+        {"entidade": entidade, "entidade_id": id, "operacao": operacao, "criado_em": criado_em} for id in ids
+    ]
+    if linhas:
+        conexao.execute(insert(AlteracaoModel), linhas)
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_alteracoes_catalogo(session, flush_context):
+    alteracoes = {}
+    for obj in chain(session.new, session.dirty, session.deleted):
+        entidade = ENTIDADES.get(type(obj))
+        if entidade is None:
+            continue
+        if obj in session.deleted:
+            operacao = EXCLUIDO
+        elif obj in session.new:
+            operacao = INSERIDO
+        elif session.is_modified(obj):
+            operacao = ALTERADO
+        else:
+            continue
+        alteracoes.setdefault((entidade, operacao), []).append(obj.id)
+
+    for (entidade, operacao), ids in alteracoes.items():
+        registrar_alteracoes(session.connection(), entidade, sorted(ids), operacao)
+
+
+def consulta_ultima_sequencia():
+    return select(func.max(AlteracaoModel.seq))
+
+
+def consulta_sequencia_compactada():
+    return select(VersaoColecaoModel.versao).where(VersaoColecaoModel.nome == COMPACTACAO)
+
+
+def consulta_alteracoes(desde, limite):
+    return (
+        select(AlteracaoModel.seq, AlteracaoModel.entidade, AlteracaoModel.entidade_id, AlteracaoModel.operacao)
+        .where(AlteracaoModel.seq > desde)
+        .order_by(AlteracaoModel.seq)
+        .limit(limite)
+    )
+
+
+def ultima_sequencia(session):
+    """Maior sequência já atribuída (0 se não há alterações)."""
+
+    # A última alteração pode ter sido uma exclusão já removida pela compactação
+    return max(session.scalar(consulta_ultima_sequencia()) or 0, sequencia_compactada(session))
+
+
+def sequencia_compactada(session):
+    """Maior sequência de exclusão já removida pela compactação (0 se nenhuma)."""
+
+    return session.scalar(consulta_sequencia_compactada()) or 0
+
+
+def listar_alteracoes(session, desde, limite):
+    """Alterações com sequência maior que `desde`, em ordem de sequência."""
+
+    return session.execute(consulta_alteracoes(desde, limite)).all()
+
+
+def compactar_alteracoes(retencao_dias):
+    """
+    Compacta o registro de alterações e retorna a quantidade de linhas removidas.
+
+    Remove as alterações substituídas por uma mais nova do mesmo registro (quem
+    lê a partir de qualquer sequência continua recebendo o estado atual) e as
+    exclusões e arquivamentos com mais de `retencao_dias` dias já entregues a
+    todos os webhooks ativos. Cursores anteriores à última exclusão removida
+    deixam de ser aceitos, pois perderiam essa exclusão.
+    """
+
+    mais_nova = aliased(AlteracaoModel)
+    substituidas = db.session.execute(
+        delete(AlteracaoModel).where(
+            select(mais_nova.seq)
+            .where(
+                mais_nova.entidade == AlteracaoModel.entidade,
+                mais_nova.entidade_id == AlteracaoModel.entidade_id,
+                mais_nova.seq > AlteracaoModel.seq,
+            )
+            .exists()
+        )
+    ).rowcount
+
+    limite = agora_utc() - timedelta(days=retencao_dias)
+    antigas = AlteracaoModel.operacao.in_(REMOCOES) & (AlteracaoModel.criado_em < limite)
+    entregue = db.session.scalar(select(func.min(WebhookModel.ultimo_evento)).where(WebhookModel.ativo.is_(True)))
+    if entregue is not None:
+        antigas &= AlteracaoModel.seq <= entregue
+    horizonte = db.session.scalar(select(func.max(AlteracaoModel.seq)).where(antigas))
+    exclusoes = 0
+    if horizonte is not None:
+        exclusoes = db.session.execute(delete(AlteracaoModel).where(antigas)).rowcount
+        tabela = VersaoColecaoModel.__table__
+        resultado = db.session.execute(
+            update(tabela)
+            .where(tabela.c.nome == COMPACTACAO, tabela.c.versao < horizonte)
+            .values(versao=horizonte, atualizado_em=agora_utc())
+        )
+        if resultado.rowcount == 0 and sequencia_compactada(db.session) == 0:
+            db.session.execute(insert(tabela).values(nome=COMPACTACAO, versao=horizonte, atualizado_em=agora_utc()))
+
+    db.session.commit()
+    return substituidas + exclusoes
@@ -0,0 +1,73 @@
+"""
+Índice de busca textual dos endereços dos imóveis (rua, número, bairro e cidade).
+
+O índice fica no próprio banco e é mantido por ele, de modo que inserções em
+lote, edições e exclusões feitas fora do ORM também o atualizam:
+
+- SQLite: tabela virtual FTS5 imovel_busca (external content sobre imovel),
+  sem acentos (remove_diacritics) e com índices de prefixo, atualizada por
+  triggers;
+- PostgreSQL: coluna gerada imovel.busca (tsvector da configuração "simple",
+  sem acentos) com índice GIN.
+
+As mesmas instruções são executadas pela migração correspondente; aqui elas
+são registradas para o create_all (benchmarks e bancos de desenvolvimento).
+"""
+from sqlalchemy import DDL, event
+
+from models.imovel import ImovelModel
+
+# Letras acentuadas e equivalentes sem acento, para o translate() do PostgreSQL
+ACENTOS = "áàâãäåéèêëíìîïóòôõöúùûüçñýÿ"
+SEM_ACENTOS = "aaaaaaeeeeiiiiooooouuuucnyy"
+
+DDL_SQLITE = (
+    """
+    CREATE VIRTUAL TABLE imovel_busca USING fts5(
+        rua, numero, bairro, cidade,
+        content='imovel', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER imovel_busca_inserir AFTER INSERT ON imovel BEGIN
+        INSERT INTO imovel_busca(rowid, rua, numero, bairro, cidade)
+        VALUES (new.id, new.rua, new.numero, new.bairro, new.cidade);
+    END
+    """,
+    """
+    CREATE TRIGGER imovel_busca_excluir AFTER DELETE ON imovel BEGIN
+        INSERT INTO imovel_busca(imovel_busca, rowid, rua, numero, bairro, cidade)
+        VALUES ('delete', old.id, old.rua, old.numero, old.bairro, old.cidade);
+    END
+    """,
+    """
+    CREATE TRIGGER imovel_busca_atualizar AFTER UPDATE OF rua, numero, bairro, cidade ON imovel BEGIN
+        INSERT INTO imovel_busca(imovel_busca, rowid, rua, numero, bairro, cidade)
+        VALUES ('delete', old.id, old.rua, old.numero, old.bairro, old.cidade);
+        INSERT INTO imovel_busca(rowid, rua, numero, bairro, cidade)
+        VALUES (new.id, new.rua, new.numero, new.bairro, new.cidade);
+    END
+    """,
+)
+
+DDL_POSTGRESQL = (
+    f"""
+    ALTER TABLE imovel ADD COLUMN busca tsvector GENERATED ALWAYS AS (
+        to_tsvector('simple'::regconfig, translate(lower(
+            coalesce(rua, '') || ' ' || coalesce(numero, '') || ' ' ||
+            coalesce(bairro, '') || ' ' || coalesce(cidade, '')
+        ), '{ACENTOS}', '{SEM_ACENTOS}'))
+    ) STORED
+    """,
+    "CREATE INDEX ix_imovel_busca ON imovel USING gin (busca)",
+)
+
+for instrucao in DDL_SQLITE:
+    event.listen(ImovelModel.__table__, "after_create", DDL(instrucao).execute_if(dialect="sqlite"))
+for instrucao in DDL_POSTGRESQL:
+    event.listen(ImovelModel.__table__, "after_create", DDL(instrucao).execute_if(dialect="postgresql"))
+event.listen(
+    ImovelModel.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS imovel_busca").execute_if(dialect="sqlite"),
+)
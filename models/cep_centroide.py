@@ -0,0 +1,11 @@
+from extensions.database import db
+
+
+class CepCentroideModel(db.Model):
+    """Centro aproximado (média das coordenadas) dos CEPs que começam com `prefixo`."""
+
+    __tablename__ = "cep_centroide"
+
+    prefixo = db.Column(db.String(8), primary_key=True)
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
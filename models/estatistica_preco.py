@@ -0,0 +1,289 @@
+"""
+Estatísticas de preço dos imóveis ativos por estado, cidade, bairro e tipo.
+
+A tabela estatistica_preco guarda, para cada grupo e métrica (valor de venda
+ou de aluguel), um histograma em faixas logarítmicas: cada linha é uma faixa,
+com a quantidade de imóveis, a soma e a soma dos quadrados dos valores que
+caem nela. Somando as faixas de um grupo obtêm-se quantidade, média e desvio
+padrão exatos; cada quantil é a média dos valores da faixa em que ele cai
+(exato quando a faixa tem um só valor, e sempre dentro da faixa, a menos de
+GAMA - 1, cerca de 4%, do valor real). Como faixas somam e subtraem, grupos podem ser combinados na
+leitura e cada alteração de imóvel só incrementa ou decrementa linhas.
+
+A tabela é atualizada no mesmo flush em que imóveis são criados, editados ou
+excluídos pelo ORM; inserções em lote chamam registrar_imoveis. O comando
+"flask reconstruir-estatisticas" a recalcula a partir da tabela imovel.
+"""
+import math
+from collections import defaultdict
+
+from sqlalchemy import bindparam, delete, event, func, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from extensions.database import db
+from models.imovel import ImovelModel
+
+ERRO_RELATIVO = 0.02
+GAMA = (1 + ERRO_RELATIVO) / (1 - ERRO_RELATIVO)
+LOG_GAMA = math.log(GAMA)
+# Faixa dos valores menores ou iguais a zero
+FAIXA_ZERO = -1000000
+
+METRICAS = {"venda": "valor_venda", "aluguel": "valor_aluguel"}
+CAMPOS_GRUPO = ("estado", "cidade", "bairro", "tipo")
+CAMPOS_IMOVEL = CAMPOS_GRUPO + ("ativo", "valor_venda", "valor_aluguel")
+
+
+class EstatisticaPrecoModel(db.Model):
+    __tablename__ = "estatistica_preco"
+
+    estado = db.Column(db.String(256), primary_key=True)
+    cidade = db.Column(db.String(256), primary_key=True)
+    bairro = db.Column(db.String(256), primary_key=True)
+    # Valor do TipoImovelEnum, ou "" para imóveis sem tipo
+    tipo = db.Column(db.String(32), primary_key=True)
+    metrica = db.Column(db.String(16), primary_key=True)
+    faixa = db.Column(db.Integer, primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    soma = db.Column(db.Float, nullable=False, default=0)
+    soma_quadrados = db.Column(db.Float, nullable=False, default=0)
+
+
+def faixa(valor):
+    """Faixa logarítmica do valor: valores da faixa i ficam em (GAMA**(i-1), GAMA**i]."""
+
+    if valor <= 0:
+        return FAIXA_ZERO
+    return math.ceil(math.log(valor) / LOG_GAMA)
+
+
+def somar_contribuicao(deltas, imovel, sinal):
+    """Acumula em `deltas` a contribuição (sinal +1 ou -1) de um imóvel, dado como dict de CAMPOS_IMOVEL."""
+
+    # Imóveis com ativo nulo contam como ativos, como o padrão da coluna
+    if imovel["ativo"] is False:
+        return
+    tipo = imovel["tipo"]
+    grupo = (imovel["estado"], imovel["cidade"], imovel["bairro"], "" if tipo is None else getattr(tipo, "value", tipo))
+    for metrica, campo in METRICAS.items():
+        valor = imovel[campo]
+        if valor is None:
+            continue
+        delta = deltas[grupo + (metrica, faixa(valor))]
+        delta[0] += sinal
+        delta[1] += sinal * valor
+        delta[2] += sinal * valor * valor
+
+
+def aplicar_deltas(conexao, deltas):
+    """Soma os deltas às linhas da tabela, criando as que faltam e removendo as que zeraram."""
+
+    tabela = EstatisticaPrecoModel.__table__
+    chaves = ("estado", "cidade", "bairro", "tipo", "metrica", "faixa")
+    # Ordem fixa das linhas, para transações concorrentes travarem na mesma ordem
+    linhas = [
+        dict(zip(chaves, chave), quantidade=quantidade, soma=soma, soma_quadrados=soma_quadrados)
+        for chave, (quantidade, soma, soma_quadrados) in sorted(deltas.items())
+        if quantidade or soma or soma_quadrados
+    ]
+    if not linhas:
+        return
+
+    dialetos = {"postgresql": postgresql, "sqlite": sqlite}
+    if conexao.dialect.name in dialetos:
+        inserir = dialetos[conexao.dialect.name].insert(tabela)
+        conexao.execute(
+            inserir.on_conflict_do_update(
+                index_elements=chaves,
+                set_={
+                    coluna: getattr(tabela.c, coluna) + getattr(inserir.excluded, coluna)
+                    for coluna in ("quantidade", "soma", "soma_quadrados")
+                },
+            ),
+            linhas,
+        )
+    else:
+        for linha in linhas:
+            condicao = [getattr(tabela.c, chave) == linha[chave] for chave in chaves]
+            resultado = conexao.execute(
+                update(tabela).where(*condicao).values(
+                    quantidade=tabela.c.quantidade + linha["quantidade"],
+                    soma=tabela.c.soma + linha["soma"],
+                    soma_quadrados=tabela.c.soma_quadrados + linha["soma_quadrados"],
+                )
+            )
+            if resultado.rowcount == 0:
+                conexao.execute(tabela.insert().values(**linha))
+
+    removidas = [linha for linha in linhas if linha["quantidade"] < 0]
+    if removidas:
+        conexao.execute(
+            delete(tabela).where(
+                *[getattr(tabela.c, chave) == bindparam(f"b_{chave}") for chave in chaves],
+                tabela.c.quantidade <= 0,
+            ),
+            [{f"b_{chave}": linha[chave] for chave in chaves} for linha in removidas],
+        )
+
+
+def registrar_imoveis(conexao, imoveis):
+    """Soma às estatísticas imóveis inseridos fora do ORM (ex.: inserção em lote), dados como dicts."""
+
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    for imovel in imoveis:
+        somar_contribuicao(deltas, {campo: imovel.get(campo) for campo in CAMPOS_IMOVEL}, 1)
+    aplicar_deltas(conexao, deltas)
+
+
+def _valores_atuais(imovel):
+    return {campo: getattr(imovel, campo) for campo in CAMPOS_IMOVEL}
+
+
+def _valores_anteriores(imovel):
+    estado = inspect(imovel)
+    valores = {}
+    for campo in CAMPOS_IMOVEL:
+        historico = estado.attrs[campo].history
+        if historico.deleted:
+            valores[campo] = historico.deleted[0]
+        elif historico.unchanged:
+            valores[campo] = historico.unchanged[0]
+        else:
+            valores[campo] = getattr(imovel, campo)
+    return valores
+
+
+@event.listens_for(Session, "before_flush")
+def _atualizar_estatisticas(session, flush_context, instances):
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    for imovel in session.new:
+        if isinstance(imovel, ImovelModel):
+            somar_contribuicao(deltas, _valores_atuais(imovel), 1)
+    for imovel in session.dirty:
+        if isinstance(imovel, ImovelModel) and session.is_modified(imovel):
+            somar_contribuicao(deltas, _valores_anteriores(imovel), -1)
+            somar_contribuicao(deltas, _valores_atuais(imovel), 1)
+    for imovel in session.deleted:
+        if isinstance(imovel, ImovelModel):
+            somar_contribuicao(deltas, _valores_anteriores(imovel), -1)
+    if deltas:
+        aplicar_deltas(session.connection(), deltas)
+
+
+def calcular_estatisticas(tamanho_lote=10000):
+    """Calcula, a partir da tabela imovel, as linhas que a tabela de estatísticas deveria ter."""
+
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    consulta = select(*[getattr(ImovelModel, campo) for campo in CAMPOS_IMOVEL])
+    for linha in db.session.execute(consulta.execution_options(yield_per=tamanho_lote)):
+        somar_contribuicao(deltas, linha._asdict(), 1)
+    return deltas
+
+
+def reconstruir_estatisticas():
+    """Recalcula toda a tabela de estatísticas. Retorna a quantidade de linhas gravadas."""
+
+    deltas = calcular_estatisticas()
+    db.session.execute(delete(EstatisticaPrecoModel))
+    aplicar_deltas(db.session.connection(), deltas)
+    db.session.commit()
+    return sum(1 for quantidade, _, _ in deltas.values() if quantidade)
+
+
+def verificar_estatisticas(tolerancia=1e-6):
+    """
+    Compara a tabela de estatísticas com o recálculo a partir da tabela imovel,
+    sem alterá-la. Retorna as chaves (estado, cidade, bairro, tipo, metrica,
+    faixa) divergentes.
+    """
+
+    esperado = {chave: valores for chave, valores in calcular_estatisticas().items() if valores[0]}
+    gravado = {
+        (linha.estado, linha.cidade, linha.bairro, linha.tipo, linha.metrica, linha.faixa):
+            (linha.quantidade, linha.soma, linha.soma_quadrados)
+        for linha in db.session.scalars(select(EstatisticaPrecoModel))
+    }
+    divergentes = []
+    for chave in sorted(esperado.keys() | gravado.keys()):
+        a = esperado.get(chave, (0, 0.0, 0.0))
+        b = gravado.get(chave, (0, 0.0, 0.0))
+        if a[0] != b[0] or any(
+            not math.isclose(x, y, rel_tol=tolerancia, abs_tol=tolerancia) for x, y in zip(a[1:], b[1:])
+        ):
+            divergentes.append(chave)
+    return divergentes
+
+
+def resumir(faixas):
+    """
+    Resume as faixas de um grupo (pares (faixa, quantidade, soma, soma_quadrados))
+    em quantidade, média, desvio padrão e quartis aproximados.
+    """
+
+    faixas = sorted(item for item in faixas if item[1] > 0)
+    quantidade = sum(item[1] for item in faixas)
+    if quantidade == 0:
+        return None
+    soma = sum(item[2] for item in faixas)
+    soma_quadrados = sum(item[3] for item in faixas)
+    media = soma / quantidade
+    variancia = max(soma_quadrados / quantidade - media * media, 0.0)
+
+    def quantil(q):
+        posicao = q * (quantidade - 1)
+        acumulado = 0
+        for _, contagem, soma_faixa, _ in faixas:
+            acumulado += contagem
+            if acumulado > posicao:
+                return round(soma_faixa / contagem, 2)
+
+    return {
+        "quantidade": quantidade,
+        "media": round(media, 2),
+        "desvio_padrao": round(math.sqrt(variancia), 2),
+        "p25": quantil(0.25),
+        "mediana": quantil(0.5),
+        "p75": quantil(0.75),
+    }
+
+
+def consulta_estatisticas(filtros, agrupar):
+    """
+    Consulta das faixas somadas por grupo: linhas (*campos de `agrupar`, metrica,
+    faixa, quantidade, soma, soma_quadrados), restritas pelos filtros de igualdade
+    em CAMPOS_GRUPO.
+    """
+
+    colunas = [getattr(EstatisticaPrecoModel, campo) for campo in CAMPOS_GRUPO if campo in agrupar]
+    query = select(
+        *colunas,
+        EstatisticaPrecoModel.metrica,
+        EstatisticaPrecoModel.faixa,
+        func.sum(EstatisticaPrecoModel.quantidade),
+        func.sum(EstatisticaPrecoModel.soma),
+        func.sum(EstatisticaPrecoModel.soma_quadrados),
+    )
+    for campo, valor in filtros.items():
+        query = query.where(getattr(EstatisticaPrecoModel, campo) == valor)
+    return query.group_by(*colunas, EstatisticaPrecoModel.metrica, EstatisticaPrecoModel.faixa)
+
+
+def resumir_grupos(linhas, agrupar):
+    """Resume as linhas de consulta_estatisticas em uma lista de grupos, em ordem."""
+
+    campos = [campo for campo in CAMPOS_GRUPO if campo in agrupar]
+    faixas = defaultdict(lambda: defaultdict(list))
+    for linha in linhas:
+        metrica, *valores = linha[len(campos):]
+        faixas[tuple(linha[:len(campos)])][metrica].append(tuple(valores))
+
+    grupos = []
+    for grupo in sorted(faixas):
+        resultado = dict(zip(campos, grupo))
+        if "tipo" in resultado:
+            resultado["tipo"] = resultado["tipo"] or None
+        for metrica in METRICAS:
+            resultado[metrica] = resumir(faixas[grupo][metrica])
+        grupos.append(resultado)
+    return grupos
@@ -1,4 +1,5 @@
 from extensions.database import db
+from utilities.datas import agora_utc
 
 class ImobiliariaModel(db.Model):
     __tablename__ = "imobiliaria"
@@ -8,9 +9,17 @@ class ImobiliariaModel(db.Model):
     razao_social = db.Column(db.String, nullable=True)
     cnpj = db.Column(db.String, unique=True, nullable=False)
     telefone = db.Column(db.String, nullable=False)
-    email = db.Column(db.String, nullable=False)
+    email = db.Column(db.String, unique=True, nullable=False)
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    atualizado_em = db.Column(db.DateTime, nullable=False, default=agora_utc, onupdate=agora_utc, server_default=db.func.now())
     
-    imoveis = db.relationship("ImovelModel", back_populates="imobiliaria", lazy="dynamic")
+    # "imoveis" é uma coleção comum para permitir carregamento antecipado
+    # (selectinload/subqueryload); "imoveis_query" é a versão dinâmica, para
+    # consultas filtradas e paginadas sobre os imóveis da imobiliária.
+    imoveis = db.relationship("ImovelModel", back_populates="imobiliaria", lazy="select")
+    imoveis_query = db.relationship("ImovelModel", lazy="dynamic", viewonly=True)
 
     usuario_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), unique=True, nullable=True)
     usuario = db.relationship("UsuarioModel", back_populates="imobiliaria")
+
+    __mapper_args__ = {"version_id_col": versao}
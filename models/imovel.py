@@ -1,10 +1,24 @@
 from extensions.database import db
-from sqlalchemy import Enum
+from sqlalchemy import Enum, event, false, true
+from utilities.datas import agora_utc
 from models.enums.tipo_imovel import TipoImovelEnum
+from utilities.geo import celula
 
 
 class ImovelModel(db.Model):
     __tablename__ = "imovel"
+    __table_args__ = (
+        db.Index("ix_imovel_cidade_bairro_id", "cidade", "bairro", "id"),
+        db.Index("ix_imovel_estado_cidade_id", "estado", "cidade", "id"),
+        db.Index("ix_imovel_tipo_id", "tipo", "id"),
+        db.Index("ix_imovel_valor_venda", "valor_venda"),
+        db.Index("ix_imovel_valor_aluguel", "valor_aluguel"),
+        db.Index("ix_imovel_geocelula", "geocelula", "latitude", "longitude"),
+        # Chave estrangeira, com o ID para a paginação dos imóveis de uma imobiliária
+        db.Index("ix_imovel_imobiliaria_id", "imobiliaria_id", "id"),
+        # Sem AUTOINCREMENT, o SQLite reutilizaria o maior id depois de removido (ex.: arquivado)
+        {"sqlite_autoincrement": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     aluguel = db.Column(db.Boolean, default=True)
@@ -19,6 +33,38 @@ class ImovelModel(db.Model):
     cep = db.Column(db.String(10), nullable=False)
     cidade = db.Column(db.String(256), nullable=False)
     estado = db.Column(db.String(256), nullable=False)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    # Célula da grade de utilities/geo.py, calculada a partir das coordenadas
+    geocelula = db.Column(db.Integer)
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    atualizado_em = db.Column(db.DateTime, nullable=False, default=agora_utc, onupdate=agora_utc, server_default=db.func.now())
     
     imobiliaria_id = db.Column(db.Integer, db.ForeignKey("imobiliaria.id"), unique=False, nullable=False)
     imobiliaria = db.relationship("ImobiliariaModel", back_populates="imoveis")
+
+    __mapper_args__ = {"version_id_col": versao}
+
+
+# Imóveis ativos e inativos. Os índices parciais abaixo só têm as linhas de uma
+# das situações e atendem às consultas com esta mesma condição (o filtro ativo
+# das listagens, o catálogo e o arquivamento), sem percorrer as demais.
+ATIVO = ImovelModel.ativo == true()
+INATIVO = ImovelModel.ativo == false()
+
+db.Index("ix_imovel_ativos_id", ImovelModel.id, sqlite_where=ATIVO, postgresql_where=ATIVO)
+db.Index("ix_imovel_inativos_id", ImovelModel.id, sqlite_where=INATIVO, postgresql_where=INATIVO)
+db.Index(
+    "ix_imovel_ativos_cidade_bairro_id", ImovelModel.cidade, ImovelModel.bairro, ImovelModel.id,
+    sqlite_where=ATIVO, postgresql_where=ATIVO,
+)
+db.Index(
+    "ix_imovel_ativos_geocelula", ImovelModel.geocelula, ImovelModel.latitude, ImovelModel.longitude,
+    sqlite_where=ATIVO, postgresql_where=ATIVO,
+)
+
+
+@event.listens_for(ImovelModel, "before_insert")
+@event.listens_for(ImovelModel, "before_update")
+def _calcular_geocelula(mapper, connection, imovel):
+    imovel.geocelula = celula(imovel.latitude, imovel.longitude)
@@ -0,0 +1,76 @@
+"""
+Arquivo dos imóveis inativos antigos, fora da tabela imovel e dos seus índices.
+
+A tabela imovel_arquivado tem as mesmas colunas de imovel e é preenchida pelo
+comando "flask arquivar-imoveis" (utilities.arquivo). GET /imovel/<id>
+continua encontrando o imóvel arquivado, e a edição ou exclusão de um imóvel
+arquivado primeiro o devolve à tabela imovel.
+"""
+from sqlalchemy import Enum, delete, insert, select
+
+from extensions.database import db
+from models.enums.tipo_imovel import TipoImovelEnum
+from models.imovel import ImovelModel
+from utilities.datas import agora_utc
+
+
+class ImovelArquivadoModel(db.Model):
+    __tablename__ = "imovel_arquivado"
+
+    # Mesmas colunas de ImovelModel, sem os índices de consulta
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    aluguel = db.Column(db.Boolean)
+    venda = db.Column(db.Boolean)
+    tipo = db.Column(Enum(TipoImovelEnum))
+    ativo = db.Column(db.Boolean)
+    valor_venda = db.Column(db.Float)
+    valor_aluguel = db.Column(db.Float)
+    rua = db.Column(db.String(256), nullable=False)
+    numero = db.Column(db.String(10), nullable=False)
+    bairro = db.Column(db.String(256), nullable=False)
+    cep = db.Column(db.String(10), nullable=False)
+    cidade = db.Column(db.String(256), nullable=False)
+    estado = db.Column(db.String(256), nullable=False)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geocelula = db.Column(db.Integer)
+    versao = db.Column(db.Integer, nullable=False)
+    atualizado_em = db.Column(db.DateTime, nullable=False)
+    arquivado_em = db.Column(db.DateTime, nullable=False, default=agora_utc)
+
+    imobiliaria_id = db.Column(db.Integer, db.ForeignKey("imobiliaria.id"), nullable=False, index=True)
+    imobiliaria = db.relationship("ImobiliariaModel", viewonly=True)
+
+
+# Colunas copiadas entre as duas tabelas
+COLUNAS = [coluna.name for coluna in ImovelModel.__table__.columns]
+
+
+def instrucoes_restauracao(id):
+    """
+    INSERT e DELETE que devolvem o imóvel arquivado à tabela imovel, com o mesmo
+    ID; o INSERT não insere nada se o imóvel não está arquivado.
+    """
+
+    arquivo = ImovelArquivadoModel.__table__
+    return (
+        insert(ImovelModel.__table__).from_select(
+            COLUNAS, select(*(arquivo.c[coluna] for coluna in COLUNAS)).where(arquivo.c.id == id)
+        ),
+        delete(arquivo).where(arquivo.c.id == id),
+    )
+
+
+def obter_ou_restaurar(session, id):
+    """
+    Imóvel pelo ID, para edição ou exclusão; se estiver arquivado, é devolvido
+    à tabela imovel na transação atual. Retorna None se o imóvel não existe.
+    """
+
+    imovel = session.get(ImovelModel, id)
+    if imovel is None:
+        inserir, remover = instrucoes_restauracao(id)
+        if session.execute(inserir).rowcount:
+            session.execute(remover)
+            imovel = session.get(ImovelModel, id)
+    return imovel
@@ -0,0 +1,8 @@
+from extensions.database import db
+
+
+class TokenBloqueadoModel(db.Model):
+    __tablename__ = "token_bloqueado"
+
+    jti = db.Column(db.String(36), primary_key=True)
+    expira_em = db.Column(db.DateTime, nullable=True, index=True)
@@ -0,0 +1,81 @@
+"""
+Versão das coleções, usada nos ETags e no Last-Modified das listagens.
+
+A versão do catálogo é um contador numa única linha de `versao_colecao`
+("catalogo"), incrementado no after_flush de toda transação que insere,
+altera ou exclui um imóvel ou uma imobiliária (e pelas escritas em lote, que
+chamam incrementar_versao()).
+
+Custo: no PostgreSQL, o UPDATE dessa linha a trava até o commit, então as
+transações que escrevem no catálogo ficam em fila umas atrás das outras a
+partir do primeiro flush — duas edições de imóveis diferentes não são
+confirmadas em paralelo, e uma transação longa (ex. importação em lote)
+segura as demais escritas até terminar. As leituras não são afetadas. No
+SQLite a escrita já é serializada pelo próprio banco.
+
+A trava é mantida de propósito: models.alteracao depende dela para atribuir as
+sequências do registro de alterações na ordem dos commits (GET
+/imovel/changes e webhooks nunca pulam uma alteração ainda não confirmada).
+Um contador sem trava (sequence do PostgreSQL, ou um contador por escrita
+somado na leitura) deixaria as escritas em paralelo, mas exigiria outra forma
+de ordenar esse registro. Para reduzir a espera, mantenha curtas as
+transações que escrevem no catálogo e faça as cargas grandes em lotes com
+commits intermediários (ver ImovelBulk).
+"""
+from itertools import chain
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from extensions.database import db
+from models.imobiliaria import ImobiliariaModel
+from models.imovel import ImovelModel
+from utilities.datas import agora_utc
+
+# Versão única para imóveis e imobiliárias: as respostas de um recurso
+# incluem dados do outro (ImovelSchema.imobiliaria, ImobiliariaSchema.imoveis).
+CATALOGO = "catalogo"
+
+
+class VersaoColecaoModel(db.Model):
+    __tablename__ = "versao_colecao"
+
+    nome = db.Column(db.String(64), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=0)
+    atualizado_em = db.Column(db.DateTime, nullable=False, default=agora_utc)
+
+
+def incrementar_versao(conexao, nome=CATALOGO):
+    """Incrementa a versão da coleção na transação da conexão informada."""
+
+    tabela = VersaoColecaoModel.__table__
+    resultado = conexao.execute(
+        update(tabela)
+        .where(tabela.c.nome == nome)
+        .values(versao=tabela.c.versao + 1, atualizado_em=agora_utc())
+    )
+    if resultado.rowcount == 0:
+        conexao.execute(insert(tabela).values(nome=nome, versao=1, atualizado_em=agora_utc()))
+
+
+def obter_versao(session, nome=CATALOGO):
+    """Retorna (versao, atualizado_em) da coleção, ou (0, None) se ela nunca foi alterada."""
+
+    linha = session.execute(
+        select(VersaoColecaoModel.versao, VersaoColecaoModel.atualizado_em)
+        .where(VersaoColecaoModel.nome == nome)
+    ).first()
+    if linha is None:
+        return 0, None
+    return linha.versao, linha.atualizado_em
+
+
+@event.listens_for(Session, "after_flush")
+def _incrementar_versao_catalogo(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, (ImovelModel, ImobiliariaModel)):
+            continue
+        # Um objeto excluído não tem atributos modificados, mas altera o catálogo
+        if obj in session.deleted or session.is_modified(obj):
+            incrementar_versao(session.connection())
+            return
@@ -0,0 +1,21 @@
+from extensions.database import db
+from utilities.datas import agora_utc
+
+
+class WebhookModel(db.Model):
+    __tablename__ = "webhook"
+
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String, nullable=False)
+    segredo = db.Column(db.String, nullable=True)
+    ativo = db.Column(db.Boolean, nullable=False, default=True)
+    # Sequência (alteracao.seq) da última alteração entregue com sucesso
+    ultimo_evento = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), nullable=False, default=0)
+    # Falhas seguidas; zera a cada entrega com sucesso
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    proxima_tentativa = db.Column(db.DateTime, nullable=True)
+    ultimo_erro = db.Column(db.String, nullable=True)
+    criado_em = db.Column(db.DateTime, nullable=False, default=agora_utc)
+
+    # Usuário que cadastrou o webhook: só ele o vê e o remove
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=True, index=True)
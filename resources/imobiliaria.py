@@ -1,263 +1,348 @@
-import logging.handlers
-from flask import jsonify
+import logging
+from itertools import groupby
+from operator import attrgetter
+from flask import jsonify, request
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
 
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy import func, select
+from extensions.cache import em_cache
 from extensions.database import db
 from models.imobiliaria import ImobiliariaModel
+from models.imovel import ImovelModel
+from models.versao_colecao import obter_versao
 
-from schema import ImobiliariaSchema, PlainImobiliariaSchema
+from schema import (
+    ImobiliariaFiltroSchema, ImobiliariaImoveisSchema, ImobiliariaSchema, ImovelFiltroSchema, PlainImobiliariaSchema,
+    PlainImovelSchema,
+)
 from security import jwt_required_with_doc
 from utilities.apenas_digitos import apenas_digitos
+from utilities.etag import com_validadores, gerar_etag, nao_modificado, resposta_nao_modificada
+from utilities.filtro_imovel import filtrar_imoveis
+from utilities.paginacao import paginar_por_cursor
+from utilities.serializacao import SerializadorCompilado, resposta_json
+from utilities.streaming import resposta_ndjson_objetos, streaming_solicitado
+from utilities.transacao import salvar
 from utilities.valida_cnpj import validar_cnpj
 from utilities.valida_email import validar_email
 from utilities.valida_telefone import validar_telefone
 
 blp = Blueprint("Imobiliaria", "imobiliaria", description="Operações sobre imobiliária")
 
+logger = logging.getLogger(__name__)
+
+MENSAGENS_UNICIDADE = {
+    "imobiliaria.email": "E-mail já cadastrado",
+    "imobiliaria.cnpj": "CNPJ já cadastrado",
+}
+
+# Listagem: lê apenas as colunas do ImobiliariaSchema e serializa sem o marshmallow
+SERIALIZADOR_IMOBILIARIA = SerializadorCompilado(ImobiliariaSchema(), ImobiliariaModel)
+SERIALIZADOR_IMOVEL = SerializadorCompilado(PlainImovelSchema(), ImovelModel)
+
+
+def consulta_imoveis_imobiliarias(limite=None, imobiliaria_id=None):
+    """
+    Consulta dos `limite` primeiros imóveis (em ordem de ID) de cada imobiliária, ou de todos
+    se `limite` for None, ordenados por imobiliária e ID. Cada linha traz as colunas de
+    SERIALIZADOR_IMOVEL e, no final, o total de imóveis da imobiliária ("imoveis_total") e a
+    posição do imóvel nela ("posicao").
+
+    É uma única consulta com funções de janela (row_number e count particionados por
+    imobiliária), em vez de uma carga de imóveis por imobiliária.
+    """
+
+    particao = ImovelModel.imobiliaria_id
+    janela = select(
+        *SERIALIZADOR_IMOVEL.colunas,
+        func.count().over(partition_by=particao).label("imoveis_total"),
+        func.row_number().over(partition_by=particao, order_by=ImovelModel.id).label("posicao"),
+    )
+    if imobiliaria_id is not None:
+        janela = janela.where(ImovelModel.imobiliaria_id == imobiliaria_id)
+    janela = janela.subquery()
+
+    query = select(*janela.c).order_by(janela.c.imobiliaria_id, janela.c.id)
+    if limite is not None:
+        # A primeira linha de cada imobiliária traz o total mesmo com limite 0
+        query = query.where(janela.c.posicao <= max(limite, 1))
+    return query
+
+
+def serializar_imobiliarias(session, limite_imoveis=None, tamanho_lote=1000, imobiliaria_id=None):
+    """
+    Gera o JSON das imobiliárias em ordem de ID, cada uma com os `limite_imoveis`
+    primeiros imóveis (todos, se None) e o total de imóveis em "imoveis_total".
+
+    Lê as imobiliárias e os imóveis (consulta_imoveis_imobiliarias) em duas consultas
+    percorridas juntas com `yield_per`, sem carregar a tabela inteira em memória.
+    Com `imobiliaria_id`, gera apenas essa imobiliária.
+    """
+
+    imobiliarias = SERIALIZADOR_IMOBILIARIA.consulta(session).order_by(ImobiliariaModel.id)
+    if imobiliaria_id is not None:
+        imobiliarias = imobiliarias.filter(ImobiliariaModel.id == imobiliaria_id)
+    imoveis = session.execute(
+        consulta_imoveis_imobiliarias(limite_imoveis, imobiliaria_id).execution_options(yield_per=tamanho_lote)
+    )
+    grupos = groupby(imoveis, key=attrgetter("imobiliaria_id"))
+    imobiliaria_atual, grupo = next(grupos, (None, None))
+
+    for linha in imobiliarias.yield_per(tamanho_lote):
+        while imobiliaria_atual is not None and imobiliaria_atual < linha.id:
+            imobiliaria_atual, grupo = next(grupos, (None, None))
+        lista = []
+        total = 0
+        if imobiliaria_atual == linha.id:
+            for imovel in grupo:
+                total = imovel.imoveis_total
+                if limite_imoveis is None or imovel.posicao <= limite_imoveis:
+                    lista.append(SERIALIZADOR_IMOVEL.json(imovel))
+            imobiliaria_atual, grupo = next(grupos, (None, None))
+        yield SERIALIZADOR_IMOBILIARIA.json(linha, imoveis=lista, imoveis_total=total)
+
+
+# Corpo das rotas, compartilhado com asgi.py: cada função recebe a sessão (db.session
+# ou a assíncrona, por run_sync) e os argumentos já validados.
+
+
+def validar_imobiliaria(imobiliaria_data):
+    """Valida e-mail, CNPJ e telefone (409 se inválidos); retorna o CNPJ e o telefone só com dígitos."""
+
+    cnpj = imobiliaria_data.get('cnpj')
+    telefone = imobiliaria_data.get('telefone')
+    email = imobiliaria_data.get('email')
+
+    if not validar_email(email):
+        message="E-mail inválido"
+        logger.error(message)
+        abort(409, message=message)
+
+    if not validar_cnpj(cnpj):
+        message="CNPJ inválido"
+        logger.error(message)
+        abort(409, message=message)
+
+    if not validar_telefone(telefone):
+        message="Formato do telefone inválido"
+        logger.error(message)
+        abort(409, message=message)
+
+    return apenas_digitos(str(cnpj)), apenas_digitos(str(telefone))
+
+
+def criar_imobiliaria(session, imobiliaria_data, filtros):
+    """POST /imobiliaria: cria a imobiliária e retorna a resposta no formato de GET /imobiliaria/<id>."""
+
+    cnpj, telefone = validar_imobiliaria(imobiliaria_data)
+
+    imobiliaria = ImobiliariaModel(
+        nome_fantasia=imobiliaria_data['nome_fantasia'],
+        razao_social=imobiliaria_data.get('razao_social'),
+        cnpj=cnpj,
+        telefone=telefone,
+        email=imobiliaria_data.get('email'),
+        imoveis=[],
+    )
+
+    # Salva em BD: e-mail e CNPJ duplicados são detectados pelas restrições
+    # de unicidade do banco, sem consultas prévias.
+    session.add(imobiliaria)
+    salvar(session, "criar imobiliaria", "Erro ao criar imobiliária.", MENSAGENS_UNICIDADE)
+    message = f"Imobiliária criada com sucesso"
+    logger.debug(message)
+
+    # Mesmo formato de GET /imobiliaria/<id>, com os imóveis limitados
+    result = next(serializar_imobiliarias(session, filtros["imoveis_limit"], imobiliaria_id=imobiliaria.id))
+    return resposta_json(result)
+
+
+def listar_imobiliarias(session, filtros):
+    """GET /imobiliaria em JSON: todas as imobiliárias, com ETag e Last-Modified (ou 304)."""
+
+    versao, ultima_modificacao = obter_versao(session)
+    etag = gerar_etag("imobiliarias", versao, request.full_path)
+    if nao_modificado(etag, ultima_modificacao):
+        return resposta_nao_modificada(etag, ultima_modificacao)
+
+    result_lista = list(serializar_imobiliarias(session, filtros["imoveis_limit"]))
+
+    return com_validadores(resposta_json(result_lista), etag, ultima_modificacao)
+
 
 @blp.route("/imobiliaria")
 class Imobiliaria(MethodView):
 
     @jwt_required_with_doc()
     @blp.arguments(PlainImobiliariaSchema)
+    @blp.arguments(ImobiliariaFiltroSchema, location="query")
     @blp.response(201, ImobiliariaSchema)
-    def post(self, imobiliaria_data):
+    def post(self, imobiliaria_data, filtros):
         """
         Cria uma nova imobiliária.
 
         **Descrição:** Recebe os dados de uma nova imobiliária, valida e persiste no banco de dados.
+        A resposta tem o formato de GET /imobiliaria/<id>.
+        Se o e-mail ou o CNPJ já estiverem cadastrados, ou forem inválidos, retorna um erro 409.
         Se ocorrer um erro durante a operação de banco de dados, retorna um erro 400 ou 500.
 
         **Parâmetros:**
             imobiliaria_data (dict): Os dados da imobiliária a ser criada.
+            filtros (dict): imoveis_limit.
 
         **Retorna:**
             Um objeto JSON com as informações da imobiliária criada.
         """
+        return criar_imobiliaria(db.session, imobiliaria_data, filtros)
 
-        # Dados recebidos:
-        
-        nome_fantasia = imobiliaria_data['nome_fantasia']
-        razao_social = imobiliaria_data.get('razao_social')
-        cnpj = imobiliaria_data.get('cnpj')
-        telefone = imobiliaria_data.get('telefone')
-        email = imobiliaria_data.get('email')
-
-
-        # validações:
-
-        if ImobiliariaModel.query.filter(ImobiliariaModel.email == email).first():
-            message="E-mail já cadastrado"
-            logging.error(message)
-            abort(409, message=message)
-
-        if not validar_email(email):
-            message="E-mail inválido"
-            logging.error(message)
-            abort(409, message=message)
-        
-        if ImobiliariaModel.query.filter(ImobiliariaModel.cnpj == cnpj).first():
-            message="CNPJ já cadastrado"
-            logging.error(message)
-            abort(409, message=message)
-
-        if not validar_cnpj(cnpj):
-            message="CNPJ inválido"
-            logging.error(message)
-            abort(409, message=message)
-        
-        if not validar_telefone(telefone):
-            message="Formato do telefone inválido"
-            logging.error(message)
-            abort(409, message=message)
-        
-        cnpj = apenas_digitos(str(cnpj))
-        telefone = apenas_digitos(str(telefone))
-
-
-
-        # Cria objeto:
-
-        imobiliaria = ImobiliariaModel(
-            nome_fantasia=nome_fantasia,
-            razao_social=razao_social,
-            cnpj=cnpj,
-            telefone=telefone,
-            email=email,
-        )
-
-       
-        # Salva em BD
-        try:
-            db.session.add(imobiliaria)
-            db.session.commit()
-            message = f"Imobiliária criada com sucesso"
-            logging.debug(message)
-    
-        except IntegrityError as error:
-            message = f"400: Error ao criar imobiliaria: {error}"
-            logging.warning(message)
-            abort(
-                400,
-                message="Erro ao criar imobiliária.",
-            )
-        except SQLAlchemyError as error:
-            message = f"500: Error ao criar imobiliaria: {error}"
-            logging.warning(message)
-            abort(500, message="Server Error.")
-
-
-        imobiliaria_schema = ImobiliariaSchema()
-        result = imobiliaria_schema.dump(imobiliaria)
-
-        return jsonify(result)
-    
     @jwt_required_with_doc()
+    @blp.arguments(ImobiliariaFiltroSchema, location="query")
     @blp.response(200, ImobiliariaSchema)
-    def get(self,):
+    @em_cache(lambda cache: cache.chave_lista())
+    def get(self, filtros):
         """
             Lista todas as imobiliárias.
 
             **Descrição:** Busca e retorna todas as imobiliárias cadastradas no banco de dados.
+            Cada imobiliária traz os `imoveis_limit` primeiros imóveis, em ordem de ID (padrão 10),
+            e o total de imóveis em `imoveis_total`; os demais podem ser lidos, a partir do último
+            ID recebido, em GET /imobiliaria/<id>/imoveis.
+            Com `?stream=1` ou `Accept: application/x-ndjson`, envia as imobiliárias em NDJSON
+            (um objeto JSON por linha), à medida que são lidas.
+            A resposta JSON traz ETag e Last-Modified da versão do catálogo; se nada mudou desde a
+            versão enviada em If-None-Match ou If-Modified-Since, retorna 304 sem consultar as imobiliárias.
             Se ocorrer um erro durante a operação de banco de dados, retorna um erro 500.
 
+            **Parâmetros:**
+                filtros (dict): imoveis_limit.
+
             **Retorna:**
                 Uma lista de objetos JSON com as informações das imobiliárias.
         """
+        if streaming_solicitado():
+            return resposta_ndjson_objetos(serializar_imobiliarias(db.session, filtros["imoveis_limit"]))
+
+        return listar_imobiliarias(db.session, filtros)
+
+
+def editar_imobiliaria(session, imobiliaria_data, filtros, id):
+    """PUT /imobiliaria/<id>: atualiza a imobiliária e retorna a resposta no formato de GET /imobiliaria/<id>."""
+
+    imobiliaria = session.get(ImobiliariaModel, id)
+    if imobiliaria is None:
+        abort(404)
+
+    cnpj, telefone = validar_imobiliaria(imobiliaria_data)
+
+    imobiliaria.nome_fantasia=imobiliaria_data['nome_fantasia']
+    imobiliaria.razao_social=imobiliaria_data.get('razao_social')
+    imobiliaria.cnpj=cnpj
+    imobiliaria.telefone=telefone
+    imobiliaria.email=imobiliaria_data.get('email')
+
+    # Salva em BD
+    salvar(session, "editar imobiliaria", "Erro ao editar imobiliária.", MENSAGENS_UNICIDADE)
+    message = f"Imobiliária editada com sucesso"
+    logger.debug(message)
 
-        result_lista = []
-        imobiliarias = ImobiliariaModel().query.all()
+    result = next(serializar_imobiliarias(session, filtros["imoveis_limit"], imobiliaria_id=id))
+    return resposta_json(result)
+
+
+def buscar_imobiliaria(session, filtros, id):
+    """GET /imobiliaria/<id>: a imobiliária com os primeiros imóveis, com ETag e Last-Modified (ou 304)."""
+
+    versao = session.execute(
+        select(ImobiliariaModel.versao, ImobiliariaModel.atualizado_em)
+        .where(ImobiliariaModel.id == id)
+    ).first()
+    if versao is None:
+        abort(404)
+
+    # A resposta inclui os imóveis da imobiliária, cobertos pela versão do catálogo
+    limite_imoveis = filtros["imoveis_limit"]
+    versao_catalogo, atualizado_em_catalogo = obter_versao(session)
+    etag = gerar_etag("imobiliaria", id, versao.versao, versao_catalogo, limite_imoveis)
+    ultima_modificacao = max(filter(None, (versao.atualizado_em, atualizado_em_catalogo)))
+    if nao_modificado(etag, ultima_modificacao):
+        return resposta_nao_modificada(etag, ultima_modificacao)
+
+    result = next(serializar_imobiliarias(session, limite_imoveis, imobiliaria_id=id), None)
+    if result is None:
+        abort(404)
+    return com_validadores(resposta_json(result), etag, ultima_modificacao)
+
+
+def excluir_imobiliaria(session, id):
+    """DELETE /imobiliaria/<id>: exclui a imobiliária e os seus imóveis."""
+
+    imobiliaria = session.get(ImobiliariaModel, id)
+    if imobiliaria is None:
+        abort(404)
+    session.delete(imobiliaria)
+    salvar(session, "deletar imobiliaria", "Erro ao deletar imovel.")
+    message = f"Imobiliária excluída com sucesso"
+    logger.debug(message)
+
+    context = {"message": message}
+
+    return jsonify(context)
 
-        for imobiliaria in imobiliarias:
-            imobiliaria_schema = ImobiliariaSchema()
-            result = imobiliaria_schema.dump(imobiliaria)
-            result_lista.append(result)
 
-        return jsonify(result_lista)
-    
-    
 @blp.route("/imobiliaria/<int:id>")
 class ImobiliariaID(MethodView):
 
     @jwt_required_with_doc()
     @blp.arguments(PlainImobiliariaSchema)
+    @blp.arguments(ImobiliariaFiltroSchema, location="query")
     @blp.response(201, ImobiliariaSchema)
-    def put(self, imobiliaria_data, id):
+    def put(self, imobiliaria_data, filtros, id):
         """
         Atualiza uma imobiliária existente.
 
         **Descrição:** Recebe os dados de uma imobiliária existente e atualiza suas informações no banco de dados.
+        A resposta tem o formato de GET /imobiliaria/<id>, com os `imoveis_limit` primeiros imóveis
+        (padrão 10) e o total em `imoveis_total`.
+        Se o e-mail ou o CNPJ já pertencerem a outra imobiliária, ou forem inválidos, ou se a imobiliária
+        for alterada por outra requisição ao mesmo tempo, retorna um erro 409.
         Se ocorrer um erro durante a operação de banco de dados, retorna um erro 400 ou 500.
 
         **Parâmetros:**
             imobiliaria_data (dict): Os dados da imobiliária a ser atualizada.
+            filtros (dict): imoveis_limit.
             id (int): O ID da imobiliária a ser atualizada.
 
         **Retorna:**
             Um objeto JSON com as informações da imobiliária atualizada.
         """
+        return editar_imobiliaria(db.session, imobiliaria_data, filtros, id)
 
-        imobiliaria = ImobiliariaModel().query.get_or_404(id)
-
-        # Dados recebidos:
-        nome_fantasia = imobiliaria_data['nome_fantasia']
-        razao_social = imobiliaria_data.get('razao_social')
-        cnpj = imobiliaria_data.get('cnpj')
-        telefone = imobiliaria_data.get('telefone')
-        email = imobiliaria_data.get('email')
-
-
-        # validações:
-
-        if imobiliaria.email != email:
-            if ImobiliariaModel.query.filter(ImobiliariaModel.email == email).first():
-                message="E-mail já cadastrado"
-                logging.error(message)
-                abort(409, message=message)
-
-        if not validar_email(email):
-            message="E-mail inválido"
-            logging.error(message)
-            abort(409, message=message)
-        
-        if imobiliaria.cnpj != cnpj:
-            if ImobiliariaModel.query.filter(ImobiliariaModel.cnpj == cnpj).first():
-                message="CNPJ já cadastrado"
-                logging.error(message)
-                abort(409, message=message)
-
-        if not validar_cnpj(cnpj):
-            message="CNPJ inválido"
-            logging.error(message)
-            abort(409, message=message)
-        
-        if not validar_telefone(telefone):
-            message="Formato do telefone inválido"
-            logging.error(message)
-            abort(409, message=message)
-        
-        cnpj = apenas_digitos(str(cnpj))
-        telefone = apenas_digitos(str(telefone))
-
-
-
-        # Cria objeto:
-
-    
-        imobiliaria.nome_fantasia=nome_fantasia
-        imobiliaria.razao_social=razao_social
-        imobiliaria.cnpj=cnpj
-        imobiliaria.telefone=telefone
-        imobiliaria.email=email
-        
-
-        # Salva em BD
-        try:
-            db.session.add(imobiliaria)
-            db.session.commit()
-            message = f"Imobiliária editada com sucesso"
-            logging.debug(message)
-    
-        except IntegrityError as error:
-            message = f"400: Error ao editar imobiliaria: {error}"
-            logging.warning(message)
-            abort(
-                400,
-                message="Erro ao editar imobiliária.",
-            )
-        except SQLAlchemyError as error:
-            message = f"500: Error ao editar imobiliaria: {error}"
-            logging.warning(message)
-            abort(500, message="Server Error.")
-
-
-        imobiliaria_schema = ImobiliariaSchema()
-        result = imobiliaria_schema.dump(imobiliaria)
-
-        return jsonify(result)
-    
     @jwt_required_with_doc()
+    @blp.arguments(ImobiliariaFiltroSchema, location="query")
     @blp.response(200, ImobiliariaSchema)
-    def get(self, id):
+    # Só a resposta com o limite padrão fica no cache, na chave invalidada com a imobiliária
+    @em_cache(lambda cache, id: None if "imoveis_limit" in request.args else cache.chave_imobiliaria(id))
+    def get(self, filtros, id):
         """
             Busca uma imobiliária pelo seu ID.
 
-            **Descrição:** Busca a imobiliária pelo ID e retorna suas informações.
+            **Descrição:** Busca a imobiliária pelo ID e retorna suas informações, com os
+            `imoveis_limit` primeiros imóveis (padrão 10) e o total em `imoveis_total`, e com os
+            cabeçalhos ETag e Last-Modified. Se o cliente enviar If-None-Match ou If-Modified-Since
+            e nada tiver mudado, retorna 304 sem corpo, consultando apenas as versões da imobiliária
+            e do catálogo.
             Se ocorrer um erro durante a operação de banco de dados, retorna um erro 404 ou 500.
 
             **Parâmetros:**
                 id (int): O ID da imobiliária a ser buscada.
+                filtros (dict): imoveis_limit.
 
             **Retorna:**
                 Um objeto JSON com as informações da imobiliária.
         """
-        imobiliaria = ImobiliariaModel().query.get_or_404(id)
-        imobiliaria_schema = ImobiliariaSchema()
-        result = imobiliaria_schema.dump(imobiliaria)
-        return jsonify(result)
-    
+        return buscar_imobiliaria(db.session, filtros, id)
+
     @jwt_required_with_doc()
     def delete(self, id):
         """
@@ -272,26 +357,61 @@ class ImobiliariaID(MethodView):
         **Retorna:**
             Um objeto JSON com uma mensagem de confirmação.
         """
-        try:
-            imobiliaria = ImobiliariaModel().query.get_or_404(id)
-            db.session.delete(imobiliaria)
-            db.session.commit()
-            message = f"Imobiliária excluída com sucesso"
-            logging.debug(message)
-    
-        except IntegrityError as error:
-            message = f"Error delete imovel: {error}"
-            logging.warning(message)
-            abort(
-                400,
-                message="Erro ao deletar imovel."
-            )
-        except SQLAlchemyError as error:
-            message = f"Error delete imovel: {error}"
-            logging.warning(message)
-            abort(500, message="Server Error.")
-
-        context = {"message": message}
-
-        return jsonify(context)
-    
\ No newline at end of file
+        return excluir_imobiliaria(db.session, id)
+
+
+def listar_imoveis_imobiliaria(session, filtros, id):
+    """GET /imobiliaria/<id>/imoveis: uma página dos imóveis da imobiliária, com ETag e Last-Modified (ou 304)."""
+
+    cursor = filtros.pop("cursor")
+    limite = filtros.pop("limite")
+
+    # Busca pela chave primária, antes do 304: o ETag não identifica a imobiliária
+    imobiliaria = session.get(ImobiliariaModel, id)
+    if imobiliaria is None:
+        abort(404)
+
+    versao, ultima_modificacao = obter_versao(session)
+    etag = gerar_etag("imoveis_imobiliaria", versao, request.full_path)
+    if nao_modificado(etag, ultima_modificacao):
+        return resposta_nao_modificada(etag, ultima_modificacao)
+
+    # Consulta dinâmica do relacionamento, apenas com as colunas do serializador
+    query = imobiliaria.imoveis_query.with_entities(*SERIALIZADOR_IMOVEL.colunas)
+    query = filtrar_imoveis(query, filtros)
+    linhas, next_cursor = paginar_por_cursor(query, ImovelModel.id, cursor, limite)
+
+    result_lista = [SERIALIZADOR_IMOVEL.json(linha) for linha in linhas]
+    resposta = resposta_json({"imoveis": result_lista, "next_cursor": next_cursor})
+    return com_validadores(resposta, etag, ultima_modificacao)
+
+
+@blp.route("/imobiliaria/<int:id>/imoveis")
+class ImobiliariaImoveis(MethodView):
+
+    @jwt_required_with_doc()
+    @blp.arguments(ImovelFiltroSchema, location="query")
+    @blp.response(200, ImobiliariaImoveisSchema)
+    @em_cache(lambda cache, id: cache.chave_lista())
+    def get(self, filtros, id):
+        """
+        Lista os imóveis de uma imobiliária, paginados por cursor.
+
+        **Descrição:** Busca os imóveis da imobiliária que atendem aos filtros informados, em ordem
+        de ID, retornando no máximo `limite` registros por página. Para buscar a próxima página,
+        envie o `next_cursor` recebido no parâmetro `cursor`. Aceita os mesmos filtros da listagem
+        de imóveis; pelo índice (imobiliaria_id, id), o custo de cada página não depende da
+        quantidade de imóveis da imobiliária nem da profundidade da página.
+        A resposta traz ETag e Last-Modified da versão do catálogo; se nada mudou desde a versão
+        enviada em If-None-Match ou If-Modified-Since, retorna 304 sem consultar os imóveis.
+        Se a imobiliária não existir, retorna um erro 404, mesmo com um ETag válido.
+
+        **Parâmetros:**
+            id (int): O ID da imobiliária.
+            filtros (dict): cursor, limite e os filtros da listagem de imóveis.
+
+        **Retorna:**
+            Um objeto JSON com a lista de imóveis da página e o `next_cursor`
+            (nulo na última página).
+        """
+        return listar_imoveis_imobiliaria(db.session, filtros, id)
@@ -1,17 +1,136 @@
-import logging.handlers
-from flask import jsonify
+import logging
+import math
+from flask import current_app, jsonify, request, send_file
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
 from models.imobiliaria import ImobiliariaModel
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+from extensions.cache import em_cache, registrar_invalidacao
 from extensions.database import db
+from models.alteracao import (
+    INSERIDO, listar_alteracoes, registrar_alteracoes, sequencia_compactada, ultima_sequencia,
+)
+from models.estatistica_preco import consulta_estatisticas, registrar_imoveis, resumir_grupos
 from models.imovel import ImovelModel
-from schema import ImovelSchema, PlainImovelSchema, PlainImovelSchema
+from models.imovel_arquivado import ImovelArquivadoModel, obter_ou_restaurar
+from models.versao_colecao import incrementar_versao, obter_versao
+from marshmallow import ValidationError
+from schema import (
+    ImovelSchema, PlainImovelSchema, ImovelFiltroSchema, ImovelPaginaSchema, ImovelImportacaoSchema,
+    ImovelProximidadeSchema, ImovelProximidadeRespostaSchema, ImovelProximoSchema, ImovelCaixaSchema,
+    ImovelBuscaSchema, ImovelCatalogoSchema,
+    EstatisticaFiltroSchema, EstatisticasPrecoSchema, AlteracaoFiltroSchema, AlteracoesSchema,
+)
 from security import jwt_required_with_doc
+from utilities.alteracoes import itens_alteracoes
+from utilities.busca_texto import filtrar_busca, termos_busca
+from utilities.catalogo import catalogo_atual, nome_download
+from utilities.etag import com_validadores, gerar_etag, nao_modificado, resposta_nao_modificada
+from utilities.filtro_imovel import consulta_proximidade, filtrar_caixa, filtrar_imoveis
+from utilities.geo import celula, raios_busca
+from utilities.importacao import ErroLeitura, em_lotes, ler_linhas
+from utilities.paginacao import paginar_por_cursor
+from utilities.serializacao import SerializadorCompilado, resposta_json
+from utilities.streaming import resposta_ndjson, streaming_solicitado
+from utilities.transacao import salvar
 
 
 blp = Blueprint("Imovel", "imovel", description="Operações sobre imovel")
 
+logger = logging.getLogger(__name__)
+
+COLUNAS_IMPORTACAO = (
+    "aluguel", "venda", "tipo", "ativo", "valor_venda", "valor_aluguel",
+    "rua", "numero", "bairro", "cep", "cidade", "estado", "latitude", "longitude", "imobiliaria_id",
+)
+
+# Listagens: lê apenas as colunas do ImovelSchema e serializa sem o marshmallow
+SERIALIZADOR_IMOVEL = SerializadorCompilado(ImovelSchema(), ImovelModel)
+SERIALIZADOR_IMOVEL_PROXIMO = SerializadorCompilado(ImovelProximoSchema(), ImovelModel)
+
+# As funções abaixo das views recebem a sessão: as views as chamam com db.session
+# e o modo ASGI (asgi.py) com a sessão assíncrona, por run_sync.
+
+
+def criar_imovel(session, imovel_data):
+    """POST /imovel: cria o imóvel e retorna a resposta com ele."""
+
+    # Dados recebidos:
+
+    aluguel = imovel_data['aluguel']
+    venda = imovel_data.get('venda')
+    tipo = imovel_data.get('tipo')
+    ativo = imovel_data.get('ativo')
+    valor_venda = imovel_data.get('valor_venda')
+    valor_aluguel = imovel_data.get('valor_aluguel')
+    rua = imovel_data.get('rua')
+    numero = imovel_data.get('numero')
+    bairro = imovel_data.get('bairro')
+    cep = imovel_data.get('cep')
+    cidade = imovel_data.get('cidade')
+    estado = imovel_data.get('estado')
+    latitude = imovel_data.get('latitude')
+    longitude = imovel_data.get('longitude')
+    imobiliaria_id = imovel_data.get('imobiliaria_id')
+
+
+    imobiliaria = session.get(ImobiliariaModel, imobiliaria_id)
+    if imobiliaria is None:
+        abort(404)
+    # Cria objeto:
+
+    imovel = ImovelModel(
+        aluguel=aluguel,
+        venda=venda,
+        tipo=tipo,
+        ativo=ativo,
+        valor_venda=valor_venda,
+        valor_aluguel=valor_aluguel,
+        rua=rua,
+        numero=numero,
+        bairro=bairro,
+        cep=cep,
+        cidade=cidade,
+        estado=estado,
+        latitude=latitude,
+        longitude=longitude,
+        imobiliaria=imobiliaria,
+    )
+
+
+    # Salva em BD
+    session.add(imovel)
+    salvar(session, "criar imovel", "Erro ao criar imovel.")
+    message = f"Imóvel criada com sucesso"
+    logger.debug(message)
+
+    imovel_schema = ImovelSchema()
+    result = imovel_schema.dump(imovel)
+
+    return jsonify(result)
+
+
+def listar_imoveis(session, filtros):
+    """GET /imovel em JSON: uma página de imóveis, com ETag e Last-Modified (ou 304)."""
+
+    cursor = filtros.pop("cursor")
+    limite = filtros.pop("limite")
+
+    versao, ultima_modificacao = obter_versao(session)
+    etag = gerar_etag("imoveis", versao, request.full_path)
+    if nao_modificado(etag, ultima_modificacao):
+        return resposta_nao_modificada(etag, ultima_modificacao)
+
+    query = filtrar_imoveis(SERIALIZADOR_IMOVEL.consulta(session), filtros)
+    linhas, next_cursor = paginar_por_cursor(query, ImovelModel.id, cursor, limite)
+
+    result_lista = [SERIALIZADOR_IMOVEL.json(linha) for linha in linhas]
+
+    resposta = resposta_json({"imoveis": result_lista, "next_cursor": next_cursor})
+    return com_validadores(resposta, etag, ultima_modificacao)
+
 
 @blp.route("/imovel")
 class Imovel(MethodView):
@@ -32,92 +151,539 @@ class Imovel(MethodView):
         **Retorna:**
             Um objeto JSON com as informações do imóvel criado.
         """
+        return criar_imovel(db.session, imovel_data)
+
+    @jwt_required_with_doc()
+    @blp.arguments(ImovelFiltroSchema, location="query")
+    @blp.response(200, ImovelPaginaSchema)
+    @em_cache(lambda cache: cache.chave_lista())
+    def get(self, filtros):
+        """
+        Lista os imóveis, paginados por cursor.
+
+        **Descrição:** Busca os imóveis que atendem aos filtros informados, em ordem de ID,
+        retornando no máximo `limite` registros por página. Para buscar a próxima página,
+        envie o `next_cursor` recebido no parâmetro `cursor`.
+        Com `?stream=1` ou `Accept: application/x-ndjson`, ignora o `limite` e envia todos os
+        imóveis a partir do cursor em NDJSON (um objeto JSON por linha), à medida que são lidos.
+        A resposta JSON traz ETag e Last-Modified da versão do catálogo; se nada mudou desde a
+        versão enviada em If-None-Match ou If-Modified-Since, retorna 304 sem consultar os imóveis.
+        Se ocorrer um erro durante a operação de banco de dados, retorna um erro 500.
+
+        **Parâmetros:**
+            filtros (dict): cursor, limite, cidade, bairro, estado, tipo, ativo, aluguel, venda,
+            valor_venda_min, valor_venda_max, valor_aluguel_min e valor_aluguel_max.
 
-        # Dados recebidos:
-        
-        aluguel = imovel_data['aluguel']
-        venda = imovel_data.get('venda')
-        tipo = imovel_data.get('tipo')
-        ativo = imovel_data.get('ativo')
-        valor_venda = imovel_data.get('valor_venda')
-        valor_aluguel = imovel_data.get('valor_aluguel')
-        rua = imovel_data.get('rua')
-        numero = imovel_data.get('numero')
-        bairro = imovel_data.get('bairro')
-        cep = imovel_data.get('cep')
-        cidade = imovel_data.get('cidade')
-        estado = imovel_data.get('estado')
-        imobiliaria_id = imovel_data.get('imobiliaria_id')
-
-
-        imobiliaria = ImobiliariaModel().query.get_or_404(imobiliaria_id)
-        # Cria objeto:
-
-        imovel = ImovelModel(
-            aluguel=aluguel,
-            venda=venda,
-            tipo=tipo,
-            ativo=ativo,
-            valor_venda=valor_venda,
-            valor_aluguel=valor_aluguel,
-            rua=rua,
-            numero=numero,
-            bairro=bairro,
-            cep=cep,
-            cidade=cidade,
-            estado=estado,
-            imobiliaria=imobiliaria,
+        **Retorna:**
+            Um objeto JSON com a lista de imóveis da página e o `next_cursor`
+            (nulo na última página).
+        """
+        if streaming_solicitado():
+            cursor = filtros.pop("cursor")
+            filtros.pop("limite")
+            query = filtrar_imoveis(SERIALIZADOR_IMOVEL.consulta(db.session), filtros)
+            if cursor is not None:
+                query = query.filter(ImovelModel.id > cursor)
+            return resposta_ndjson(query.order_by(ImovelModel.id), SERIALIZADOR_IMOVEL)
+
+        return listar_imoveis(db.session, filtros)
+
+
+def importar_imoveis(session):
+    """POST /imovel/bulk: importa o corpo da requisição, em lotes com um commit cada."""
+
+    formatos = {"text/csv": "csv", "application/x-ndjson": "ndjson"}
+    formato = formatos.get(request.mimetype)
+    if formato is None:
+        abort(415, message="Envie o corpo como text/csv ou application/x-ndjson.")
+
+    tamanho_lote = request.args.get("lote", 1000, type=int)
+    if tamanho_lote < 1:
+        abort(400, message="O tamanho do lote deve ser maior que zero.")
+    # Um lote é lido e validado inteiro em memória e inserido numa única transação
+    lote_maximo = current_app.config["IMPORTACAO_LOTE_MAXIMO"]
+    if tamanho_lote > lote_maximo:
+        abort(400, message=f"O tamanho do lote deve ser no máximo {lote_maximo}.")
+
+    imovel_schema = PlainImovelSchema()
+    imobiliarias_existentes = set()
+    inseridos = 0
+    erros = []
+
+    try:
+        for lote in em_lotes(ler_linhas(request.stream, formato), tamanho_lote):
+
+            # Validações:
+
+            validos = []
+            for numero_linha, dados in lote:
+                if dados is None:
+                    erros.append({"linha": numero_linha, "erros": {"_linha": ["Linha mal formatada."]}})
+                    continue
+                try:
+                    imovel_data = imovel_schema.load(dados)
+                except ValidationError as error:
+                    erros.append({"linha": numero_linha, "erros": error.messages})
+                    continue
+                validos.append((numero_linha, imovel_data))
+
+            ids_novos = {imovel_data["imobiliaria_id"] for _, imovel_data in validos} - imobiliarias_existentes
+            if ids_novos:
+                imobiliarias_existentes.update(session.scalars(
+                    select(ImobiliariaModel.id).where(ImobiliariaModel.id.in_(ids_novos))
+                ))
+
+            linhas = []
+            numeros_linha = []
+            for numero_linha, imovel_data in validos:
+                if imovel_data["imobiliaria_id"] not in imobiliarias_existentes:
+                    erros.append({"linha": numero_linha, "erros": {"imobiliaria_id": ["Imobiliária não encontrada."]}})
+                    continue
+                linha = {coluna: imovel_data.get(coluna) for coluna in COLUNAS_IMPORTACAO}
+                # O insert em lote não passa pelos eventos do ORM que calculam a célula
+                linha["geocelula"] = celula(linha["latitude"], linha["longitude"])
+                linhas.append(linha)
+                numeros_linha.append(numero_linha)
+
+            if not linhas:
+                continue
+
+            # Salva em BD
+            try:
+                ids = session.scalars(insert(ImovelModel).returning(ImovelModel.id), linhas).all()
+                registrar_imoveis(session.connection(), linhas)
+                incrementar_versao(session.connection())
+                # Depois da versão, como no after_flush: as sequências seguem a ordem dos commits
+                registrar_alteracoes(session.connection(), "imovel", sorted(ids), INSERIDO)
+                registrar_invalidacao(session, imobiliarias={linha["imobiliaria_id"] for linha in linhas})
+                session.commit()
+                inseridos += len(linhas)
+
+            except SQLAlchemyError as error:
+                session.rollback()
+                message = f"Error ao importar lote de imoveis: {error}"
+                logger.warning(message)
+                for numero_linha in numeros_linha:
+                    erros.append({"linha": numero_linha, "erros": {"_lote": ["Erro ao inserir o lote desta linha."]}})
+
+    except ErroLeitura as error:
+        # Os lotes anteriores ao erro já foram salvos; o lote em andamento, não
+        message = f"Importação de imóveis interrompida na {error}"
+        logger.warning(message)
+        abort(
+            422,
+            message=f"Não foi possível ler a linha {error.numero_linha}: {error.motivo} "
+            f"Os lotes anteriores, com {inseridos} imóveis, foram inseridos.",
         )
 
-       
-        # Salva em BD
-        try:
-            db.session.add(imovel)
-            db.session.commit()
-            message = f"Imóvel criada com sucesso"
-            logging.debug(message)
-    
-        except IntegrityError as error:
-            message = f"400: Error ao criar imovel: {error}"
-            logging.warning(message)
-            abort(
-                400,
-                message="Erro ao criar imovel.",
-            )
-        except SQLAlchemyError as error:
-            message = f"500: Error ao criar imovel: {error}"
-            logging.warning(message)
-            abort(500, message="Server Error.")
+    message = f"Importação de imóveis: {inseridos} inseridos, {len(erros)} rejeitados"
+    logger.debug(message)
+
+    return jsonify({"inseridos": inseridos, "rejeitados": len(erros), "erros": erros})
 
 
-        imovel_schema = ImovelSchema()
-        result = imovel_schema.dump(imovel)
+@blp.route("/imovel/bulk")
+class ImovelBulk(MethodView):
 
-        return jsonify(result)
-    
     @jwt_required_with_doc()
-    @blp.response(200, ImovelSchema)
-    def get(self,):
+    @blp.response(200, ImovelImportacaoSchema)
+    def post(self):
+        """
+        Importa imóveis em lote.
+
+        **Descrição:** Recebe um corpo CSV (`Content-Type: text/csv`, com cabeçalho) ou NDJSON
+        (`Content-Type: application/x-ndjson`, um objeto JSON por linha) com os mesmos campos do
+        cadastro de imóvel. O corpo é lido à medida que chega e processado em lotes de `lote`
+        linhas (padrão 1000, no máximo IMPORTACAO_LOTE_MAXIMO, padrão 10000): cada linha é validada, as imobiliárias referenciadas pelo lote são
+        buscadas em uma única consulta e as linhas válidas são inseridas em uma única transação
+        por lote. Linhas inválidas não impedem a importação das demais.
+        Se o corpo não estiver em UTF-8 ou o CSV não puder ser lido, a importação é interrompida
+        com um erro 422 que indica a linha; os lotes anteriores a ela continuam inseridos.
+
+        **Parâmetros:**
+            lote (int): quantidade de linhas por transação.
+
+        **Retorna:**
+            Um objeto JSON com a quantidade de imóveis inseridos e rejeitados e a lista de erros
+            por linha.
+        """
+        return importar_imoveis(db.session)
+
+
+def listar_imoveis_proximos(session, filtros):
+    """GET /imovel/near: os imóveis mais próximos do ponto, com a distância."""
+
+    latitude = filtros.pop("lat")
+    longitude = filtros.pop("lon")
+    raio = filtros.pop("raio")
+    limite = filtros.pop("limite")
+
+    for raio_busca in raios_busca(raio):
+        linhas = consulta_proximidade(
+            latitude, longitude, raio_busca, filtros, limite, SERIALIZADOR_IMOVEL_PROXIMO.consulta(session)
+        ).all()
+        if len(linhas) >= limite:
+            break
+
+    # A distância ao quadrado é a última coluna da linha
+    result_lista = [
+        SERIALIZADOR_IMOVEL_PROXIMO.json(linha, distancia_m=round(math.sqrt(linha[-1]), 1)) for linha in linhas
+    ]
+
+    return resposta_json({"imoveis": result_lista})
+
+
+@blp.route("/imovel/near")
+class ImovelProximidade(MethodView):
+
+    @jwt_required_with_doc()
+    @blp.arguments(ImovelProximidadeSchema, location="query")
+    @blp.response(200, ImovelProximidadeRespostaSchema)
+    @em_cache(lambda cache: cache.chave_lista())
+    def get(self, filtros):
+        """
+        Lista os imóveis próximos de um ponto.
+
+        **Descrição:** Busca os imóveis a até `raio` metros (padrão 2000, máximo 50000) do ponto
+        `lat`/`lon`, do mais próximo para o mais distante, retornando no máximo `limite` registros.
+        A consulta lê apenas as células da grade geográfica que cobrem o círculo (índice
+        ix_imovel_geocelula). Imóveis sem coordenadas não aparecem. Aceita os mesmos filtros
+        da listagem de imóveis.
+        Se ocorrer um erro durante a operação de banco de dados, retorna um erro 500.
+
+        **Parâmetros:**
+            filtros (dict): lat, lon, raio, limite e os filtros da listagem de imóveis.
+
+        **Retorna:**
+            Um objeto JSON com a lista de imóveis, cada um com a `distancia_m` até o ponto.
+        """
+        return listar_imoveis_proximos(db.session, filtros)
+
+
+def listar_imoveis_caixa(session, filtros):
+    """GET /imovel/bbox: uma página dos imóveis dentro do retângulo."""
+
+    cursor = filtros.pop("cursor")
+    limite = filtros.pop("limite")
+    caixa = [filtros.pop(campo) for campo in ("min_lat", "min_lon", "max_lat", "max_lon")]
+
+    # Os IDs candidatos vêm do índice da grade em uma subconsulta: com o filtro direto e
+    # ORDER BY id LIMIT, o planejador pode preferir percorrer a tabela inteira pela chave
+    # primária, o que é lento quando o retângulo tem poucos imóveis
+    candidatos = filtrar_caixa(select(ImovelModel.id), *caixa)
+    query = SERIALIZADOR_IMOVEL.consulta(session).filter(ImovelModel.id.in_(candidatos))
+    query = filtrar_imoveis(query, filtros)
+    linhas, next_cursor = paginar_por_cursor(query, ImovelModel.id, cursor, limite)
+
+    result_lista = [SERIALIZADOR_IMOVEL.json(linha) for linha in linhas]
+    return resposta_json({"imoveis": result_lista, "next_cursor": next_cursor})
+
+
+@blp.route("/imovel/bbox")
+class ImovelCaixa(MethodView):
+
+    @jwt_required_with_doc()
+    @blp.arguments(ImovelCaixaSchema, location="query")
+    @blp.response(200, ImovelPaginaSchema)
+    @em_cache(lambda cache: cache.chave_lista())
+    def get(self, filtros):
+        """
+        Lista os imóveis dentro de um retângulo, paginados por cursor.
+
+        **Descrição:** Busca os imóveis com latitude entre `min_lat` e `max_lat` e longitude entre
+        `min_lon` e `max_lon` (no máximo 1 grau de lado), em ordem de ID, lendo apenas as células
+        da grade geográfica que cobrem o retângulo. Aceita os mesmos filtros e a mesma paginação
+        da listagem de imóveis.
+        Se ocorrer um erro durante a operação de banco de dados, retorna um erro 500.
+
+        **Parâmetros:**
+            filtros (dict): min_lat, min_lon, max_lat, max_lon, cursor, limite e os filtros da
+            listagem de imóveis.
+
+        **Retorna:**
+            Um objeto JSON com a lista de imóveis da página e o `next_cursor`
+            (nulo na última página).
+        """
+        return listar_imoveis_caixa(db.session, filtros)
+
+
+def buscar_imoveis(session, filtros):
+    """GET /imovel/busca: uma página dos imóveis encontrados, do mais para o menos relevante."""
+
+    termos = termos_busca(filtros.pop("q"))
+    cursor = filtros.pop("cursor") or 0
+    limite = filtros.pop("limite")
+    if not termos:
+        return jsonify({"imoveis": [], "next_cursor": None})
+
+    query = SERIALIZADOR_IMOVEL.consulta(session)
+    query, relevancia = filtrar_busca(query, termos, session.get_bind().dialect.name)
+    query = filtrar_imoveis(query, filtros)
+    # O cursor é a posição na ordem de relevância
+    linhas = query.order_by(relevancia, ImovelModel.id).offset(cursor).limit(limite + 1).all()
+
+    next_cursor = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        next_cursor = cursor + limite
+
+    result_lista = [SERIALIZADOR_IMOVEL.json(linha) for linha in linhas]
+    return resposta_json({"imoveis": result_lista, "next_cursor": next_cursor})
+
+
+@blp.route("/imovel/busca")
+class ImovelBusca(MethodView):
+
+    @jwt_required_with_doc()
+    @blp.arguments(ImovelBuscaSchema, location="query")
+    @blp.response(200, ImovelPaginaSchema)
+    @em_cache(lambda cache: cache.chave_lista())
+    def get(self, filtros):
+        """
+        Busca imóveis pelo endereço.
+
+        **Descrição:** Busca os imóveis cuja rua, número, bairro e cidade contêm todas as palavras
+        de `q`, sem diferenciar acentos e maiúsculas, cada palavra como início de uma palavra do
+        endereço ("av paulista 10" encontra "Avenida Paulista, 1000"). Usa o índice de busca
+        textual do banco (FTS5 no SQLite, tsvector no PostgreSQL) e ordena os imóveis do mais
+        para o menos relevante. Para buscar a próxima página, envie o `next_cursor` recebido
+        no parâmetro `cursor`. Aceita os mesmos filtros da listagem de imóveis.
+        Se ocorrer um erro durante a operação de banco de dados, retorna um erro 500.
+
+        **Parâmetros:**
+            filtros (dict): q, cursor, limite e os filtros da listagem de imóveis.
+
+        **Retorna:**
+            Um objeto JSON com a lista de imóveis da página e o `next_cursor`
+            (nulo na última página).
+        """
+        return buscar_imoveis(db.session, filtros)
+
+
+@blp.route("/imovel/catalogo")
+class ImovelCatalogo(MethodView):
+
+    @jwt_required_with_doc()
+    @blp.arguments(ImovelCatalogoSchema, location="query")
+    @blp.response(200, content_type="application/gzip")
+    def get(self, parametros):
+        """
+        Baixa o catálogo completo de imóveis ativos.
+
+        **Descrição:** Envia o arquivo mais recente gerado pelo comando "flask exportar-catalogo",
+        comprimido com gzip: NDJSON (padrão, um imóvel por linha no formato da listagem) ou CSV
+        (`formato=csv`). O arquivo é enviado do disco, sem consultar o banco; aceita Range
+        (download em partes ou retomado) e If-None-Match/If-Modified-Since, e o Last-Modified é
+        a data da geração. Com USE_X_SENDFILE=1, o envio fica com o servidor web (X-Sendfile).
+        Se o catálogo ainda não foi gerado, retorna um erro 404.
+
+        **Parâmetros:**
+            parametros (dict): formato ("ndjson" ou "csv").
+
+        **Retorna:**
+            O arquivo do catálogo (application/gzip).
+        """
+        formato = parametros["formato"]
+        caminho = catalogo_atual(current_app.config["CATALOGO_DIRETORIO"], formato)
+        if caminho is None:
+            abort(404, message="O catálogo ainda não foi gerado.")
+
+        return send_file(
+            caminho, mimetype="application/gzip", as_attachment=True, download_name=nome_download(formato),
+        )
+
+
+def alteracoes_imoveis(session, filtros):
+    """GET /imovel/changes: as alterações posteriores a `since`, com os dados atuais."""
+
+    desde = filtros["since"]
+    limite = filtros["limite"]
+    if desde is None:
+        return resposta_json({"alteracoes": [], "next_since": ultima_sequencia(session), "tem_mais": False})
+    if desde < sequencia_compactada(session):
+        abort(410, message="As alterações desde esta sequência foram compactadas. Baixe o catálogo completo.")
+
+    alteracoes = listar_alteracoes(session, desde, limite + 1)
+    tem_mais = len(alteracoes) > limite
+    alteracoes = alteracoes[:limite]
+    result_lista = itens_alteracoes(session, alteracoes)
+
+    next_since = alteracoes[-1].seq if alteracoes else desde
+    return resposta_json({"alteracoes": result_lista, "next_since": next_since, "tem_mais": tem_mais})
+
+
+@blp.route("/imovel/changes")
+class ImovelAlteracoes(MethodView):
+
+    @jwt_required_with_doc()
+    @blp.arguments(AlteracaoFiltroSchema, location="query")
+    @blp.response(200, AlteracoesSchema)
+    @em_cache(lambda cache: cache.chave_lista())
+    def get(self, filtros):
+        """
+        Lista as alterações de imóveis e imobiliárias desde uma sequência.
+
+        **Descrição:** Para manter uma cópia do catálogo sem baixá-lo de novo: retorna, em ordem,
+        até `limite` alterações (padrão 500) com sequência maior que `since`, cada uma com a
+        `entidade` ("imovel" ou "imobiliaria"), o `id`, a `operacao` ("inserido", "alterado",
+        "excluido" ou "arquivado") e os `dados` atuais do registro (nulos na exclusão e no
+        arquivamento, ou se o registro foi excluído depois). Um imóvel arquivado sai das
+        listagens, mas continua disponível em GET /imovel/<id>. Envie o `next_since` recebido no próximo `since`; `tem_mais` indica
+        que há mais alterações. Sem `since`, retorna só a sequência atual, para começar a
+        acompanhar as alterações antes de baixar o catálogo completo. Se as exclusões posteriores
+        a `since` já foram removidas pela compactação, retorna um erro 410: baixe o catálogo
+        completo de novo.
+
+        **Parâmetros:**
+            filtros (dict): since e limite.
+
+        **Retorna:**
+            Um objeto JSON com a lista de alterações, o `next_since` e o `tem_mais`.
         """
-        Lista todos os imóveis.
+        return alteracoes_imoveis(db.session, filtros)
+
+
+def estatisticas_imoveis(session, filtros):
+    """GET /imovel/estatisticas: as estatísticas de preço de cada grupo."""
+
+    agrupar = filtros.pop("agrupar")
+    linhas = session.execute(consulta_estatisticas(filtros, agrupar))
+    return jsonify({"grupos": resumir_grupos(linhas, agrupar)})
 
-        **Descrição:** Busca e retorna todos os imóveis cadastrados no banco de dados.
+
+@blp.route("/imovel/estatisticas")
+class ImovelEstatisticas(MethodView):
+
+    @jwt_required_with_doc()
+    @blp.arguments(EstatisticaFiltroSchema, location="query")
+    @blp.response(200, EstatisticasPrecoSchema)
+    @em_cache(lambda cache: cache.chave_lista())
+    def get(self, filtros):
+        """
+        Estatísticas de preço dos imóveis ativos por região e tipo.
+
+        **Descrição:** Retorna, para cada grupo, a quantidade, a média, o desvio padrão e os
+        quartis (p25, mediana e p75) do valor de venda e do valor de aluguel dos imóveis ativos.
+        Os grupos são formados pelos campos de `agrupar` (padrão: estado, cidade, bairro e tipo;
+        repita o parâmetro para informar mais de um). Lê apenas a tabela de estatísticas, mantida
+        a cada alteração de imóvel, sem percorrer os imóveis. Média e desvio padrão são exatos;
+        cada quartil é a média dos valores da sua faixa do histograma (erro relativo de até 4%).
         Se ocorrer um erro durante a operação de banco de dados, retorna um erro 500.
 
+        **Parâmetros:**
+            filtros (dict): estado, cidade, bairro, tipo e agrupar.
+
         **Retorna:**
-            Uma lista de objetos JSON com as informações dos imóveis.
+            Um objeto JSON com a lista de grupos e suas estatísticas.
         """
-        result_lista = []
-        imoveis = ImovelModel().query.all()
+        return estatisticas_imoveis(db.session, filtros)
+
+
+def editar_imovel(session, imovel_data, id):
+    """PUT /imovel/<id>: atualiza o imóvel (restaurando-o do arquivo) e retorna a resposta com ele."""
+
+    imovel = obter_ou_restaurar(session, id)
+    if imovel is None:
+        abort(404)
+
+    # Dados recebidos:
+    aluguel = imovel_data['aluguel']
+    venda = imovel_data.get('venda')
+    tipo = imovel_data.get('tipo')
+    ativo = imovel_data.get('ativo')
+    valor_venda = imovel_data.get('valor_venda')
+    valor_aluguel = imovel_data.get('valor_aluguel')
+    rua = imovel_data.get('rua')
+    numero = imovel_data.get('numero')
+    bairro = imovel_data.get('bairro')
+    cep = imovel_data.get('cep')
+    cidade = imovel_data.get('cidade')
+    estado = imovel_data.get('estado')
+
+
+
+    # Cria objeto:
+
+    imovel.aluguel=aluguel
+    imovel.venda=venda
+    imovel.tipo=tipo
+    imovel.ativo=ativo
+    imovel.valor_venda=valor_venda
+    imovel.valor_aluguel=valor_aluguel
+    imovel.rua=rua
+    imovel.numero=numero
+    imovel.bairro=bairro
+    imovel.cep=cep
+    imovel.cidade=cidade
+    imovel.estado=estado
+    # Coordenadas ausentes no corpo mantêm as atuais (ex.: preenchidas pelo CEP)
+    if 'latitude' in imovel_data:
+        imovel.latitude = imovel_data['latitude']
+    if 'longitude' in imovel_data:
+        imovel.longitude = imovel_data['longitude']
+
+
+    # Salva em BD
+    salvar(session, "editar imovel", "Erro ao editar imóvel.")
+    message = f"Imóvel editado com sucesso"
+    logger.debug(message)
+
+    imovel_schema = ImovelSchema()
+    result = imovel_schema.dump(imovel)
+
+    return jsonify(result)
+
+
+def buscar_imovel(session, id):
+    """GET /imovel/<id>: o imóvel, em uso ou arquivado, com ETag e Last-Modified (ou 304)."""
+
+    # Procura primeiro nos imóveis em uso e depois no arquivo
+    for modelo in (ImovelModel, ImovelArquivadoModel):
+        versao = session.execute(
+            select(
+                modelo.versao,
+                modelo.atualizado_em,
+                ImobiliariaModel.versao.label("versao_imobiliaria"),
+                ImobiliariaModel.atualizado_em.label("atualizado_em_imobiliaria"),
+            )
+            .join(modelo.imobiliaria)
+            .where(modelo.id == id)
+        ).first()
+        if versao is not None:
+            break
+    else:
+        abort(404)
+
+    # A resposta inclui a imobiliária, então a versão dela também compõe o ETag
+    etag = gerar_etag("imovel", id, versao.versao, versao.versao_imobiliaria)
+    ultima_modificacao = max(versao.atualizado_em, versao.atualizado_em_imobiliaria)
+    if nao_modificado(etag, ultima_modificacao):
+        return resposta_nao_modificada(etag, ultima_modificacao)
+
+    imovel = session.get(modelo, id, options=[joinedload(modelo.imobiliaria)])
+    if imovel is None:
+        abort(404)
+    imovel_schema = ImovelSchema()
+    result = imovel_schema.dump(imovel)
+    return com_validadores(jsonify(result), etag, ultima_modificacao)
+
+
+def excluir_imovel(session, id):
+    """DELETE /imovel/<id>: exclui o imóvel, em uso ou arquivado."""
+
+    imovel = obter_ou_restaurar(session, id)
+    if imovel is None:
+        abort(404)
+    session.delete(imovel)
+    salvar(session, "deletar imovel", "Erro ao deletar empresa.")
+    message = f"Imóvel excluído com sucesso"
+    logger.debug(message)
+
+    context = {"message": message}
+
+    return jsonify(context)
 
-        for imovel in imoveis:
-            imovel_schema = ImovelSchema()
-            result = imovel_schema.dump(imovel)
-            result_lista.append(result)
 
-        return jsonify(result_lista)
-    
-    
 @blp.route("/imovel/<int:id>")
 class ImovelID(MethodView):
 
@@ -129,6 +695,8 @@ class ImovelID(MethodView):
         Atualiza um imóvel existente.
 
         **Descrição:** Recebe os dados de um imóvel existente e atualiza suas informações no banco de dados.
+        Um imóvel arquivado volta para as listagens.
+        Se o imóvel for alterado por outra requisição ao mesmo tempo, retorna um erro 409.
         Se ocorrer um erro durante a operação de banco de dados, retorna um erro 400 ou 500.
 
         **Parâmetros:**
@@ -138,73 +706,19 @@ class ImovelID(MethodView):
         **Retorna:**
             Um objeto JSON com as informações do imóvel atualizado.
         """
+        return editar_imovel(db.session, imovel_data, id)
 
-        imovel = ImovelModel().query.get_or_404(id)
-
-        # Dados recebidos:
-        aluguel = imovel_data['aluguel']
-        venda = imovel_data.get('venda')
-        tipo = imovel_data.get('tipo')
-        ativo = imovel_data.get('ativo')
-        valor_venda = imovel_data.get('valor_venda')
-        valor_aluguel = imovel_data.get('valor_aluguel')
-        rua = imovel_data.get('rua')
-        numero = imovel_data.get('numero')
-        bairro = imovel_data.get('bairro')
-        cep = imovel_data.get('cep')
-        cidade = imovel_data.get('cidade')
-        estado = imovel_data.get('estado')
-
-
-
-        # Cria objeto:
-    
-        imovel.aluguel=aluguel
-        imovel.venda=venda
-        imovel.tipo=tipo
-        imovel.ativo=ativo
-        imovel.valor_venda=valor_venda
-        imovel.valor_aluguel=valor_aluguel
-        imovel.rua=rua
-        imovel.numero=numero
-        imovel.bairro=bairro
-        imovel.cep=cep
-        imovel.cidade=cidade
-        imovel.estado=estado
-        
-
-        # Salva em BD
-        try:
-            db.session.add(imovel)
-            db.session.commit()
-            message = f"Imóvel editado com sucesso"
-            logging.debug(message)
-    
-        except IntegrityError as error:
-            message = f"400: Error ao editar imovel: {error}"
-            logging.warning(message)
-            abort(
-                400,
-                message="Erro ao editar imóvel.",
-            )
-        except SQLAlchemyError as error:
-            message = f"500: Error ao editar imovel: {error}"
-            logging.warning(message)
-            abort(500, message="Server Error.")
-
-
-        imovel_schema = ImovelSchema()
-        result = imovel_schema.dump(imovel)
-
-        return jsonify(result)
-    
     @jwt_required_with_doc()
     @blp.response(200, ImovelSchema)
+    @em_cache(lambda cache, id: cache.chave_imovel(id))
     def get(self, id):
         """
         Busca um imóvel pelo seu ID.
 
-        **Descrição:** Busca o imóvel pelo ID e retorna suas informações.
+        **Descrição:** Busca o imóvel pelo ID e retorna suas informações, com os cabeçalhos
+        ETag e Last-Modified. Se o cliente enviar If-None-Match ou If-Modified-Since e o imóvel
+        não tiver mudado, retorna 304 sem corpo, consultando apenas a versão do registro.
+        Imóveis inativos arquivados, que não aparecem mais nas listagens, também são encontrados.
         Se ocorrer um erro durante a operação de banco de dados, retorna um erro 404 ou 500.
 
         **Parâmetros:**
@@ -213,17 +727,15 @@ class ImovelID(MethodView):
         **Retorna:**
             Um objeto JSON com as informações do imóvel.
         """
-        imovel = ImovelModel().query.get_or_404(id)
-        imovel_schema = ImovelSchema()
-        result = imovel_schema.dump(imovel)
-        return jsonify(result)
-    
+        return buscar_imovel(db.session, id)
+
     @jwt_required_with_doc()
     def delete(self, id):
         """
             Deleta um imóvel pelo seu ID.
 
-            **Descrição:** Remove o imóvel com o ID especificado do banco de dados.
+            **Descrição:** Remove o imóvel com o ID especificado do banco de dados, inclusive se
+            estiver arquivado.
             Se ocorrer um erro durante a operação de banco de dados, retorna um erro 400 ou 500.
 
             **Parâmetros:**
@@ -232,28 +744,4 @@ class ImovelID(MethodView):
             **Retorna:**
                 Um objeto JSON com uma mensagem de confirmação.
         """
-        
-        
-        try:
-            imovel = ImovelModel().query.get_or_404(id)
-            db.session.delete(imovel)
-            db.session.commit()
-            message = f"Imóvel excluído com sucesso"
-            logging.debug(message)
-    
-        except IntegrityError as error:
-            message = f"Error delete imovel: {error}"
-            logging.warning(message)
-            abort(
-                400,
-                message="Erro ao deletar empresa."
-            )
-        except SQLAlchemyError as error:
-            message = f"Error delete empresa: {error}"
-            logging.warning(message)
-            abort(500, message="Server Error.")
-
-        context = {"message": message}
-
-        return jsonify(context)
-    
\ No newline at end of file
+        return excluir_imovel(db.session, id)
@@ -0,0 +1,75 @@
+import os
+
+from flask import Response, current_app
+from flask.views import MethodView
+from flask_smorest import Blueprint, abort
+
+from extensions.cache import obter_cache
+from extensions.database import db
+from extensions.metricas import exportar_metricas
+from extensions.pool import estatisticas_pool
+from security import jwt_required_with_doc
+
+blp = Blueprint("Monitoramento", "monitoramento", description="Métricas de funcionamento da API")
+
+
+@blp.route("/monitoramento/cache")
+class MonitoramentoCache(MethodView):
+
+    @jwt_required_with_doc()
+    def get(self):
+        """
+        Estatísticas do cache de respostas.
+
+        **Descrição:** Retorna os contadores de acertos, falhas e invalidações do cache de
+        respostas deste processo e, no backend em memória, a ocupação em entradas e bytes.
+
+        **Retorna:**
+            Um objeto JSON com as estatísticas, ou com `ativo` falso se o cache estiver desligado.
+        """
+        cache = obter_cache()
+        if cache is None:
+            return {"ativo": False}
+        return {"ativo": True, **cache.estatisticas()}
+
+
+@blp.route("/monitoramento/pool")
+class MonitoramentoPool(MethodView):
+
+    @jwt_required_with_doc()
+    def get(self):
+        """
+        Estatísticas do pool de conexões com o banco.
+
+        **Descrição:** Retorna, para cada engine deste processo, o tamanho do pool e as
+        conexões em uso, ociosas e excedentes, além do histograma (buckets cumulativos, em ms)
+        do tempo de espera por uma conexão e a quantidade de esperas que estouraram o timeout.
+
+        **Retorna:**
+            Um objeto JSON com o pid do processo e as estatísticas de cada engine.
+        """
+        engines = {
+            bind_key or "padrao": estatisticas_pool(engine)
+            for bind_key, engine in db.engines.items()
+        }
+        return {"pid": os.getpid(), "engines": engines}
+
+
+@blp.route("/metrics")
+class Metricas(MethodView):
+
+    def get(self):
+        """
+        Métricas no formato texto do Prometheus.
+
+        **Descrição:** Retorna, para este processo, os histogramas de latência, consultas SQL,
+        tempo de SQL e tamanho da resposta por método, rota e status, além das métricas do pool
+        de conexões. Não exige token, para poder ser coletado pelo Prometheus; responde 404 com
+        METRICAS_ATIVAS=0.
+
+        **Retorna:**
+            As métricas em text/plain (formato de exposição 0.0.4).
+        """
+        if "metricas" not in current_app.extensions:
+            abort(404)
+        return Response(exportar_metricas(db.engines), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,22 +1,94 @@
 from flask import jsonify
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
-from passlib.hash import pbkdf2_sha256
 from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity, get_jwt
-import logging.handlers
+import logging
 
-from blocklist import BLOCKLIST
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from blocklist import obter_blocklist
+from sqlalchemy.exc import SQLAlchemyError
 from extensions.database import db
+from extensions.senhas import ServicoSenhasSaturado, obter_servico_senhas
 
 
 from models.usuario import UsuarioModel
 from schema import PlainUsuarioLoginSchema, UsuarioTokenSchema
 from security import jwt_required_with_doc
+from utilities.transacao import salvar
 
 
 blp = Blueprint("Usuários", "usuários", description="Operações sobre o usuário")
 
+logger = logging.getLogger(__name__)
+
+
+def servico_senhas_saturado():
+    message = "Serviço de senhas saturado"
+    logger.warning(message)
+    abort(503, message="Muitas requisições de login no momento. Tente novamente.", headers={"Retry-After": "1"})
+
+
+# Partes das rotas antes e depois do hash da senha, compartilhadas com asgi.py,
+# que calcula o hash numa thread, fora do event loop.
+
+
+def criar_usuario(session, email, hash_senha):
+    """POST /registrar, depois do hash: salva o usuário e retorna a resposta com ele."""
+
+    usuario = UsuarioModel(
+        email=email,
+        senha=hash_senha,
+    )
+
+    # Salva em BD: e-mail duplicado é detectado pela restrição de unicidade do banco
+    session.add(usuario)
+    salvar(session, "criar usuario", "Erro ao criar usuario.", {"usuario.email": "E-mail já cadastrado"})
+    message = f"Usuário criado com sucesso"
+    logger.info(message)
+
+    usuario_schema = PlainUsuarioLoginSchema()
+    result = usuario_schema.dump(usuario)
+
+    return jsonify(result)
+
+
+def buscar_usuario(session, email):
+    """O usuário com o e-mail, ou None."""
+
+    return session.query(UsuarioModel).filter(UsuarioModel.email == email).first()
+
+
+def concluir_login(session, usuario, novo_hash):
+    """POST /login, com a senha já conferida: salva o novo hash, se houver, e gera os tokens."""
+
+    if novo_hash:
+        try:
+            usuario.senha = novo_hash
+            session.commit()
+            message = f"Hash da senha do usuário atualizado"
+            logger.debug(message)
+
+        except SQLAlchemyError as error:
+            session.rollback()
+            message = f"Error rehash usuario: {error}"
+            logger.warning(message)
+
+    dados_usuario = {
+        "usuario_id": usuario.id
+    }
+
+    access_token = create_access_token(
+        identity=usuario.id,
+        additional_claims=dados_usuario,
+        fresh=True
+    )
+    refresh_token = create_refresh_token(identity=usuario.id)
+
+    usuario_schema = UsuarioTokenSchema()
+    result = usuario_schema.dump(usuario)
+    result["token"] = {"access_token": access_token, "refresh_token": refresh_token}
+
+    return jsonify(result)
+
 
 @blp.route("/registrar")
 class RegistrarUsuario(MethodView):
@@ -29,6 +101,7 @@ class RegistrarUsuario(MethodView):
 
         **Descrição:** Recebe os dados de um novo usuário, valida e persiste no banco de dados.
         Se o e-mail já estiver cadastrado, retorna um erro 409.
+        Se o serviço de senhas estiver saturado, retorna um erro 503 com Retry-After.
         Se ocorrer um erro durante a operação de banco de dados, retorna um erro 400 ou 500.
 
         **Parâmetros:**
@@ -38,45 +111,12 @@ class RegistrarUsuario(MethodView):
             Um objeto JSON com as informações do usuário criado.
         """
 
-        email = usuario_data["email"]
-        senha = usuario_data["senha"]
-
-        if UsuarioModel.query.filter(UsuarioModel.email == email).first():
-            abort(409, message="E-mail já cadastrado")
-        
-        usuario = UsuarioModel(
-            email=email,
-            senha=pbkdf2_sha256.hash(senha),
-        )
-
-        # Salva em BD
         try:
-            db.session.add(usuario)
-            db.session.commit()
-
-            message = f"Usuário criado com sucesso"
-            logging.info(message)
-    
-        except IntegrityError as error:
-            message = f"Error create usuario: {error}"
-            logging.warning(message)
-            abort(
-                400,
-                message="Erro ao criar usuario.",
-            )
-        except SQLAlchemyError as error:
-            message = f"Error create usuario: {error}"
-            logging.warning(message)
-            abort(500, message="Server Error.")
-
-
+            hash_senha = obter_servico_senhas().gerar_hash(usuario_data["senha"])
+        except ServicoSenhasSaturado:
+            servico_senhas_saturado()
 
-        # return {"message": "Usuário criado com sucesso."}, 201
-
-        usuario_schema = PlainUsuarioLoginSchema()
-        result = usuario_schema.dump(usuario)
-      
-        return jsonify(result)
+        return criar_usuario(db.session, usuario_data["email"], hash_senha)
 
 
 @blp.route("/login")
@@ -90,6 +130,8 @@ class UsuarioLogin(MethodView):
 
         **Descrição:** Recebe as credenciais do usuário, valida e gera tokens de acesso e atualização.
         Se as credenciais forem inválidas, retorna um erro 401.
+        Se o serviço de senhas estiver saturado, retorna um erro 503 com Retry-After.
+        Se o hash da senha não seguir a política atual de rounds, ele é recalculado e salvo.
 
         **Parâmetros:**
             usuario_data (dict): As credenciais do usuário (e-mail e senha).
@@ -98,40 +140,19 @@ class UsuarioLogin(MethodView):
             Um objeto JSON com as informações do usuário e os tokens de acesso e atualização.
         """
 
-        email = usuario_data["email"]
-        senha = usuario_data["senha"]
-    
-        usuario = UsuarioModel.query.filter(
-            UsuarioModel.email == email
-        ).first()
-
-        if usuario and pbkdf2_sha256.verify(senha, usuario.senha):
-
-           
-            # usuario = UsuarioModel.query.filter(UsuarioModel.imobiliaria == usuario).first()
-            if usuario:
-                usuario_id = usuario.id
-            
-                dados_usuario = {
-                    "usuario_id": usuario_id
-                }
-
-                access_token = create_access_token(
-                    identity=usuario.id, 
-                    additional_claims=dados_usuario, 
-                    fresh=True
-                )
-                refresh_token = create_refresh_token(identity=usuario.id)
-
-
-                usuario_schema = UsuarioTokenSchema()
-                result = usuario_schema.dump(usuario)
-                result["token"] = {"access_token": access_token, "refresh_token": refresh_token}
-
-                
-                return jsonify(result)
-        
-        abort(401, message="Credenciais inválidas.")
+        usuario = buscar_usuario(db.session, usuario_data["email"])
+        if usuario is None:
+            abort(401, message="Credenciais inválidas.")
+
+        try:
+            senha_confere, novo_hash = obter_servico_senhas().verificar(usuario_data["senha"], usuario.senha)
+        except ServicoSenhasSaturado:
+            servico_senhas_saturado()
+
+        if not senha_confere:
+            abort(401, message="Credenciais inválidas.")
+
+        return concluir_login(db.session, usuario, novo_hash)
 
 
 @blp.route("/refresh")
@@ -161,13 +182,13 @@ class usuarioLogout(MethodView):
         """
         Realiza o logout do usuário.
 
-        **Descrição:** Invalida o token de acesso atual, adicionando-o a uma lista de bloqueio.
+        **Descrição:** Invalida o token de acesso atual, adicionando-o à blocklist até que ele expire.
         Se ocorrer um erro durante a operação, retorna um erro 401.
 
         **Retorna:**
             Um objeto JSON com uma mensagem de confirmação de logout.
         """
 
-        jti = get_jwt()["jti"]
-        BLOCKLIST.add(jti)
+        jwt = get_jwt()
+        obter_blocklist().adicionar(jwt["jti"], jwt.get("exp"))
         return {"message": "Logout realizado com sucesso."}
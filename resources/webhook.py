@@ -0,0 +1,154 @@
+import logging
+
+from flask import current_app, jsonify
+from flask.views import MethodView
+from flask_jwt_extended import get_jwt_identity
+from flask_smorest import Blueprint, abort
+
+from extensions.database import db
+from models.alteracao import ultima_sequencia
+from models.webhook import WebhookModel
+from schema import WebhookSchema
+from security import jwt_required_with_doc
+from utilities.transacao import salvar
+from utilities.webhooks import destino_permitido
+
+blp = Blueprint("Webhook", "webhook", description="Notificação das alterações do catálogo")
+
+logger = logging.getLogger(__name__)
+
+
+# Também usadas pelas rotas de asgi.py, com a sessão assíncrona
+
+
+def webhooks_do_usuario(session):
+    """Consulta dos webhooks do usuário do token; os dos demais usuários não existem para ele."""
+
+    return session.query(WebhookModel).filter(WebhookModel.usuario_id == get_jwt_identity())
+
+
+def listar_webhooks(session):
+    """GET /webhook: os webhooks do usuário, em ordem de ID."""
+
+    return webhooks_do_usuario(session).order_by(WebhookModel.id).all()
+
+
+def buscar_webhook(session, id):
+    """O webhook do usuário com o `id`, ou 404."""
+
+    webhook = webhooks_do_usuario(session).filter(WebhookModel.id == id).first()
+    if webhook is None:
+        abort(404)
+    return webhook
+
+
+def criar_webhook(session, webhook_data):
+    """POST /webhook: cadastra o webhook, a partir da última alteração do catálogo."""
+
+    if not current_app.config["WEBHOOK_REDE_PRIVADA"] and not destino_permitido(webhook_data["url"]):
+        message = "Destino do webhook fora da internet pública"
+        logger.error(message)
+        abort(422, message=message)
+
+    webhook = WebhookModel(**webhook_data, usuario_id=get_jwt_identity(), ultimo_evento=ultima_sequencia(session))
+    session.add(webhook)
+    salvar(session, "criar webhook", "Erro ao criar webhook.")
+    message = f"Webhook criado com sucesso"
+    logger.debug(message)
+
+    return webhook
+
+
+def excluir_webhook(session, id):
+    """DELETE /webhook/<id>: remove o webhook do usuário."""
+
+    webhook = buscar_webhook(session, id)
+    session.delete(webhook)
+    salvar(session, "deletar webhook", "Erro ao deletar webhook.")
+    message = f"Webhook excluído com sucesso"
+    logger.debug(message)
+
+    context = {"message": message}
+
+    return jsonify(context)
+
+
+@blp.route("/webhook")
+class Webhook(MethodView):
+
+    @jwt_required_with_doc()
+    @blp.arguments(WebhookSchema)
+    @blp.response(201, WebhookSchema)
+    def post(self, webhook_data):
+        """
+        Cadastra um webhook para receber as alterações do catálogo.
+
+        **Descrição:** A partir do cadastro, cada inclusão, alteração ou exclusão de imóvel ou
+        imobiliária é enviada por POST para a `url`, em lotes, no mesmo formato de
+        GET /imovel/changes (`{"alteracoes": [...]}`), em ordem de sequência. A entrega é "pelo
+        menos uma vez": ignore as sequências já recebidas. Com `segredo`, cada envio traz o
+        cabeçalho `X-Assinatura: sha256=<HMAC-SHA256 do corpo>`. Se o destino não responder 2xx,
+        o envio é repetido com espera crescente; depois de 20 falhas seguidas, o webhook é desativado.
+        O webhook pertence ao usuário que o cadastrou. Se a `url` apontar para um endereço que não
+        é público (loopback, rede privada, link-local), retorna um erro 422.
+        Se ocorrer um erro durante a operação de banco de dados, retorna um erro 500.
+
+        **Parâmetros:**
+            webhook_data (dict): url e, opcionalmente, segredo.
+
+        **Retorna:**
+            Um objeto JSON com as informações do webhook.
+        """
+        return criar_webhook(db.session, webhook_data)
+
+    @jwt_required_with_doc()
+    @blp.response(200, WebhookSchema(many=True))
+    def get(self):
+        """
+        Lista os webhooks cadastrados pelo usuário.
+
+        **Descrição:** Retorna os webhooks do usuário com a situação das entregas: a última
+        sequência entregue, as falhas seguidas, a próxima tentativa e o último erro.
+
+        **Retorna:**
+            Uma lista de objetos JSON com as informações dos webhooks.
+        """
+        return listar_webhooks(db.session)
+
+
+@blp.route("/webhook/<int:id>")
+class WebhookID(MethodView):
+
+    @jwt_required_with_doc()
+    @blp.response(200, WebhookSchema)
+    def get(self, id):
+        """
+        Busca um webhook pelo seu ID.
+
+        **Descrição:** Retorna o webhook com a situação das entregas, ou um erro 404 se ele não
+        existir ou for de outro usuário.
+
+        **Parâmetros:**
+            id (int): O ID do webhook a ser buscado.
+
+        **Retorna:**
+            Um objeto JSON com as informações do webhook.
+        """
+        return buscar_webhook(db.session, id)
+
+    @jwt_required_with_doc()
+    def delete(self, id):
+        """
+        Deleta um webhook pelo seu ID.
+
+        **Descrição:** Remove o webhook, que deixa de receber as alterações. Retorna um erro 404
+        se ele não existir ou for de outro usuário.
+        Se ocorrer um erro durante a operação de banco de dados, retorna um erro 500.
+
+        **Parâmetros:**
+            id (int): O ID do webhook a ser deletado.
+
+        **Retorna:**
+            Um objeto JSON com uma mensagem de confirmação.
+        """
+        return excluir_webhook(db.session, id)
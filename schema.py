@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields, validate
+from marshmallow import Schema, ValidationError, fields, validate, validates_schema
 
 from models.enums.tipo_imovel import TipoImovelEnum
 
@@ -27,17 +27,171 @@ class PlainImovelSchema(Schema):
     cep = fields.Str(required=True)
     cidade = fields.Str(required=True)
     estado = fields.Str(required=True)
+    latitude = fields.Float(allow_none=True, validate=validate.Range(min=-90, max=90))
+    longitude = fields.Float(allow_none=True, validate=validate.Range(min=-180, max=180))
     imobiliaria_id = fields.Int(required=True)
     
 
 class ImobiliariaSchema(PlainImobiliariaSchema):
     imoveis = fields.List(fields.Nested(PlainImovelSchema))
+    imoveis_total = fields.Int(dump_only=True)
+
+
+class ImobiliariaFiltroSchema(Schema):
+    # Imóveis listados em cada imobiliária; os demais em GET /imobiliaria/<id>/imoveis
+    imoveis_limit = fields.Int(missing=10, validate=validate.Range(min=0, max=500))
 
 
 class ImovelSchema(PlainImovelSchema):
     imobiliaria = fields.Nested(PlainImobiliariaSchema)
 
 
+class ImovelFiltroSchema(Schema):
+    cursor = fields.Int(missing=None)
+    limite = fields.Int(missing=50, validate=validate.Range(min=1, max=500))
+    cidade = fields.Str()
+    bairro = fields.Str()
+    estado = fields.Str()
+    tipo = fields.Str(validate=validate.OneOf(
+        [s.value for s in TipoImovelEnum]))
+    ativo = fields.Bool()
+    aluguel = fields.Bool()
+    venda = fields.Bool()
+    valor_venda_min = fields.Float()
+    valor_venda_max = fields.Float()
+    valor_aluguel_min = fields.Float()
+    valor_aluguel_max = fields.Float()
+
+
+class ImovelPaginaSchema(Schema):
+    imoveis = fields.List(fields.Nested(ImovelSchema))
+    next_cursor = fields.Int(allow_none=True)
+
+
+class ImobiliariaImoveisSchema(Schema):
+    imoveis = fields.List(fields.Nested(PlainImovelSchema))
+    next_cursor = fields.Int(allow_none=True)
+
+
+class ImovelProximidadeSchema(ImovelFiltroSchema):
+    class Meta:
+        exclude = ("cursor",)
+
+    lat = fields.Float(required=True, validate=validate.Range(min=-90, max=90))
+    lon = fields.Float(required=True, validate=validate.Range(min=-180, max=180))
+    raio = fields.Float(missing=2000, validate=validate.Range(min=1, max=50000))
+
+
+class ImovelCaixaSchema(ImovelFiltroSchema):
+    min_lat = fields.Float(required=True, validate=validate.Range(min=-90, max=90))
+    min_lon = fields.Float(required=True, validate=validate.Range(min=-180, max=180))
+    max_lat = fields.Float(required=True, validate=validate.Range(min=-90, max=90))
+    max_lon = fields.Float(required=True, validate=validate.Range(min=-180, max=180))
+
+    @validates_schema
+    def validar_caixa(self, dados, **kwargs):
+        for eixo in ("lat", "lon"):
+            minimo, maximo = dados.get(f"min_{eixo}"), dados.get(f"max_{eixo}")
+            if minimo is None or maximo is None:
+                continue
+            if minimo > maximo:
+                raise ValidationError(f"min_{eixo} deve ser menor ou igual a max_{eixo}.", f"max_{eixo}")
+            if maximo - minimo > 1:
+                raise ValidationError("A caixa pode ter no máximo 1 grau de lado.", f"max_{eixo}")
+
+
+class ImovelProximoSchema(ImovelSchema):
+    distancia_m = fields.Float()
+
+
+class ImovelProximidadeRespostaSchema(Schema):
+    imoveis = fields.List(fields.Nested(ImovelProximoSchema))
+
+
+class ImovelBuscaSchema(ImovelFiltroSchema):
+    cursor = fields.Int(missing=None, validate=validate.Range(min=0))
+    q = fields.Str(required=True, validate=validate.Length(min=1, max=200))
+
+
+class ImovelCatalogoSchema(Schema):
+    formato = fields.Str(missing="ndjson", validate=validate.OneOf(["ndjson", "csv"]))
+
+
+class AlteracaoFiltroSchema(Schema):
+    since = fields.Int(missing=None, validate=validate.Range(min=0))
+    limite = fields.Int(missing=500, validate=validate.Range(min=1, max=1000))
+
+
+class AlteracaoSchema(Schema):
+    seq = fields.Int()
+    entidade = fields.Str()
+    id = fields.Int()
+    operacao = fields.Str()
+    dados = fields.Dict(allow_none=True)
+
+
+class AlteracoesSchema(Schema):
+    alteracoes = fields.List(fields.Nested(AlteracaoSchema))
+    next_since = fields.Int()
+    tem_mais = fields.Bool()
+
+
+class WebhookSchema(Schema):
+    id = fields.Int(dump_only=True)
+    url = fields.Url(required=True, require_tld=False, schemes={"http", "https"})
+    segredo = fields.Str(load_only=True, validate=validate.Length(min=16, max=256))
+    ativo = fields.Bool(dump_only=True)
+    ultimo_evento = fields.Int(dump_only=True)
+    tentativas = fields.Int(dump_only=True)
+    proxima_tentativa = fields.DateTime(dump_only=True)
+    ultimo_erro = fields.Str(dump_only=True)
+    criado_em = fields.DateTime(dump_only=True)
+
+
+class ImovelImportacaoErroSchema(Schema):
+    linha = fields.Int()
+    erros = fields.Dict()
+
+
+class ImovelImportacaoSchema(Schema):
+    inseridos = fields.Int()
+    rejeitados = fields.Int()
+    erros = fields.List(fields.Nested(ImovelImportacaoErroSchema))
+
+
+class EstatisticaFiltroSchema(Schema):
+    estado = fields.Str()
+    cidade = fields.Str()
+    bairro = fields.Str()
+    tipo = fields.Str(validate=validate.OneOf(
+        [s.value for s in TipoImovelEnum]))
+    agrupar = fields.List(
+        fields.Str(validate=validate.OneOf(["estado", "cidade", "bairro", "tipo"])),
+        missing=["estado", "cidade", "bairro", "tipo"],
+    )
+
+
+class ResumoPrecoSchema(Schema):
+    quantidade = fields.Int()
+    media = fields.Float()
+    desvio_padrao = fields.Float()
+    p25 = fields.Float()
+    mediana = fields.Float()
+    p75 = fields.Float()
+
+
+class EstatisticaPrecoSchema(Schema):
+    estado = fields.Str()
+    cidade = fields.Str()
+    bairro = fields.Str()
+    tipo = fields.Str(allow_none=True)
+    venda = fields.Nested(ResumoPrecoSchema, allow_none=True)
+    aluguel = fields.Nested(ResumoPrecoSchema, allow_none=True)
+
+
+class EstatisticasPrecoSchema(Schema):
+    grupos = fields.List(fields.Nested(EstatisticaPrecoSchema))
+
 
 class PlainUsuarioLoginSchema(Schema):
     id = fields.Int(dump_only=True)
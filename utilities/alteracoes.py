@@ -0,0 +1,53 @@
+"""
+Itens do registro de alterações do catálogo, no formato de GET /imovel/changes.
+
+Usado pela rota e pelo envio aos webhooks (utilities.webhooks): cada item traz
+a sequência, a entidade, o ID, a operação e os dados atuais do registro.
+"""
+from models.alteracao import REMOCOES
+from models.imobiliaria import ImobiliariaModel
+from models.imovel import ImovelModel
+from schema import ImovelSchema, PlainImobiliariaSchema
+from utilities.serializacao import SerializadorCompilado
+
+SERIALIZADOR_IMOVEL = SerializadorCompilado(ImovelSchema(), ImovelModel)
+SERIALIZADOR_IMOBILIARIA = SerializadorCompilado(PlainImobiliariaSchema(), ImobiliariaModel)
+
+
+def dados_alteracoes(session, alteracoes):
+    """
+    Estado atual dos registros alterados, em JSON, por (entidade, id). Os
+    imóveis vêm no formato de GET /imovel e as imobiliárias sem os imóveis.
+    Registros excluídos (inclusive depois da alteração) ficam de fora.
+    """
+
+    ids = {"imovel": set(), "imobiliaria": set()}
+    for alteracao in alteracoes:
+        if alteracao.operacao not in REMOCOES:
+            ids[alteracao.entidade].add(alteracao.entidade_id)
+
+    dados = {}
+    for entidade, modelo, serializador in (
+        ("imovel", ImovelModel, SERIALIZADOR_IMOVEL),
+        ("imobiliaria", ImobiliariaModel, SERIALIZADOR_IMOBILIARIA),
+    ):
+        if ids[entidade]:
+            for linha in serializador.consulta(session).filter(modelo.id.in_(ids[entidade])):
+                dados[entidade, linha.id] = serializador.json(linha)
+    return dados
+
+
+def itens_alteracoes(session, alteracoes):
+    """Lista das alterações (linhas de listar_alteracoes) com os dados atuais de cada registro."""
+
+    dados = dados_alteracoes(session, alteracoes)
+    return [
+        {
+            "seq": alteracao.seq,
+            "entidade": alteracao.entidade,
+            "id": alteracao.entidade_id,
+            "operacao": alteracao.operacao,
+            "dados": dados.get((alteracao.entidade, alteracao.entidade_id)),
+        }
+        for alteracao in alteracoes
+    ]
@@ -1,10 +1,6 @@
-def apenas_digitos(string):
+from utilities.validacao import normalizar_digitos
 
-    digitos = ""
 
-    for d in string:
-        if d.isdigit():
-            digitos += d
+def apenas_digitos(string):
 
-    return digitos
-    
\ No newline at end of file
+    return normalizar_digitos([string])[0]
@@ -0,0 +1,63 @@
+"""
+Arquivamento dos imóveis inativos antigos (models.imovel_arquivado).
+
+O comando "flask arquivar-imoveis" move, em lotes, os imóveis inativos sem
+alteração há mais de ARQUIVO_IDADE_DIAS dias para a tabela imovel_arquivado,
+de modo que as listagens, buscas e estatísticas só percorrem os imóveis em
+uso. Para as listagens, o arquivamento é como uma exclusão (operação
+"arquivado" no registro de alterações).
+"""
+from datetime import timedelta
+
+from sqlalchemy import delete, insert, literal, select
+
+from extensions.cache import registrar_invalidacao
+from extensions.database import db
+from models.alteracao import ARQUIVADO, registrar_alteracoes
+from models.imovel import INATIVO, ImovelModel
+from models.imovel_arquivado import COLUNAS, ImovelArquivadoModel
+from models.versao_colecao import incrementar_versao
+from utilities.datas import agora_utc
+
+
+def arquivar_imoveis(idade_dias, tamanho_lote=1000):
+    """
+    Move para o arquivo os imóveis inativos sem alteração há mais de
+    `idade_dias` dias, em lotes de `tamanho_lote` com um commit por lote.
+    Retorna a quantidade de imóveis arquivados.
+    """
+
+    origem = ImovelModel.__table__
+    arquivo = ImovelArquivadoModel.__table__
+    inativo_antigo = INATIVO & (origem.c.atualizado_em < agora_utc() - timedelta(days=idade_dias))
+
+    arquivados = 0
+    while True:
+        # No PostgreSQL, pula os imóveis sendo editados em outra transação
+        imoveis = db.session.execute(
+            select(origem.c.id, origem.c.imobiliaria_id)
+            .where(inativo_antigo)
+            .order_by(origem.c.id)
+            .limit(tamanho_lote)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not imoveis:
+            break
+        ids = [imovel.id for imovel in imoveis]
+
+        selecionados = inativo_antigo & origem.c.id.in_(ids)
+        db.session.execute(
+            insert(arquivo).from_select(
+                COLUNAS + ["arquivado_em"],
+                select(*(origem.c[coluna] for coluna in COLUNAS), literal(agora_utc())).where(selecionados),
+            )
+        )
+        db.session.execute(delete(origem).where(selecionados))
+        # Inserções e exclusões do core não passam pelos eventos do ORM
+        incrementar_versao(db.session.connection())
+        registrar_alteracoes(db.session.connection(), "imovel", ids, ARQUIVADO)
+        registrar_invalidacao(db.session, imobiliarias={imovel.imobiliaria_id for imovel in imoveis})
+        db.session.commit()
+        arquivados += len(ids)
+
+    return arquivados
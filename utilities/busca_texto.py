@@ -0,0 +1,46 @@
+import re
+import unicodedata
+
+from sqlalchemy import column, func, literal_column, table
+
+from models.imovel import ImovelModel
+
+TERMO = re.compile(r"[0-9a-z]+")
+MAXIMO_TERMOS = 10
+
+_INDICE_SQLITE = table("imovel_busca", column("rowid"))
+
+
+def termos_busca(texto):
+    """
+    Separa o texto digitado em termos sem acentos e em minúsculas.
+
+    "Av. São João, 1000" -> ["av", "sao", "joao", "1000"]. Considera no
+    máximo MAXIMO_TERMOS termos.
+    """
+
+    sem_acentos = "".join(
+        caractere for caractere in unicodedata.normalize("NFKD", texto.lower())
+        if not unicodedata.combining(caractere)
+    )
+    return TERMO.findall(sem_acentos)[:MAXIMO_TERMOS]
+
+
+def filtrar_busca(query, termos, dialeto):
+    """
+    Restringe a consulta aos imóveis cujo endereço contém todos os termos,
+    cada um como prefixo de uma palavra ("paul" encontra "Paulista").
+
+    Retorna a tupla (query, relevancia), onde relevancia é a expressão SQL a
+    ordenar de forma crescente (os mais relevantes primeiro).
+    """
+
+    if dialeto == "sqlite":
+        consulta = " ".join(f'"{termo}"*' for termo in termos)
+        indice = literal_column("imovel_busca")
+        query = query.join(_INDICE_SQLITE, _INDICE_SQLITE.c.rowid == ImovelModel.id)
+        return query.filter(indice.op("MATCH")(consulta)), func.bm25(indice)
+
+    consulta = func.to_tsquery("simple", " & ".join(f"{termo}:*" for termo in termos))
+    coluna = literal_column("imovel.busca")
+    return query.filter(coluna.op("@@")(consulta)), -func.ts_rank(coluna, consulta)
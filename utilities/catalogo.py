@@ -0,0 +1,127 @@
+"""
+Arquivos pré-gerados do catálogo de imóveis ativos, para download completo.
+
+O comando "flask exportar-catalogo" percorre os imóveis ativos (com a
+imobiliária) em lotes, com cursor do lado do servidor nos bancos que suportam,
+e grava um arquivo NDJSON e/ou CSV comprimido com gzip. Cada exportação vai
+para um arquivo temporário no mesmo diretório e só então é renomeada
+(os.replace) para um nome com a data da geração, de modo que um arquivo do
+catálogo nunca é visto pela metade. GET /imovel/catalogo envia o arquivo mais
+recente com send_file, sem consultar o banco nem serializar os imóveis.
+"""
+import csv
+import enum
+import gzip
+import io
+import logging
+import os
+import tempfile
+import time
+
+from extensions.database import db
+from models.imovel import ATIVO, ImovelModel
+from schema import ImovelSchema
+from utilities.datas import agora_utc
+from utilities.serializacao import SerializadorCompilado
+
+logger = logging.getLogger(__name__)
+
+FORMATOS = ("ndjson", "csv")
+PREFIXO = "imoveis-"
+# Versões anteriores mantidas para os downloads em andamento
+VERSOES_MANTIDAS = 2
+NIVEL_COMPRESSAO = 6
+
+SERIALIZADOR = SerializadorCompilado(ImovelSchema(), ImovelModel)
+
+
+def nome_download(formato):
+    """Nome do arquivo para o cliente, sem a data da geração."""
+
+    return f"imoveis.{formato}.gz"
+
+
+def catalogo_atual(diretorio, formato):
+    """Caminho do arquivo mais recente do catálogo no formato, ou None se ainda não foi gerado."""
+
+    sufixo = f".{formato}.gz"
+    try:
+        nomes = sorted(
+            nome for nome in os.listdir(diretorio) if nome.startswith(PREFIXO) and nome.endswith(sufixo)
+        )
+    except FileNotFoundError:
+        return None
+    return os.path.join(diretorio, nomes[-1]) if nomes else None
+
+
+def _escrever_ndjson(arquivo, linhas):
+    for linha in linhas:
+        arquivo.write(SERIALIZADOR.json(linha) + "\n")
+
+
+def _escrever_csv(arquivo, linhas):
+    escritor = csv.writer(arquivo)
+    escritor.writerow(coluna.name for coluna in SERIALIZADOR.colunas)
+    for linha in linhas:
+        escritor.writerow(valor.value if isinstance(valor, enum.Enum) else valor for valor in linha)
+
+
+def _remover_antigos(diretorio, formato):
+    nomes = sorted(
+        nome for nome in os.listdir(diretorio) if nome.startswith(PREFIXO) and nome.endswith(f".{formato}.gz")
+    )
+    for nome in nomes[:-VERSOES_MANTIDAS]:
+        try:
+            os.remove(os.path.join(diretorio, nome))
+        except OSError as error:
+            # Ex.: no Windows, um arquivo ainda aberto por um download; fica para a próxima exportação
+            logger.warning(f"Catálogo antigo {nome} não removido: {error}")
+
+
+def exportar_catalogo(diretorio, formato, tamanho_lote=1000):
+    """
+    Gera o arquivo do catálogo de imóveis ativos no formato ("ndjson" ou "csv")
+    e o publica em `diretorio`. O NDJSON tem um imóvel por linha, no mesmo
+    formato de GET /imovel; o CSV tem uma coluna por campo, com os dados da
+    imobiliária nas colunas "imobiliaria__*". Retorna o caminho do arquivo.
+    """
+
+    os.makedirs(diretorio, exist_ok=True)
+    inicio = time.perf_counter()
+    query = (
+        SERIALIZADOR.consulta(db.session)
+        .filter(ATIVO)
+        .order_by(ImovelModel.id)
+        .yield_per(tamanho_lote)
+    )
+
+    temporario = tempfile.NamedTemporaryFile(dir=diretorio, prefix=f".{PREFIXO}", suffix=".tmp", delete=False)
+    try:
+        with temporario:
+            # O nome gravado no cabeçalho do gzip é o do download, não o do temporário
+            with gzip.GzipFile(
+                filename=nome_download(formato)[:-3], mode="wb", fileobj=temporario, compresslevel=NIVEL_COMPRESSAO
+            ) as compactado:
+                with io.TextIOWrapper(compactado, encoding="utf-8", newline="") as arquivo:
+                    if formato == "csv":
+                        _escrever_csv(arquivo, query)
+                    else:
+                        _escrever_ndjson(arquivo, query)
+            temporario.flush()
+            os.fsync(temporario.fileno())
+        # O temporário é criado só com permissão do dono; o servidor web (X-Sendfile) também lê o arquivo
+        os.chmod(temporario.name, 0o644)
+        caminho = os.path.join(diretorio, f"{PREFIXO}{agora_utc():%Y%m%dT%H%M%S%fZ}.{formato}.gz")
+        os.replace(temporario.name, caminho)
+    except BaseException:
+        os.remove(temporario.name)
+        raise
+    finally:
+        # Encerra a transação de leitura (e o cursor) usada na exportação
+        db.session.rollback()
+
+    _remover_antigos(diretorio, formato)
+
+    message = f"Catálogo {formato} exportado em {time.perf_counter() - inicio:.1f}s: {caminho}"
+    logger.info(message)
+    return caminho
@@ -0,0 +1,125 @@
+"""
+Preenchimento offline das coordenadas dos imóveis a partir do CEP.
+
+A tabela cep_centroide guarda o centro aproximado de cada prefixo de CEP e é
+carregada de um CSV (comando "flask importar-centroides"); o comando
+"flask preencher-coordenadas" usa o maior prefixo conhecido de cada imóvel
+sem coordenadas. Nenhum serviço externo de geocodificação é consultado.
+"""
+import csv
+
+from sqlalchemy import bindparam, delete, insert, select, update
+
+from extensions.cache import registrar_invalidacao
+from extensions.database import db
+from models.alteracao import ALTERADO, registrar_alteracoes
+from models.cep_centroide import CepCentroideModel
+from models.imovel import ImovelModel
+from models.versao_colecao import incrementar_versao
+from utilities.apenas_digitos import apenas_digitos
+from utilities.datas import agora_utc
+from utilities.geo import celula
+
+
+def importar_centroides(arquivo, tamanho_lote=5000):
+    """
+    Substitui a tabela de centroides pelo conteúdo de um CSV com as colunas
+    prefixo, latitude e longitude. Retorna a quantidade de prefixos importados.
+    """
+
+    db.session.execute(delete(CepCentroideModel))
+    quantidade = 0
+    lote = []
+    for linha in csv.DictReader(arquivo):
+        lote.append({
+            "prefixo": apenas_digitos(linha["prefixo"]),
+            "latitude": float(linha["latitude"]),
+            "longitude": float(linha["longitude"]),
+        })
+        if len(lote) == tamanho_lote:
+            db.session.execute(insert(CepCentroideModel), lote)
+            quantidade += len(lote)
+            lote = []
+    if lote:
+        db.session.execute(insert(CepCentroideModel), lote)
+        quantidade += len(lote)
+    db.session.commit()
+    return quantidade
+
+
+def preencher_coordenadas(tamanho_lote=1000):
+    """
+    Preenche latitude e longitude dos imóveis sem coordenadas com o centroide do
+    maior prefixo de CEP cadastrado. Percorre os imóveis por ID, em lotes de
+    `tamanho_lote`, com um commit por lote. Retorna a quantidade de imóveis
+    preenchidos.
+    """
+
+    centroides = {
+        prefixo: (latitude, longitude)
+        for prefixo, latitude, longitude in db.session.execute(
+            select(CepCentroideModel.prefixo, CepCentroideModel.latitude, CepCentroideModel.longitude)
+        )
+    }
+    if not centroides:
+        return 0
+    tamanhos = sorted({len(prefixo) for prefixo in centroides}, reverse=True)
+
+    tabela = ImovelModel.__table__
+    atualizar = (
+        update(tabela)
+        .where(tabela.c.id == bindparam("imovel_id"))
+        .values(
+            latitude=bindparam("lat"),
+            longitude=bindparam("lon"),
+            geocelula=bindparam("celula"),
+            versao=tabela.c.versao + 1,
+            atualizado_em=agora_utc(),
+        )
+    )
+
+    preenchidos = 0
+    ultimo_id = 0
+    while True:
+        imoveis = db.session.execute(
+            select(ImovelModel.id, ImovelModel.cep, ImovelModel.imobiliaria_id)
+            .where(ImovelModel.latitude.is_(None), ImovelModel.id > ultimo_id)
+            .order_by(ImovelModel.id)
+            .limit(tamanho_lote)
+        ).all()
+        if not imoveis:
+            break
+        ultimo_id = imoveis[-1].id
+
+        linhas = []
+        imobiliarias = set()
+        for imovel in imoveis:
+            cep = apenas_digitos(imovel.cep)
+            for tamanho in tamanhos:
+                coordenadas = centroides.get(cep[:tamanho])
+                if coordenadas is not None:
+                    latitude, longitude = coordenadas
+                    linhas.append({
+                        "imovel_id": imovel.id,
+                        "lat": latitude,
+                        "lon": longitude,
+                        "celula": celula(latitude, longitude),
+                    })
+                    imobiliarias.add(imovel.imobiliaria_id)
+                    break
+
+        if linhas:
+            db.session.execute(atualizar, linhas)
+            incrementar_versao(db.session.connection())
+            registrar_alteracoes(
+                db.session.connection(), "imovel", [linha["imovel_id"] for linha in linhas], ALTERADO
+            )
+            registrar_invalidacao(
+                db.session,
+                imoveis={linha["imovel_id"] for linha in linhas},
+                imobiliarias=imobiliarias,
+            )
+        db.session.commit()
+        preenchidos += len(linhas)
+
+    return preenchidos
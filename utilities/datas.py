@@ -0,0 +1,6 @@
+from datetime import datetime, timezone
+
+
+def agora_utc():
+    """Data e hora atuais em UTC, sem fuso (formato das colunas DateTime do banco)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,38 @@
+import hashlib
+from datetime import timezone
+
+from flask import Response, request
+
+
+def gerar_etag(*partes):
+    """Gera um ETag forte a partir das partes que identificam a versão da representação."""
+    return hashlib.sha1(":".join(map(str, partes)).encode()).hexdigest()
+
+
+def nao_modificado(etag, ultima_modificacao=None):
+    """
+    Indica se a representação em cache do cliente ainda é válida, conforme os
+    cabeçalhos If-None-Match (prioritário) ou If-Modified-Since da requisição.
+    """
+
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    if request.if_modified_since and ultima_modificacao is not None:
+        ultima_modificacao = ultima_modificacao.replace(microsecond=0, tzinfo=timezone.utc)
+        return ultima_modificacao <= request.if_modified_since
+
+    return False
+
+
+def com_validadores(resposta, etag, ultima_modificacao=None):
+    """Adiciona os cabeçalhos ETag e Last-Modified à resposta."""
+
+    resposta.set_etag(etag)
+    if ultima_modificacao is not None:
+        resposta.last_modified = ultima_modificacao.replace(tzinfo=timezone.utc)
+    return resposta
+
+
+def resposta_nao_modificada(etag, ultima_modificacao=None):
+    return com_validadores(Response(status=304), etag, ultima_modificacao)
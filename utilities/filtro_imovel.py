@@ -0,0 +1,95 @@
+import math
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import joinedload
+
+from models.enums.tipo_imovel import TipoImovelEnum
+from models.imovel import ImovelModel
+from utilities.geo import METROS_POR_GRAU, caixa_do_raio, faixas_celulas
+
+
+def filtrar_imoveis(query, filtros):
+    """
+    Aplica à consulta de imóveis os filtros recebidos na query string.
+
+    Filtros de igualdade: cidade, bairro, estado, tipo, ativo, aluguel e venda.
+    Filtros de faixa: valor_venda_min/max e valor_aluguel_min/max.
+    Filtros ausentes são ignorados.
+    """
+
+    for campo in ("cidade", "bairro", "estado", "ativo", "aluguel", "venda"):
+        if filtros.get(campo) is not None:
+            query = query.filter(getattr(ImovelModel, campo) == filtros[campo])
+
+    if filtros.get("tipo") is not None:
+        query = query.filter(ImovelModel.tipo == TipoImovelEnum(filtros["tipo"]))
+
+    if filtros.get("valor_venda_min") is not None:
+        query = query.filter(ImovelModel.valor_venda >= filtros["valor_venda_min"])
+    if filtros.get("valor_venda_max") is not None:
+        query = query.filter(ImovelModel.valor_venda <= filtros["valor_venda_max"])
+
+    if filtros.get("valor_aluguel_min") is not None:
+        query = query.filter(ImovelModel.valor_aluguel >= filtros["valor_aluguel_min"])
+    if filtros.get("valor_aluguel_max") is not None:
+        query = query.filter(ImovelModel.valor_aluguel <= filtros["valor_aluguel_max"])
+
+    return query
+
+
+def filtrar_caixa(query, min_lat, min_lon, max_lat, max_lon):
+    """
+    Restringe a consulta aos imóveis dentro do retângulo informado.
+
+    As células da grade que cobrem o retângulo formam uma faixa contígua de
+    `geocelula` por linha da grade, de modo que o índice ix_imovel_geocelula
+    lê apenas as células candidatas; as coordenadas do próprio índice
+    descartam os pontos das bordas que ficam fora do retângulo.
+    """
+
+    faixas = [
+        ImovelModel.geocelula.between(inicio, fim)
+        for inicio, fim in faixas_celulas(min_lat, min_lon, max_lat, max_lon)
+    ]
+    return query.filter(
+        or_(*faixas),
+        and_(
+            ImovelModel.latitude.between(min_lat, max_lat),
+            ImovelModel.longitude.between(min_lon, max_lon),
+        ),
+    )
+
+
+def filtrar_raio(query, latitude, longitude, raio_metros):
+    """
+    Restringe a consulta aos imóveis a até `raio_metros` do ponto informado.
+
+    Retorna a tupla (query, distancia2), onde distancia2 é a expressão SQL do
+    quadrado da distância em metros, pela aproximação equirretangular (erro
+    desprezível nos raios aceitos, de até 50 km), usada para ordenar.
+    """
+
+    query = filtrar_caixa(query, *caixa_do_raio(latitude, longitude, raio_metros))
+    escala_lon = METROS_POR_GRAU * math.cos(math.radians(latitude))
+    dy = (ImovelModel.latitude - latitude) * METROS_POR_GRAU
+    dx = (ImovelModel.longitude - longitude) * escala_lon
+    distancia2 = dx * dx + dy * dy
+    return query.filter(distancia2 <= raio_metros * raio_metros), distancia2
+
+
+def consulta_proximidade(latitude, longitude, raio_metros, filtros, limite, query=None):
+    """
+    Consulta dos `limite` imóveis mais próximos do ponto, a até `raio_metros`,
+    que atendem aos filtros. Retorna linhas (imovel, distancia2); com `query`,
+    parte dela em vez do select do modelo e acrescenta distancia2 às suas colunas.
+    """
+
+    if query is None:
+        query = select(ImovelModel).options(joinedload(ImovelModel.imobiliaria))
+    query, distancia2 = filtrar_raio(query, latitude, longitude, raio_metros)
+    return (
+        filtrar_imoveis(query, filtros)
+        .add_columns(distancia2)
+        .order_by(distancia2, ImovelModel.id)
+        .limit(limite)
+    )
@@ -0,0 +1,75 @@
+import math
+
+# Grade fixa de células de TAMANHO_CELULA graus (~1,1 km de latitude).
+# A célula de um ponto é um inteiro: linha * COLUNAS_GRADE + coluna, de modo
+# que as células de uma mesma linha são consecutivas e um retângulo de
+# células vira uma faixa contígua (BETWEEN) por linha.
+TAMANHO_CELULA = 0.01
+COLUNAS_GRADE = round(360 / TAMANHO_CELULA)
+METROS_POR_GRAU = 111320.0
+RAIO_TERRA_METROS = 6371008.8
+
+
+def _linha(latitude):
+    return int(math.floor((latitude + 90) / TAMANHO_CELULA))
+
+
+def _coluna(longitude):
+    return min(int(math.floor((longitude + 180) / TAMANHO_CELULA)), COLUNAS_GRADE - 1)
+
+
+def celula(latitude, longitude):
+    """Célula da grade que contém o ponto, ou None sem coordenadas."""
+
+    if latitude is None or longitude is None:
+        return None
+    return _linha(latitude) * COLUNAS_GRADE + _coluna(longitude)
+
+
+def faixas_celulas(min_lat, min_lon, max_lat, max_lon):
+    """Faixas (inicio, fim) de células que cobrem o retângulo, uma por linha da grade."""
+
+    coluna_inicial = _coluna(max(min_lon, -180))
+    coluna_final = _coluna(min(max_lon, 180))
+    return [
+        (linha * COLUNAS_GRADE + coluna_inicial, linha * COLUNAS_GRADE + coluna_final)
+        for linha in range(_linha(max(min_lat, -90)), _linha(min(max_lat, 90)) + 1)
+    ]
+
+
+def caixa_do_raio(latitude, longitude, raio_metros):
+    """Retângulo (min_lat, min_lon, max_lat, max_lon) que contém o círculo."""
+
+    delta_lat = raio_metros / METROS_POR_GRAU
+    delta_lon = raio_metros / (METROS_POR_GRAU * max(math.cos(math.radians(latitude)), 1e-6))
+    return latitude - delta_lat, longitude - delta_lon, latitude + delta_lat, longitude + delta_lon
+
+
+def distancia_metros(lat1, lon1, lat2, lon2):
+    """Distância pela fórmula de haversine."""
+
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RAIO_TERRA_METROS * math.asin(math.sqrt(a))
+
+
+# Raio da primeira tentativa da busca por proximidade
+RAIO_INICIAL_BUSCA = 250
+
+
+def raios_busca(raio_metros, inicial=RAIO_INICIAL_BUSCA, fator=4):
+    """
+    Raios crescentes, terminando em `raio_metros`, para a busca por proximidade.
+
+    Se o círculo menor já tem imóveis suficientes, eles são os mais próximos
+    também no círculo maior; assim, em regiões densas, a busca não ordena
+    todos os imóveis do raio pedido.
+    """
+
+    raio = min(inicial, raio_metros)
+    while raio < raio_metros:
+        yield raio
+        raio *= fator
+    yield raio_metros
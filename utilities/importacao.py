@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+import re
+
+# Bytes que não são UTF-8 válido, decodificados com errors="surrogateescape"
+BYTES_INVALIDOS = re.compile("[\udc80-\udcff]")
+
+
+class ErroLeitura(ValueError):
+    """O corpo não pôde ser lido a partir da linha `numero_linha`."""
+
+    def __init__(self, numero_linha, motivo):
+        super().__init__(f"linha {numero_linha}: {motivo}")
+        self.numero_linha = numero_linha
+        self.motivo = motivo
+
+
+def _linhas_utf8(texto):
+    for numero_linha, linha in enumerate(texto, start=1):
+        if BYTES_INVALIDOS.search(linha):
+            raise ErroLeitura(numero_linha, "o corpo não está em UTF-8.")
+        yield linha
+
+
+def ler_linhas(stream, formato):
+    """
+    Lê o corpo de uma importação em lote à medida que ele chega, sem carregá-lo
+    inteiro em memória.
+
+    Gera tuplas (numero_linha, dados), onde `dados` é um dict com os campos da
+    linha, ou (numero_linha, None) quando a linha não pôde ser interpretada.
+    No CSV, campos vazios são omitidos para que contem como não informados.
+
+    Lança ErroLeitura, com o número da linha, se o corpo não estiver em UTF-8 ou
+    o CSV não puder ser interpretado; as linhas anteriores já foram geradas.
+    """
+
+    # Os bytes inválidos são detectados linha a linha, e não no bloco decodificado
+    # à frente pelo TextIOWrapper, para o erro apontar a linha certa
+    texto = io.TextIOWrapper(stream, encoding="utf-8", errors="surrogateescape", newline="")
+
+    if formato == "csv":
+        leitor = csv.DictReader(_linhas_utf8(texto))
+        try:
+            for linha in leitor:
+                dados = {campo: valor for campo, valor in linha.items() if campo and valor not in ("", None)}
+                yield leitor.line_num, dados
+        except csv.Error as error:
+            raise ErroLeitura(leitor.line_num, f"CSV inválido ({error}).") from error
+
+    elif formato == "ndjson":
+        for numero_linha, linha in enumerate(_linhas_utf8(texto), start=1):
+            if not linha.strip():
+                continue
+            try:
+                dados = json.loads(linha)
+            except ValueError:
+                dados = None
+            if not isinstance(dados, dict):
+                dados = None
+            yield numero_linha, dados
+
+    else:
+        raise ValueError(f"Formato de importação inválido: {formato}")
+
+
+def em_lotes(iteravel, tamanho):
+    """Agrupa os itens de `iteravel` em listas de até `tamanho` itens."""
+
+    lote = []
+    for item in iteravel:
+        lote.append(item)
+        if len(lote) == tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
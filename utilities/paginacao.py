@@ -0,0 +1,22 @@
+def paginar_por_cursor(query, coluna, cursor=None, limite=50):
+    """
+    Pagina uma consulta por cursor (keyset) sobre uma coluna única e crescente.
+
+    Em vez de OFFSET, filtra `coluna > cursor` e ordena pela coluna, de modo que
+    o custo de cada página não depende da profundidade em que ela está.
+    Busca um registro a mais para saber se existe uma próxima página.
+
+    Retorna uma tupla (itens, next_cursor), onde next_cursor é None na última página.
+    """
+
+    if cursor is not None:
+        query = query.filter(coluna > cursor)
+
+    itens = query.order_by(coluna).limit(limite + 1).all()
+
+    next_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        next_cursor = getattr(itens[-1], coluna.key)
+
+    return itens, next_cursor
@@ -0,0 +1,155 @@
+"""
+Serialização rápida das respostas de leitura, compatível byte a byte com os schemas.
+
+SerializadorCompilado lê os campos de um schema do marshmallow uma única vez e
+gera o JSON de cada linha de uma consulta de colunas, sem criar objetos do ORM
+nem dicionários e sem passar pelo marshmallow a cada registro: cada campo vira
+uma posição na linha, com a mesma conversão que o campo do marshmallow faria, e
+o texto sai com as chaves já na ordem alfabética do jsonify.
+
+codificar() e resposta_json() geram o mesmo corpo que o jsonify (chaves
+ordenadas, separadores compactos, ASCII e quebra de linha no final) com o
+codificador JSON em C da biblioteca padrão, incluindo como estão os trechos
+JsonPronto gerados pelos serializadores.
+"""
+import json
+import math
+from json.encoder import encode_basestring_ascii
+
+from flask import current_app
+from marshmallow import fields
+from sqlalchemy import inspect
+from sqlalchemy.orm import ColumnProperty
+
+_codificador = json.JSONEncoder(ensure_ascii=True, separators=(",", ":"), sort_keys=True, check_circular=False)
+
+
+def _float_json(valor):
+    # Mesmo formato do codificador do json (repr, com NaN e Infinity)
+    if valor != valor:
+        return "NaN"
+    if math.isinf(valor):
+        return "Infinity" if valor > 0 else "-Infinity"
+    return float.__repr__(valor)
+
+
+# Tipo que o _serialize de cada campo do marshmallow produz (None continua None)
+# e o trecho de código que o escreve como o codificador do json
+CONVERSORES = {
+    fields.Integer: (int, "int.__repr__({})"),
+    fields.Float: (float, "_float_json({})"),
+    fields.Boolean: (bool, '("true" if {} else "false")'),
+    fields.String: (str, "_texto({})"),
+}
+
+
+class JsonPronto(str):
+    """Trecho de JSON já codificado, incluído como está por codificar()."""
+
+
+class SerializadorCompilado:
+    """
+    Gera o JSON de linhas de `colunas` no formato de `schema`, sobre `modelo`.
+
+    Campos que são colunas do modelo são lidos da linha; um Nested de
+    relacionamento muitos-para-um vira as colunas do modelo relacionado (com
+    LEFT JOIN em consulta()); os demais campos (ex.: List(Nested) ou valores
+    calculados na rota) são obrigatórios em json(), já no formato da resposta.
+
+    Como o __init__ das dataclasses, a função que gera o JSON de uma linha é
+    montada como código Python uma única vez, com um trecho por campo e as
+    chaves já na ordem alfabética, e compilada com exec.
+    """
+
+    def __init__(self, schema, modelo, prefixo="", colunas=None):
+        self.modelo = modelo
+        # Os serializadores aninhados acrescentam suas colunas à mesma lista,
+        # de modo que todas as posições são relativas à linha inteira
+        self.colunas = [] if colunas is None else colunas
+        self.relacionamentos = []
+        campos = []
+
+        for nome, campo in schema.dump_fields.items():
+            chave = campo.data_key or nome
+            atributo = campo.attribute or nome
+            propriedade = getattr(getattr(modelo, atributo, None), "property", None)
+            if isinstance(campo, fields.Nested) and propriedade is not None:
+                aninhado = SerializadorCompilado(
+                    campo.schema, propriedade.mapper.class_, f"{prefixo}{atributo}__", self.colunas
+                )
+                self.relacionamentos.append(getattr(modelo, atributo))
+                # Nulo quando o LEFT JOIN não encontra o registro
+                campos.append((chave, f'("null" if c{aninhado.posicao_chave} is None else {aninhado.expressao})'))
+            elif isinstance(propriedade, ColumnProperty) and type(campo) in CONVERSORES:
+                coluna = getattr(modelo, atributo)
+                variavel = f"c{len(self.colunas)}"
+                tipo_python, formato = CONVERSORES[type(campo)]
+                # O valor lido do banco já tem o tipo que o campo produziria, exceto em
+                # Float (inteiros viram float) e em tipos diferentes (ex.: Enum em String)
+                if tipo_python is float or getattr(coluna.type, "python_type", None) is not tipo_python:
+                    valor = f"{tipo_python.__name__}({variavel})"
+                else:
+                    valor = variavel
+                campos.append((chave, f'("null" if {variavel} is None else {formato.format(valor)})'))
+                self.colunas.append(coluna.label(f"{prefixo}{atributo}"))
+            else:
+                campos.append((chave, f"_codificar(valores[{chave!r}])"))
+
+        chave_primaria = f"{prefixo}{inspect(modelo).primary_key[0].key}"
+        self.posicao_chave = next(
+            (posicao for posicao, coluna in enumerate(self.colunas) if coluna.name == chave_primaria), None
+        )
+
+        # Chaves na ordem do sort_keys do jsonify
+        partes = []
+        for indice, (chave, expressao) in enumerate(sorted(campos, key=lambda item: item[0])):
+            partes.append(repr(("," if indice else "{") + encode_basestring_ascii(chave) + ":"))
+            partes.append(expressao)
+        partes.append(repr("}" if partes else "{}"))
+        self.expressao = "(" + " + ".join(partes) + ")"
+
+        self.fonte = "def gerar_json(linha, valores):\n"
+        if self.colunas:
+            variaveis = ", ".join(f"c{posicao}" for posicao in range(len(self.colunas)))
+            self.fonte += f"    {variaveis}, = linha[:{len(self.colunas)}]\n"
+        self.fonte += f"    return {self.expressao}\n"
+        namespace = dict(_AMBIENTE)
+        exec(self.fonte, namespace)
+        self._gerar_json = namespace["gerar_json"]
+
+    def consulta(self, session, *extras):
+        """Consulta (Query) das colunas do serializador, com as expressões `extras` no final de cada linha."""
+
+        query = session.query(*self.colunas, *extras).select_from(self.modelo)
+        for relacionamento in self.relacionamentos:
+            query = query.outerjoin(relacionamento)
+        return query
+
+    def json(self, linha, **valores):
+        """JSON de uma linha da consulta; os campos que não são colunas vêm em `valores`."""
+
+        return JsonPronto(self._gerar_json(linha, valores))
+
+
+def codificar(dados):
+    """Codifica em JSON como o jsonify: chaves ordenadas, separadores compactos e apenas ASCII."""
+
+    if isinstance(dados, JsonPronto):
+        return dados
+    if isinstance(dados, dict):
+        return "{" + ",".join(
+            encode_basestring_ascii(chave) + ":" + codificar(dados[chave]) for chave in sorted(dados)
+        ) + "}"
+    if isinstance(dados, (list, tuple)):
+        return "[" + ",".join(map(codificar, dados)) + "]"
+    return _codificador.encode(dados)
+
+
+# Nomes disponíveis no código gerado pelos serializadores
+_AMBIENTE = {"_codificar": codificar, "_float_json": _float_json, "_texto": encode_basestring_ascii}
+
+
+def resposta_json(dados, status=200):
+    """Resposta JSON com o mesmo corpo e cabeçalhos do jsonify."""
+
+    return current_app.response_class(codificar(dados) + "\n", status=status, mimetype="application/json")
@@ -0,0 +1,46 @@
+from flask import Response, request, stream_with_context
+
+from utilities.serializacao import codificar
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def streaming_solicitado():
+    """
+    Indica se o cliente pediu a resposta em streaming (NDJSON).
+
+    O streaming é ativado por `?stream=1` na query string ou pelo
+    cabeçalho `Accept: application/x-ndjson`.
+    """
+
+    if request.args.get("stream", "").lower() in ("1", "true"):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def resposta_ndjson(query, serializador, tamanho_lote=1000):
+    """
+    Retorna uma resposta que envia um objeto JSON por linha à medida que as
+    linhas são lidas do banco, sem montar a lista completa em memória.
+
+    A consulta é iterada com `yield_per`, que usa cursor do lado do servidor
+    nos bancos que suportam (ex.: PostgreSQL), mantendo a memória do worker
+    constante independentemente do tamanho da tabela. Cada linha é codificada
+    por `serializador` (um SerializadorCompilado).
+    """
+
+    def serializar():
+        for item in query.yield_per(tamanho_lote):
+            yield serializador.json(item)
+
+    return resposta_ndjson_objetos(serializar())
+
+
+def resposta_ndjson_objetos(objetos):
+    """Retorna uma resposta NDJSON que envia cada objeto de `objetos` (dicionário ou JsonPronto) em uma linha."""
+
+    def gerar():
+        for objeto in objetos:
+            yield codificar(objeto) + "\n"
+
+    return Response(stream_with_context(gerar()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,41 @@
+"""
+Commit das rotas de escrita, com as mesmas respostas de erro em toda a API.
+
+Usado pelas funções das rotas em resources/, que rodam tanto na sessão do
+Flask-SQLAlchemy quanto na sessão assíncrona do modo ASGI (por run_sync).
+"""
+import logging
+
+from flask_smorest import abort
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
+
+from utilities.unicidade import abortar_se_duplicado
+
+logger = logging.getLogger(__name__)
+
+
+def salvar(session, operacao, mensagem_erro, mensagens_unicidade=None):
+    """
+    Faz o commit da sessão. Em caso de erro, responde 409 se a restrição de
+    unicidade violada estiver em `mensagens_unicidade`, 400 com `mensagem_erro`
+    nas demais violações de integridade, 409 se outra requisição alterou ou
+    excluiu o registro depois da leitura (a coluna `versao` não confere) e 500
+    nos outros erros do banco.
+    """
+
+    try:
+        session.commit()
+    except IntegrityError as error:
+        abortar_se_duplicado(error, mensagens_unicidade or {})
+        message = f"400: Error ao {operacao}: {error}"
+        logger.warning(message)
+        abort(400, message=mensagem_erro)
+    except StaleDataError as error:
+        message = f"409: Error ao {operacao}: {error}"
+        logger.warning(message)
+        abort(409, message="O registro foi alterado por outra requisição. Busque-o de novo e repita a operação.")
+    except SQLAlchemyError as error:
+        message = f"500: Error ao {operacao}: {error}"
+        logger.warning(message)
+        abort(500, message="Server Error.")
@@ -0,0 +1,40 @@
+import logging
+import re
+
+from flask_smorest import abort
+
+logger = logging.getLogger(__name__)
+
+# Restrições de unicidade do PostgreSQL (nome padrão "<tabela>_<coluna>_key") -> "tabela.coluna"
+RESTRICOES_UNICAS = {
+    "imobiliaria_cnpj_key": "imobiliaria.cnpj",
+    "imobiliaria_email_key": "imobiliaria.email",
+    "imobiliaria_nome_fantasia_key": "imobiliaria.nome_fantasia",
+    "imobiliaria_usuario_id_key": "imobiliaria.usuario_id",
+    "usuario_email_key": "usuario.email",
+}
+
+UNIQUE_SQLITE = re.compile(r"UNIQUE constraint failed: (\w+\.\w+)")
+
+
+def restricao_violada(error):
+    """Retorna "tabela.coluna" da restrição de unicidade violada no IntegrityError, ou None."""
+
+    original = error.orig
+    nome = getattr(getattr(original, "diag", None), "constraint_name", None)  # psycopg2
+    if nome is None:
+        nome = getattr(original.__cause__, "constraint_name", None)  # asyncpg
+    if nome is not None:
+        return RESTRICOES_UNICAS.get(nome)
+
+    encontrado = UNIQUE_SQLITE.search(str(original))
+    return encontrado.group(1) if encontrado else None
+
+
+def abortar_se_duplicado(error, mensagens):
+    """Responde 409 com a mensagem da restrição violada, se ela estiver em `mensagens`."""
+
+    message = mensagens.get(restricao_violada(error))
+    if message:
+        logger.error(message)
+        abort(409, message=message)
@@ -1,29 +1,6 @@
-import re
+from utilities.validacao import cnpj_valido
 
-def validar_cnpj(cnpj):
-
-    # Remover caracteres não numéricos
-    cnpj = ''.join(re.findall('\d', str(cnpj)))
-    
-    if (not cnpj) or (len(cnpj) < 14):
-        return False
-  
-    # Pega apenas os 12 primeiros dígitos do CNPJ e gera os 2 dígitos que faltam
-    inteiros = list(map(int, cnpj))
-    novo = inteiros[:12]
 
-    prod = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-    while len(novo) < 14:
-        r = sum([x*y for (x, y) in zip(novo, prod)]) % 11
-        if r > 1:
-            f = 11 - r
-        else:
-            f = 0
-        novo.append(f)
-        prod.insert(0, 6)
+def validar_cnpj(cnpj):
 
-    # Se o número gerado coincidir com o número original, é válido
-    if novo == inteiros:
-        return True
-    return True
-    
\ No newline at end of file
+    return cnpj_valido(cnpj)
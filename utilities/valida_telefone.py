@@ -1,12 +1,6 @@
-def validar_telefone(telefone):
+from utilities.validacao import telefone_valido
 
-    digitos = ""
 
-    for d in telefone:
-        if d.isdigit():
-            digitos += d
+def validar_telefone(telefone):
 
-    if len(digitos) < 10 or len(digitos) > 14:
-        return False
-    return True
-    
\ No newline at end of file
+    return telefone_valido(telefone)
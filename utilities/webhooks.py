@@ -0,0 +1,232 @@
+"""
+Envio das alterações do catálogo aos webhooks cadastrados (POST /webhook).
+
+O registro de alterações (models.alteracao) é a caixa de saída: é gravado na
+mesma transação que altera os imóveis e as imobiliárias, com as sequências na
+ordem dos commits. Cada webhook guarda a última sequência entregue; o comando
+"flask despachar-webhooks", em um processo separado, lê as alterações
+seguintes de cada webhook em lotes e as envia por POST, no mesmo formato de
+GET /imovel/changes, com até `paralelo` entregas simultâneas. Webhooks na
+mesma sequência recebem o mesmo lote, lido e serializado uma única vez.
+
+A entrega é "pelo menos uma vez": a sequência do webhook só avança depois de
+uma resposta 2xx, e o destino deve ignorar as sequências já recebidas. Depois
+de uma falha, a próxima tentativa espera o dobro da anterior (com variação
+aleatória, para que os webhooks não voltem todos juntos), até ESPERA_MAXIMA;
+depois de MAXIMO_TENTATIVAS falhas seguidas, o webhook é desativado.
+
+Os envios só vão para endereços públicos: o endereço efetivamente conectado
+(depois da resolução do nome, a cada envio) é conferido, e loopback, redes
+privadas, link-local (ex.: 169.254.169.254) e endereços reservados são recusados
+como falha de entrega, assim como no cadastro (destino_permitido). Os envios não
+usam os proxies das variáveis de ambiente. Com WEBHOOK_REDE_PRIVADA=1
+(desenvolvimento e benchmarks), qualquer endereço é aceito.
+"""
+import hashlib
+import hmac
+import http.client
+import ipaddress
+import logging
+import random
+import socket
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from flask import current_app
+from sqlalchemy import or_, select, update
+
+from extensions.database import db
+from models.alteracao import listar_alteracoes, ultima_sequencia
+from models.webhook import WebhookModel
+from utilities.alteracoes import itens_alteracoes
+from utilities.datas import agora_utc
+from utilities.serializacao import codificar
+
+logger = logging.getLogger(__name__)
+
+ESPERA_INICIAL = 5
+ESPERA_MAXIMA = 3600
+MAXIMO_TENTATIVAS = 20
+CABECALHO_ASSINATURA = "X-Assinatura"
+
+
+class _SemRedirecionamento(urllib.request.HTTPRedirectHandler):
+    # Um redirecionamento transformaria o POST em GET; é tratado como falha
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class DestinoNaoPermitido(OSError):
+    pass
+
+
+def endereco_publico(endereco):
+    """Se o IP é público: não é de loopback, rede privada, link-local, multicast nem reservado."""
+
+    ip = ipaddress.ip_address(endereco.split("%")[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def destino_permitido(url):
+    """
+    Se todos os endereços do host da URL são públicos. Um host que ainda não
+    resolve é aceito: a entrega confere o endereço a cada conexão.
+    """
+
+    partes = urlsplit(url)
+    porta = partes.port or (443 if partes.scheme == "https" else 80)
+    try:
+        enderecos = socket.getaddrinfo(partes.hostname, porta, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        return True
+    return all(endereco_publico(info[4][0]) for info in enderecos)
+
+
+def _conectar_endereco_publico(endereco, *args, **kwargs):
+    # Confere o endereço conectado, e não o resolvido antes, para que um DNS que
+    # muda de resposta (DNS rebinding) não leve o envio a um endereço interno
+    conexao = socket.create_connection(endereco, *args, **kwargs)
+    conectado = conexao.getpeername()[0]
+    if not endereco_publico(conectado):
+        conexao.close()
+        raise DestinoNaoPermitido(f"destino fora da internet pública: {conectado}")
+    return conexao
+
+
+class _ConexaoHTTP(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _conectar_endereco_publico
+
+
+class _ConexaoHTTPS(http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _conectar_endereco_publico
+
+
+class _HTTPPublico(urllib.request.HTTPHandler):
+    def do_open(self, http_class, req, **kwargs):
+        return super().do_open(_ConexaoHTTP, req, **kwargs)
+
+
+class _HTTPSPublico(urllib.request.HTTPSHandler):
+    def do_open(self, http_class, req, **kwargs):
+        return super().do_open(_ConexaoHTTPS, req, **kwargs)
+
+
+_abrir = urllib.request.build_opener(
+    _SemRedirecionamento, _HTTPPublico, _HTTPSPublico, urllib.request.ProxyHandler({})
+).open
+_abrir_rede_privada = urllib.request.build_opener(_SemRedirecionamento).open
+
+
+def assinatura(segredo, corpo):
+    """Valor do cabeçalho X-Assinatura: HMAC-SHA256 do corpo com o segredo do webhook."""
+
+    return "sha256=" + hmac.new(segredo.encode("utf-8"), corpo, hashlib.sha256).hexdigest()
+
+
+def espera_tentativa(tentativas, espera_inicial=ESPERA_INICIAL):
+    """Segundos até a próxima tentativa depois de `tentativas` falhas seguidas."""
+
+    espera = min(espera_inicial * 2 ** (tentativas - 1), ESPERA_MAXIMA)
+    return espera * random.uniform(0.5, 1)
+
+
+def enviar(url, corpo, segredo=None, timeout=10, rede_privada=False):
+    """
+    Envia o corpo por POST; retorna None se o destino respondeu 2xx, ou a descrição do erro.
+    Sem `rede_privada`, recusa destinos que não são endereços públicos.
+    """
+
+    cabecalhos = {"Content-Type": "application/json", "User-Agent": "middleware-imobiliaria-webhooks"}
+    if segredo:
+        cabecalhos[CABECALHO_ASSINATURA] = assinatura(segredo, corpo)
+    requisicao = urllib.request.Request(url, data=corpo, headers=cabecalhos, method="POST")
+    try:
+        abrir = _abrir_rede_privada if rede_privada else _abrir
+        with abrir(requisicao, timeout=timeout) as resposta:
+            resposta.read()
+            status = resposta.status
+    except urllib.error.HTTPError as error:
+        return f"HTTP {error.code}"
+    except urllib.error.URLError as error:
+        return str(error.reason)
+    except (http.client.HTTPException, OSError) as error:
+        return f"{type(error).__name__}: {error}"
+    return None if 200 <= status < 300 else f"HTTP {status}"
+
+
+def despachar_webhooks(paralelo=4, tamanho_lote=100, timeout=10, espera_inicial=ESPERA_INICIAL):
+    """
+    Envia um lote das alterações pendentes a cada webhook ativo cuja próxima
+    tentativa já venceu e retorna a quantidade de alterações entregues.
+    """
+
+    agora = agora_utc()
+    webhooks = db.session.execute(
+        select(
+            WebhookModel.id, WebhookModel.url, WebhookModel.segredo, WebhookModel.ultimo_evento,
+            WebhookModel.tentativas,
+        )
+        .where(
+            WebhookModel.ativo.is_(True),
+            or_(WebhookModel.proxima_tentativa.is_(None), WebhookModel.proxima_tentativa <= agora),
+            WebhookModel.ultimo_evento < ultima_sequencia(db.session),
+        )
+        .order_by(WebhookModel.id)
+    ).all()
+    if not webhooks:
+        db.session.rollback()
+        return 0
+
+    # A compactação não remove exclusões ainda não entregues aos webhooks ativos,
+    # de modo que há alterações depois da sequência de cada um destes webhooks
+    lotes = {}
+    for webhook in webhooks:
+        if webhook.ultimo_evento not in lotes:
+            alteracoes = listar_alteracoes(db.session, webhook.ultimo_evento, tamanho_lote)
+            corpo = codificar({"alteracoes": itens_alteracoes(db.session, alteracoes)}).encode("utf-8")
+            lotes[webhook.ultimo_evento] = (alteracoes[-1].seq, len(alteracoes), corpo)
+    # Encerra a transação de leitura antes de esperar pela rede
+    db.session.rollback()
+
+    rede_privada = current_app.config["WEBHOOK_REDE_PRIVADA"]
+    with ThreadPoolExecutor(max_workers=paralelo) as executor:
+        erros = list(executor.map(
+            lambda webhook: enviar(
+                webhook.url, lotes[webhook.ultimo_evento][2], webhook.segredo, timeout, rede_privada
+            ),
+            webhooks,
+        ))
+
+    entregues = 0
+    for webhook, erro in zip(webhooks, erros):
+        ultima, quantidade, _ = lotes[webhook.ultimo_evento]
+        if erro is None:
+            valores = {"ultimo_evento": ultima, "tentativas": 0, "proxima_tentativa": None, "ultimo_erro": None}
+            entregues += quantidade
+        else:
+            tentativas = webhook.tentativas + 1
+            valores = {
+                "tentativas": tentativas,
+                "proxima_tentativa": agora_utc() + timedelta(seconds=espera_tentativa(tentativas, espera_inicial)),
+                "ultimo_erro": erro[:500],
+                "ativo": tentativas < MAXIMO_TENTATIVAS,
+            }
+            message = f"Webhook {webhook.id}: falha na entrega ({tentativas}ª seguida): {erro}"
+            logger.warning(message)
+        # Condicionado à sequência lida: outro processo pode ter entregado o lote antes
+        db.session.execute(
+            update(WebhookModel)
+            .where(WebhookModel.id == webhook.id, WebhookModel.ultimo_evento == webhook.ultimo_evento)
+            .values(**valores)
+        )
+    db.session.commit()
+    return entregues